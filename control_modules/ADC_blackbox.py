@@ -0,0 +1,212 @@
+"""
+This module implements a memory-mapped "black box" recorder for ADC_hat sensor frames.
+
+The file is preallocated once, so its size is bounded and recording for days costs constant memory. Frames
+wrap around when the file is full, the newest capacity frames are always kept. Writing a frame is two stores
+into the memory map and a counter update, the operating system writes the pages back in the background.
+
+Key features:
+1. Columnar layout: one timestamp column and one column per sensor, fixed width
+2. Header with sensor names and calibration, so a log can be read without the configuration file
+3. Wrap-around ring, bounded file size
+4. load_blackbox() opens a log as NumPy arrays without parsing the data
+
+File layout (little endian):
+    0     magic b'ADCBBOX1'
+    8     version uint32, header size uint32, sensors uint32, (padding)
+    24    capacity uint64
+    32    value dtype, 4 ASCII characters ('f4  ' or 'f8  ')
+    64    frames written uint64 (total, including overwritten ones)
+    72    metadata length uint32, followed by the metadata (JSON: sensor names, calibration, ...)
+    header size            timestamps: capacity x float64 (time.monotonic())
+    + capacity * 8         values: sensors x capacity of the value dtype (voltages)
+
+Usage:
+1. adc.start_blackbox('sensors.bbox', capacity=10000000), then read_frame() records every frame
+2. log = load_blackbox('sensors.bbox'); log['timestamps'], log['values'], calibrate_blackbox(log)
+"""
+
+import errno
+import json
+import os
+import time
+from typing import Dict, List
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+MAGIC = b'ADCBBOX1'
+VERSION = 1
+PAGE_SIZE = 4096
+COUNTER_OFFSET = 64
+METADATA_OFFSET = 72
+VALUE_DTYPES = ('f4', 'f8')
+ZERO_CHUNK = 1 << 20
+
+
+def _preallocate(file, size: int) -> None:
+    """
+    Reserve the disk blocks of the whole file before recording. A sparse file (truncate) only allocates a page on
+    its first write through the memory map, so a full disk would surface mid-recording as SIGBUS.
+    Uses posix_fallocate(), or writes zeros once where the platform or file system does not support it.
+    """
+    try:
+        os.posix_fallocate(file.fileno(), 0, size)
+        return
+    except AttributeError:
+        pass    # not available on this platform
+    except OSError as e:
+        if e.errno not in (errno.EINVAL, errno.EOPNOTSUPP, errno.ENOSYS):
+            raise
+
+    zeros = memoryview(bytes(ZERO_CHUNK))
+    remaining = size
+    while remaining:
+        remaining -= file.write(zeros[:min(remaining, ZERO_CHUNK)])
+    file.flush()
+
+
+class BlackBoxRecorder:
+    def __init__(self, path: str, sensor_names: List[str], capacity: int, metadata: Dict = None,
+                 value_dtype: str = 'f4') -> None:
+        """
+        Create (overwrite) a black box file.
+
+        :param path: Output file.
+        :param sensor_names: Column names, in the order of the recorded frames.
+        :param capacity: Frames kept before wrapping around.
+        :param metadata: JSON serializable information stored in the header, e.g. the calibration.
+        :param value_dtype: 'f4' (float32, half the size) or 'f8' for the sensor values.
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for the black box recorder.")
+        if value_dtype not in VALUE_DTYPES:
+            raise ValueError(f"Invalid value_dtype '{value_dtype}'. Options: {', '.join(VALUE_DTYPES)}")
+        if capacity <= 0:
+            raise ValueError("Black box capacity must be positive.")
+
+        self.path = path
+        self.sensor_names = list(sensor_names)
+        self.capacity = capacity
+        self.frames = 0
+
+        metadata = dict(metadata or {})
+        metadata['sensor_names'] = self.sensor_names
+        metadata.setdefault('created', time.time())
+        encoded = json.dumps(metadata).encode()
+        header_size = -(-(METADATA_OFFSET + 4 + len(encoded)) // PAGE_SIZE) * PAGE_SIZE
+
+        sensors = len(self.sensor_names)
+        itemsize = np.dtype(value_dtype).itemsize
+        size = header_size + capacity * 8 + sensors * capacity * itemsize
+
+        with open(path, 'wb') as file:
+            _preallocate(file, size)
+
+        self.header = np.memmap(path, dtype=np.uint8, mode='r+', shape=(header_size,))
+        self.header[:8] = np.frombuffer(MAGIC, dtype=np.uint8)
+        self.header[8:32].view('<u4')[:3] = (VERSION, header_size, sensors)
+        self.header[24:32].view('<u8')[0] = capacity
+        self.header[32:36] = np.frombuffer(value_dtype.ljust(4).encode(), dtype=np.uint8)
+        self.header[METADATA_OFFSET:METADATA_OFFSET + 4].view('<u4')[0] = len(encoded)
+        self.header[METADATA_OFFSET + 4:METADATA_OFFSET + 4 + len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+        self.counter = self.header[COUNTER_OFFSET:COUNTER_OFFSET + 8].view('<u8')
+        self.counter[0] = 0
+
+        self.timestamps = np.memmap(path, dtype='<f8', mode='r+', offset=header_size, shape=(capacity,))
+        self.values = np.memmap(path, dtype='<' + value_dtype, mode='r+', offset=header_size + capacity * 8,
+                                shape=(sensors, capacity))
+
+    def append(self, timestamp: float, values) -> None:
+        """Record one frame, values in the order of sensor_names."""
+        index = self.frames % self.capacity
+        self.timestamps[index] = timestamp
+        self.values[:, index] = values
+        self.frames += 1
+        self.counter[0] = self.frames  # written last, a reader never sees a half written frame as valid
+
+    def flush(self) -> None:
+        """Ask the operating system to write the mapped pages to disk now."""
+        self.timestamps.flush()
+        self.values.flush()
+        self.header.flush()
+
+    def close(self) -> None:
+        if self.header is None:
+            return
+        self.flush()
+        self.counter = None
+        self.timestamps = self.values = self.header = None
+        print(f"Black box {self.path}: {self.frames} frames recorded "
+              f"({min(self.frames, self.capacity)} kept)")
+
+
+def load_blackbox(path: str, chronological: bool = True) -> Dict:
+    """
+    Open a black box file.
+
+    :param chronological: Return the frames oldest first (copies the data if the ring has wrapped).
+                          False returns the memory-mapped columns as stored, without copying.
+    :return: Dictionary of 'sensor_names', 'metadata', 'frames' (total written), 'timestamps' (n,) and
+             'values' (n, sensors).
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy is required to load a black box file.")
+
+    header = np.memmap(path, dtype=np.uint8, mode='r', shape=(METADATA_OFFSET + 4,))
+    if bytes(header[:8]) != MAGIC:
+        raise ValueError(f"{path} is not a black box file")
+    version, header_size, sensors = (int(value) for value in header[8:20].view('<u4'))
+    if version != VERSION:
+        raise ValueError(f"Unsupported black box version {version}")
+    capacity = int(header[24:32].view('<u8')[0])
+    value_dtype = bytes(header[32:36]).decode().strip()
+    frames = int(header[COUNTER_OFFSET:COUNTER_OFFSET + 8].view('<u8')[0])
+    metadata_length = int(header[METADATA_OFFSET:METADATA_OFFSET + 4].view('<u4')[0])
+
+    with open(path, 'rb') as file:
+        file.seek(METADATA_OFFSET + 4)
+        metadata = json.loads(file.read(metadata_length))
+    expected_size = header_size + capacity * 8 + sensors * capacity * np.dtype(value_dtype).itemsize
+    if os.path.getsize(path) < expected_size:
+        raise ValueError(f"{path} is truncated")
+
+    timestamps = np.memmap(path, dtype='<f8', mode='r', offset=header_size, shape=(capacity,))
+    values = np.memmap(path, dtype='<' + value_dtype, mode='r', offset=header_size + capacity * 8,
+                       shape=(sensors, capacity)).T
+
+    kept = min(frames, capacity)
+    if not chronological or frames <= capacity:
+        timestamps, values = timestamps[:kept], values[:kept]
+    else:
+        start = frames % capacity
+        timestamps = np.concatenate((timestamps[start:], timestamps[:start]))
+        values = np.concatenate((values[start:], values[:start]))
+
+    return {
+        'sensor_names': metadata['sensor_names'],
+        'metadata': metadata,
+        'frames': frames,
+        'timestamps': timestamps,
+        'values': values,
+    }
+
+
+def calibrate_blackbox(log: Dict):
+    """
+    Calibrate the recorded voltages with the calibration stored in the header (ADC_hat.read_frame() semantics).
+
+    :param log: Result of load_blackbox().
+    :return: float64 array (n, sensors).
+    """
+    gain = np.asarray(log['metadata']['gain'], dtype=np.float64)
+    cutoff = np.asarray([-np.inf if value is None else value for value in log['metadata']['cutoff']],
+                        dtype=np.float64)
+    voltages = np.asarray(log['values'], dtype=np.float64)
+    calibrated = (voltages - 0.5) * gain
+    calibrated[voltages <= cutoff] = 0.0
+    return calibrated
@@ -0,0 +1,323 @@
+"""
+This module implements streaming (sample-by-sample) filters for the ADC_hat sensor readings.
+
+Every filter keeps its state between samples, so each reading costs one O(1) update() call instead of
+re-filtering a list of samples.
+
+Key features:
+1. Low-pass (exponential moving average) filter
+2. One-dimensional Kalman filter
+3. Running median and Hampel (spike rejecting) filters over a fixed window, O(log n) lookups per sample
+4. Moving average and decimation (block average, lower output rate), O(1) per sample
+5. create_filter() builds a filter, or a chain of filters, from FILTER_CONFIG settings with per-sensor overrides
+
+Usage:
+1. sensor_filter = create_filter('kalman', {'Q': 0.0001, 'R': 0.001, 'P': 0.7})
+2. Call sensor_filter.update(value) for every new sample, it returns the filtered value
+3. create_filter(['hampel', 'decimate'], FILTER_CONFIG) chains filters, the output of one feeds the next
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Dict, Optional
+
+
+class LowPassFilter:
+    """filtered = alpha * previous + (1 - alpha) * value. The first sample initializes the state."""
+    PARAMETERS = {'alpha': float}
+
+    def __init__(self, alpha: float) -> None:
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value: float) -> float:
+        previous = self.value
+        if previous is None:
+            previous = value
+        self.value = self.alpha * previous + (1 - self.alpha) * value
+        return self.value
+
+    def reset(self) -> None:
+        self.value = None
+
+
+class KalmanFilter:
+    """
+    Kalman filter for a constant-value model.
+
+    :param Q: Process noise covariance.
+    :param R: Measurement noise covariance.
+    :param P: Initial error covariance. The first sample initializes the estimate.
+    """
+    PARAMETERS = {'Q': float, 'R': float, 'P': float}
+
+    def __init__(self, Q: float, R: float, P: float) -> None:
+        self.Q = Q
+        self.R = R
+        self.initial_P = P
+        self.P = P
+        self.value = None
+
+    def update(self, z: float) -> float:
+        if self.value is None:
+            self.value = z
+            return z
+
+        P = self.P + self.Q                     # Prediction: increase the estimate uncertainty
+        K = P / (P + self.R)                    # Kalman gain
+        self.value = self.value + K * (z - self.value)  # Update the estimate with measurement z
+        self.P = (1 - K) * P                    # Update the error covariance
+        return self.value
+
+    def reset(self) -> None:
+        self.P = self.initial_P
+        self.value = None
+
+
+class RunningMedianFilter:
+    """
+    Median of the last window samples.
+
+    The window is kept as a FIFO plus a sorted list: finding the insert/remove position is a bisection,
+    the median is an index lookup.
+    """
+    PARAMETERS = {'window': int}
+
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise ValueError("Median filter window must be at least 1")
+        self.window = window
+        self.samples = deque()
+        self.sorted = []
+
+    def _push(self, value: float) -> None:
+        if len(self.samples) == self.window:
+            del self.sorted[bisect_left(self.sorted, self.samples.popleft())]
+        self.samples.append(value)
+        insort(self.sorted, value)
+
+    def median(self) -> float:
+        ordered = self.sorted
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+    def update(self, value: float) -> float:
+        self._push(value)
+        return self.median()
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.sorted = []
+
+
+class HampelFilter(RunningMedianFilter):
+    """
+    Hampel outlier rejection: a sample further than n_sigmas * 1.4826 * MAD from the window median is replaced by
+    the median, other samples pass unchanged.
+
+    The MAD (median absolute deviation) is selected from the sorted window without building the deviation list:
+    deviations left and right of the median are two sorted runs, the k-th smallest of them is a bisection.
+    """
+    PARAMETERS = {'window': int, 'n_sigmas': float}
+    MAD_SCALE = 1.4826  # MAD to standard deviation for normally distributed noise
+
+    def __init__(self, window: int, n_sigmas: float = 3.0) -> None:
+        if window < 3:
+            raise ValueError("Hampel filter window must be at least 3")
+        super().__init__(window)
+        self.n_sigmas = n_sigmas
+        self.outliers = 0
+
+    def _kth_deviation(self, k: int, median: float, split: int) -> float:
+        """k-th smallest (0-based) |x - median| of the window. split: index of the first sample >= median."""
+        ordered = self.sorted
+        left_count = split
+        right_count = len(ordered) - split
+
+        def left(i):   # i-th smallest deviation below the median
+            return median - ordered[split - 1 - i]
+
+        def right(j):  # j-th smallest deviation above the median
+            return ordered[split + j] - median
+
+        # Smallest number of left deviations i such that the (k + 1) smallest are i left + (k + 1 - i) right
+        low, high = max(0, k + 1 - right_count), min(k + 1, left_count)
+        while low < high:
+            i = (low + high) // 2
+            if left(i) < right(k - i):
+                low = i + 1
+            else:
+                high = i
+        j = k + 1 - low
+        candidates = []
+        if low > 0:
+            candidates.append(left(low - 1))
+        if j > 0:
+            candidates.append(right(j - 1))
+        return max(candidates)
+
+    def update(self, value: float) -> float:
+        self._push(value)
+        median = self.median()
+
+        count = len(self.sorted)
+        split = bisect_left(self.sorted, median)
+        middle = count // 2
+        if count % 2:
+            mad = self._kth_deviation(middle, median, split)
+        else:
+            mad = (self._kth_deviation(middle - 1, median, split) + self._kth_deviation(middle, median, split)) / 2
+
+        if abs(value - median) > self.n_sigmas * self.MAD_SCALE * mad:
+            self.outliers += 1
+            return median
+        return value
+
+
+class MovingAverageFilter:
+    """Mean of the last window samples, kept as a running sum."""
+    PARAMETERS = {'window': int}
+
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise ValueError("Moving average window must be at least 1")
+        self.window = window
+        self.samples = deque()
+        self.total = 0.0
+
+    def update(self, value: float) -> float:
+        if len(self.samples) == self.window:
+            self.total -= self.samples.popleft()
+        self.samples.append(value)
+        self.total += value
+        return self.total / len(self.samples)
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self.total = 0.0
+
+
+class DecimationFilter:
+    """
+    Averages blocks of factor samples and publishes one value per block (oversampling to a lower output rate).
+
+    update() returns the last published value, so the output only changes every factor samples; updated is True
+    after the sample that completed a block.
+    """
+    PARAMETERS = {'factor': int}
+
+    def __init__(self, factor: int) -> None:
+        if factor < 1:
+            raise ValueError("Decimation factor must be at least 1")
+        self.factor = factor
+        self.total = 0.0
+        self.count = 0
+        self.value = None
+        self.updated = False
+
+    def update(self, value: float) -> float:
+        self.total += value
+        self.count += 1
+        if self.count == self.factor:
+            self.value = self.total / self.factor
+            self.total = 0.0
+            self.count = 0
+            self.updated = True
+        else:
+            self.updated = False
+            if self.value is None:
+                return value    # nothing published yet
+        return self.value
+
+    def reset(self) -> None:
+        self.total = 0.0
+        self.count = 0
+        self.value = None
+        self.updated = False
+
+
+class FilterChain:
+    """
+    Filters applied in order, each one filtering the output of the previous one.
+
+    A decimating filter that holds its output ends the chain for that sample: the filters after it only see the
+    published block values, and update() returns the held chain output with updated False.
+    """
+
+    def __init__(self, filters) -> None:
+        self.filters = list(filters)
+        self.value = None
+        self.updated = False
+
+    def update(self, value: float) -> float:
+        for sensor_filter in self.filters:
+            value = sensor_filter.update(value)
+            if not getattr(sensor_filter, 'updated', True):
+                self.updated = False
+                if self.value is None:
+                    return value    # nothing published yet
+                return self.value
+        self.value = value
+        self.updated = True
+        return value
+
+    def reset(self) -> None:
+        for sensor_filter in self.filters:
+            sensor_filter.reset()
+        self.value = None
+        self.updated = False
+
+
+FILTER_TYPES = {
+    'low_pass': LowPassFilter,
+    'kalman': KalmanFilter,
+    'median': RunningMedianFilter,
+    'hampel': HampelFilter,
+    'moving_average': MovingAverageFilter,
+    'decimate': DecimationFilter,
+}
+
+# Parameters that may be left out of FILTER_CONFIG
+DEFAULTS = {
+    'hampel': {'n_sigmas': 3.0},
+}
+
+
+def create_filter(filter_type, settings: Dict, overrides: Optional[Dict] = None, sensor_name: str = None):
+    """
+    Build a streaming filter.
+
+    :param filter_type: Key of FILTER_TYPES, e.g. 'low_pass' or 'kalman', or a list of them for a FilterChain.
+    :param settings: FILTER_CONFIG, the parameters of each filter type are read from the section named after it.
+                     For a single filter type, the parameters themselves are accepted too.
+    :param overrides: Per-sensor parameters, only the parameter names of the filter type are used from it
+                      (in a chain, a parameter applies to every filter that has it).
+    :param sensor_name: Used in error messages.
+    :return: Filter object with update(value) and reset().
+    """
+    if isinstance(filter_type, (list, tuple)):
+        return FilterChain(create_filter(single_type, settings, overrides, sensor_name)
+                           for single_type in filter_type)
+
+    filter_class = FILTER_TYPES.get(filter_type)
+    if filter_class is None:
+        raise ValueError(f"Unknown filter type '{filter_type}' for sensor '{sensor_name}'. "
+                         f"Options: {', '.join(FILTER_TYPES)}")
+
+    settings = settings or {}
+    if isinstance(settings.get(filter_type), dict):
+        settings = settings[filter_type]
+
+    parameters = {}
+    for name, parameter_type in filter_class.PARAMETERS.items():
+        value = (overrides or {}).get(name, settings.get(name))
+        if value is None:
+            if name in DEFAULTS.get(filter_type, {}):
+                continue
+            raise ValueError(f"Filter '{filter_type}' for sensor '{sensor_name}' needs parameter '{name}'")
+        parameters[name] = parameter_type(float(value))
+
+    return filter_class(**parameters)
+
@@ -6,9 +6,16 @@ Key features:
 2. Support for different types of sensors: pressure and angle sensors
 3. Raw voltage reading and scaling based on sensor type
 4. Calibration functions for pressure and angle sensors
-5. Various filtering options including low-pass and Kalman filters
+5. Various filtering options including low-pass and Kalman filters (stateful, one O(1) update per sample)
 6. Simulation mode for testing without hardware
 7. Tracking and resetting of sensor ranges
+8. Optional background sampling thread filling per-sensor timestamped ring buffers (start_sampling)
+9. Parallel acquisition: one sampling worker per MCP3424 chip, so conversions on all chips/boards overlap
+10. Array frame API (read_frame): all sensors in a fixed order as a NumPy array, calibrated vectorized
+11. Memory-mapped black box recorder of every read_frame() frame (start_blackbox)
+12. Sliding-window range statistics (min, max, mean, variance over the last range_window seconds)
+13. Acquisition timestamps per sample, and resampling of all sensors to one instant (resample, resample_frame)
+14. Binary telemetry stream of the read_frame() frames over a local socket (start_telemetry)
 
 The main class, ADC_hat, handles:
 - Initialization of ADC boards based on configuration
@@ -17,19 +24,34 @@ The main class, ADC_hat, handles:
 - Applying filters to sensor data
 - Tracking the range of sensor values
 - Simulating ADC behavior when hardware is not available with synthetic voltage generation
+- Sampling sensors in the background, so the control loop reads buffered values without waiting for I2C
 
 Usage:
 1. Create a YAML configuration file defining your ADC setup and sensors
 2. Initialize the ADC_hat with the configuration file and desired settings
 3. Use methods like read_raw(), read_scaled(), or read_filtered() to get sensor data
 4. Optionally use simulation mode for testing without physical hardware
+5. Or call start_sampling() once and read adc.latest() / adc.buffer(name).window(n) in the control loop
+6. With start_sampling() running, adc.resample() / adc.resample_frame() give all sensors at the same instant
 """
 import yaml
 import math
 import time
 import random
+import threading
+from array import array
+from collections import deque
 from typing import Dict, Tuple, Optional, List
 
+from .ADC_filters import FILTER_TYPES, create_filter, LowPassFilter, KalmanFilter
+from .ADC_blackbox import BlackBoxRecorder
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # only needed for the array frame API (read_frame)
+
 try:
     from ADCPi import ADCPi
 except ImportError:
@@ -37,8 +59,16 @@ except ImportError:
 
 
 class ADC_hat:
+    # Maximum conversions per second of the MCP3424 for each bit rate
+    SAMPLES_PER_SECOND = {12: 240, 14: 60, 16: 15, 18: 3.75}
+
+    # Each ADCPi board has two MCP3424 chips: channels 1-4 on the first address, 5-8 on the second
+    CHANNELS_PER_CHIP = 4
+
     def __init__(self, config_file: str, decimals: int = 2, simulation_mode: bool = False,
-                 min_sim_voltage: float = 0.5, max_sim_voltage: float = 4.5, frequency: float = 1.0):
+                 min_sim_voltage: float = 0.5, max_sim_voltage: float = 4.5, frequency: float = 1.0,
+                 simulate_conversion_time: bool = False, simulation_config: Optional[Dict] = None,
+                 range_window: float = 10.0, windowed_angle_offset: bool = False):
         """
         Initialize ADC_hat with configuration from a YAML file.
 
@@ -48,18 +78,30 @@ class ADC_hat:
         :param min_sim_voltage: Minimum voltage for the SIMULATED ADC.
         :param max_sim_voltage: Maximum voltage for the SIMULATED ADC.
         :param frequency: Frequency of the sine wave for simulation.
+        :param simulate_conversion_time: Make the SIMULATED ADC take as long per conversion as the real chip.
+        :param simulation_config: Settings of the SIMULATED signals (waveforms, noise, spikes, seed, realtime),
+                                  see ADCPiStub and SignalGenerator.
+        :param range_window: Length of the sliding window of the windowed range statistics, in seconds.
+        :param windowed_angle_offset: read_filtered() offsets angles by the windowed minimum instead of the
+                                      lifetime minimum, so an old spike does not skew the output forever.
         """
         self.decimals = decimals
         self.simulation_mode = simulation_mode
+        self.simulate_conversion_time = simulate_conversion_time
 
         if simulation_mode:
             global ADCPi
             ADCPi = lambda addr1, addr2, bit_rate: ADCPiStub(addr1, addr2, bit_rate, min_sim_voltage, max_sim_voltage,
-                                                             frequency)
+                                                             frequency, simulate_conversion_time,
+                                                             simulation_config)
             print("Running in simulation mode.")
 
         self._load_config(config_file)
         self.adcs: Dict[str, ADCPi] = {}
+        # ADCPi instance and lock of each (board, chip). The ADCPi object keeps per-read state, so every chip
+        # gets its own instance and chips can convert concurrently.
+        self.chip_adcs: Dict[Tuple[str, int], ADCPi] = {}
+        self.chip_locks: Dict[Tuple[str, int], threading.Lock] = {}
         self.initialized = False
         self.min_voltage: Dict[str, float] = {}
         self.min_angle: Dict[str, float] = {}
@@ -67,6 +109,25 @@ class ADC_hat:
         self.min_pressure: Dict[str, float] = {}
         self.max_pressure: Dict[str, float] = {}
 
+        # Range statistics over the last range_window seconds, next to the lifetime min/max above
+        self.range_window = range_window
+        self.windowed_angle_offset = windowed_angle_offset
+        self.window_ranges: Dict[str, WindowedRange] = {name: WindowedRange(range_window)
+                                                        for name in self.sensor_configs}
+
+        # Streaming filter of each sensor, built once from FILTER_CONFIG and kept between read_filtered() calls
+        self.filters = self._build_filters()
+
+        # Background sampling, see start_sampling()
+        self.buffers: Dict[str, SampleBuffer] = {}
+        self.sampling_threads = []
+        self.sampling_event = threading.Event()
+        self.worker_sweeps = []
+        self.sampling_start_time = None
+
+        self.blackbox = None
+        self.telemetry = None
+
         self.initialize_adc()
 
     def _load_config(self, config_file: str):
@@ -84,11 +145,73 @@ class ADC_hat:
         except (yaml.YAMLError, KeyError) as e:
             raise ValueError(f"Error parsing configuration file: {e}")
 
+        # All sensors in a fixed order: pressure sensors first, then angle sensors. This is the column order of
+        # read_frame(). Merged once here instead of on every read.
+        self.sensor_configs = {**self.pressure_sensors, **self.angle_sensors}
+        self.sensor_names = list(self.sensor_configs)
+        if NUMPY_AVAILABLE:
+            self._build_frame_arrays()
+
+    def _build_frame_arrays(self) -> None:
+        """
+        Per-sensor calibration as arrays, so a frame of voltages is calibrated with a few vectorized operations.
+        value = (voltage - 0.5) * gain where voltage > cutoff, else 0 (same as calibrate_pressure/calibrate_angle).
+        """
+        count = len(self.sensor_names)
+        self.frame_gain = np.empty(count)
+        self.frame_cutoff = np.empty(count)
+        for index, (sensor_name, sensor_config) in enumerate(self.sensor_configs.items()):
+            if sensor_name in self.pressure_sensors:
+                self.frame_gain[index] = 1000 / (4.5 - 0.5) * sensor_config['calibration_value']
+                self.frame_cutoff[index] = 0.40
+            else:
+                self.frame_gain[index] = sensor_config.get('steps_per_revolution') / (4.5 - 0.5)
+                self.frame_cutoff[index] = -np.inf
+        self._frame_voltages = np.empty(count)
+        self._frame_mask = np.empty(count, dtype=bool)
+
+    def _build_filters(self) -> Dict[str, object]:
+        """
+        Create one filter object per sensor.
+
+        Angle sensors use their own 'filter' or the default_filter. Pressure sensors pass through unfiltered unless
+        they configure their own 'filter'. An unknown filter type is reported and the sensor passes through.
+        Settings come from the FILTER_CONFIG section of the filter type, overridden by an optional FILTER_CONFIG
+        section named after the sensor and then by filter parameters written under the sensor itself.
+        'filter' may also be a list of filter types, applied in order (e.g. [hampel, decimate]).
+        """
+        default_filter = self.filter_configs.get('default_filter')
+        filters = {}
+        for sensor_name, sensor_config in self.sensor_configs.items():
+            if sensor_name in self.pressure_sensors:
+                filter_type = sensor_config.get('filter')
+            else:
+                filter_type = sensor_config.get('filter', default_filter)
+            if filter_type is None:
+                continue
+
+            filter_types = filter_type if isinstance(filter_type, (list, tuple)) else [filter_type]
+            unknown = [str(single_type) for single_type in filter_types if single_type not in FILTER_TYPES]
+            if unknown:
+                print(f"Unknown filter type: {', '.join(unknown)} for sensor '{sensor_name}'. Returning raw data.")
+                continue
+
+            overrides = dict(self.filter_configs.get(sensor_name) or {})
+            overrides.update(sensor_config)
+            filters[sensor_name] = create_filter(filter_type, self.filter_configs, overrides,
+                                                 sensor_name)
+        return filters
+
+    def reset_filters(self):
+        """Forget the filter state of every sensor, the next sample restarts each filter."""
+        for sensor_filter in self.filters.values():
+            sensor_filter.reset()
+
     def initialize_adc(self):
         """Initialize ADC boards based on sensor configurations."""
         board_needs_initialization = {board_name: False for board_name in self.i2c_addresses.keys()}
 
-        for sensor_config in {**self.pressure_sensors, **self.angle_sensors}.values():
+        for sensor_config in self.sensor_configs.values():
             board_name = sensor_config['input'][0]
             if board_name in board_needs_initialization:
                 board_needs_initialization[board_name] = True
@@ -97,10 +220,13 @@ class ADC_hat:
             if need_init:
                 addr1, addr2 = self.i2c_addresses[board_name]
                 try:
-                    adc_instance = ADCPi(addr1, addr2, self.bit_rate)
-                    adc_instance.set_conversion_mode(self.conversion_mode)
-                    adc_instance.set_pga(self.pga_gain)
-                    self.adcs[board_name] = adc_instance
+                    for chip in range(2):
+                        adc_instance = ADCPi(addr1, addr2, self.bit_rate)
+                        adc_instance.set_conversion_mode(self.conversion_mode)
+                        adc_instance.set_pga(self.pga_gain)
+                        self.chip_adcs[(board_name, chip)] = adc_instance
+                        self.chip_locks[(board_name, chip)] = threading.Lock()
+                    self.adcs[board_name] = self.chip_adcs[(board_name, 0)]
                     print(f"Initialized {board_name} with addresses {hex(addr1)}, {hex(addr2)}")
                 except OSError as e:
                     raise OSError(f"Failed to initialize ADCPi for {board_name}! Error: {e}")
@@ -114,7 +240,7 @@ class ADC_hat:
             return {}
 
         raw_readings = {}
-        for sensor_name, sensor_config in {**self.pressure_sensors, **self.angle_sensors}.items():
+        for sensor_name, sensor_config in self.sensor_configs.items():
             voltage = self._read_raw(sensor_config)
             if voltage is not None:
                 raw_readings[sensor_name] = round(voltage,self.decimals)
@@ -125,18 +251,306 @@ class ADC_hat:
         """Read raw voltage based on the sensor configuration."""
         board_name = sensor_config['input'][0]
         channel = sensor_config['input'][1]
-        adc_instance = self.adcs.get(board_name)
+        chip_key = self.chip_of(sensor_config)
+        adc_instance = self.chip_adcs.get(chip_key)
         if adc_instance:
-            return adc_instance.read_voltage(channel)
+            with self.chip_locks[chip_key]:
+                return adc_instance.read_voltage(channel)
         else:
             print(f"ADC instance for board {board_name} not found.")
             return None
 
-    def read_scaled(self, read: Optional[str] = None) -> Dict[str, float]:
+    def chip_of(self, sensor_config: Dict) -> Tuple[str, int]:
+        """(board name, chip index) of the MCP3424 that converts the sensor's channel."""
+        return sensor_config['input'][0], (sensor_config['input'][1] - 1) // self.CHANNELS_PER_CHIP
+
+    def read_frame(self, out=None, timestamps=None):
+        """
+        Read all sensors into a NumPy array in the fixed order of self.sensor_names, calibrated and not rounded.
+        Sensor ranges and filters are not updated, that is left to the dictionary API (read_scaled/read_filtered).
+
+        :param out: Optional float64 array of len(sensor_names) to fill, so a control loop can reuse one array.
+        :param timestamps: Optional float64 array of len(sensor_names), filled with the acquisition time
+                           (time.monotonic() after the conversion) of each sensor. The sensors are converted one
+                           after the other, so the first and last sample of a frame can be far apart.
+        :return: (timestamp, values). timestamp is time.monotonic() after the last conversion.
+                 A sensor whose board is missing reads NaN.
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for read_frame().")
+
+        voltages = self._frame_voltages
+        self.read_frame_voltages(enumerate(self.sensor_configs.values()), voltages, timestamps)
+        return self.finish_frame(time.monotonic(), voltages, out)
+
+    def read_frame_voltages(self, sensors, voltages, timestamps=None) -> None:
+        """
+        Read raw voltages into a frame array.
+
+        :param sensors: (frame index, sensor config) pairs to read, e.g. the sensors of one chip.
+        :param voltages: Frame voltage array, missing boards read NaN.
+        :param timestamps: Optional array for the acquisition time of each read sensor.
+        """
+        read_raw = self._read_raw
+        for index, sensor_config in sensors:
+            voltage = read_raw(sensor_config)
+            voltages[index] = np.nan if voltage is None else voltage
+            if timestamps is not None:
+                timestamps[index] = time.monotonic()
+
+    def finish_frame(self, timestamp: float, voltages, out=None):
+        """Record a read frame of voltages to the black box (if active) and calibrate it, see read_frame()."""
+        if self.blackbox is not None:
+            self.blackbox.append(timestamp, voltages)
+
+        values = self.calibrate_frame(voltages, out)
+        if self.telemetry is not None:
+            self.telemetry.publish_array(timestamp, values)
+        return timestamp, values
+
+    def start_blackbox(self, path: str, capacity: int = 1000000, value_dtype: str = 'f4') -> None:
+        """
+        Record the voltages of every read_frame() frame to a preallocated memory-mapped file, wrapping around
+        when it is full. The header stores the sensor names and calibration; open it with
+        ADC_blackbox.load_blackbox().
+
+        :param path: Output file, overwritten if it exists.
+        :param capacity: Frames kept. File size is about capacity * (8 + sensors * 4) bytes with float32 values.
+        :param value_dtype: 'f4' or 'f8' for the voltages.
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for the black box recorder.")
+        self.stop_blackbox()
+
+        metadata = {
+            'bit_rate': self.bit_rate,
+            'pga_gain': self.pga_gain,
+            'sensors': self.sensor_configs,
+            # calibrated = (voltage - 0.5) * gain, 0 where voltage <= cutoff (None: no cutoff)
+            'gain': self.frame_gain.tolist(),
+            'cutoff': [None if math.isinf(value) else value for value in self.frame_cutoff.tolist()],
+        }
+        self.blackbox = BlackBoxRecorder(path, self.sensor_names, capacity, metadata, value_dtype)
+        print(f"Recording sensor frames to {path} ({capacity} frames)")
+
+    def stop_blackbox(self) -> None:
+        if self.blackbox is not None:
+            blackbox = self.blackbox
+            self.blackbox = None
+            blackbox.close()
+
+    def start_telemetry(self, publisher, name: str = 'sensors') -> None:
+        """
+        Publish every read_frame() frame (calibrated values in the order of sensor_names) as a telemetry stream.
+
+        :param publisher: telemetry.TelemetryPublisher.
+        :param name: Stream name.
+        """
+        self.telemetry = publisher.stream(name, self.sensor_names)
+
+    def stop_telemetry(self) -> None:
+        if self.telemetry is not None:
+            telemetry = self.telemetry
+            self.telemetry = None
+            telemetry.flush()
+
+    def calibrate_frame(self, voltages, out=None):
+        """
+        Calibrate voltages in the order of self.sensor_names, vectorized.
+
+        :param voltages: Array of shape (..., len(sensor_names)), e.g. one frame or frames x sensors.
+        :param out: Optional output array of the same shape.
+        :return: Calibrated values (pressure / angle), not rounded.
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for calibrate_frame().")
+
+        voltages = np.asarray(voltages, dtype=np.float64)
+        if voltages.shape[-1] != len(self.sensor_names):
+            raise ValueError(f"Expected {len(self.sensor_names)} voltages per frame, got {voltages.shape[-1]}.")
+
+        # Single frames use the preallocated mask, batches allocate their own
+        mask = self._frame_mask if voltages.shape == self._frame_mask.shape else None
+        mask = np.less_equal(voltages, self.frame_cutoff, out=mask)
+        out = np.subtract(voltages, 0.5, out=out)
+        np.multiply(out, self.frame_gain, out=out)
+        np.copyto(out, 0.0, where=mask)    # pressure below the cutoff; NaN (missing board) stays NaN
+        return out
+
+    def start_sampling(self, sensors: Optional[List[str]] = None, capacity: int = 1024,
+                       rate: Optional[float] = None, parallel: bool = True, apply_filters: bool = False) -> None:
+        """
+        Start sampling sensors continuously into per-sensor ring buffers of calibrated values.
+
+        :param sensors: Sensor names to sample, default all configured sensors.
+        :param capacity: Samples kept per sensor.
+        :param rate: Sweeps (all sensors of a worker once) per second. None samples back to back, paced by the ADC
+                     conversion time. If the simulated ADC answers instantly, None paces like the hardware would.
+        :param parallel: One worker thread per chip, so conversions on different chips and boards overlap and the
+                         aggregate sample rate scales with the number of chips. False samples everything in turn.
+        :param apply_filters: Buffer filtered values (each sensor's FILTER_CONFIG filters, own state). With a
+                              decimating filter only the published values are buffered, at the lower rate.
+        """
+        if self.sampling_threads:
+            print("Sampling already running.")
+            return
+
+        all_sensors = self.sensor_configs
+        if sensors is None:
+            sensors = list(all_sensors)
+        unknown = [name for name in sensors if name not in all_sensors]
+        if unknown:
+            raise ValueError(f"Unknown sensor(s): {', '.join(unknown)}")
+        if not sensors:
+            raise ValueError("No sensors to sample.")
+
+        self.buffers = {name: SampleBuffer(capacity) for name in sensors}
+        # Separate filter objects, the ones of read_filtered() belong to the caller's thread
+        filters = self._build_filters() if apply_filters else {}
+        plans = {}
+        for name in sensors:
+            calibrate = self.calibrate_pressure if name in self.pressure_sensors else self.calibrate_angle
+            worker_key = self.chip_of(all_sensors[name]) if parallel else None
+            plans.setdefault(worker_key, []).append((all_sensors[name], calibrate, self.buffers[name],
+                                                     filters.get(name)))
+
+        self.worker_sweeps = [0] * len(plans)
+        self.sampling_start_time = time.monotonic()
+        self.sampling_event.clear()
+        for worker, plan in enumerate(plans.values()):
+            worker_rate = rate
+            if worker_rate is None and self.simulation_mode and not self.simulate_conversion_time:
+                worker_rate = self.SAMPLES_PER_SECOND.get(self.bit_rate, 60) / len(plan)
+            thread = threading.Thread(target=self._sampling_loop, args=(plan, worker_rate, worker), daemon=True)
+            self.sampling_threads.append(thread)
+            thread.start()
+        print(f"Sampling {len(sensors)} sensor(s) in the background with {len(plans)} worker(s).")
+
+    def stop_sampling(self) -> None:
+        """Stop the sampling threads. The buffers keep their samples."""
+        if self.sampling_threads:
+            self.sampling_event.set()
+            for thread in self.sampling_threads:
+                thread.join()
+            self.sampling_threads = []
+            print("Stopped sampling.")
+
+    def _sampling_loop(self, plan, rate: Optional[float], worker: int) -> None:
+        period = 1.0 / rate if rate else 0.0
+        next_time = time.monotonic()
+        sweeps = self.worker_sweeps
+        while not self.sampling_event.is_set():
+            for sensor_config, calibrate, buffer, sensor_filter in plan:
+                voltage = self._read_raw(sensor_config)
+                if voltage is None:
+                    continue
+                timestamp = time.monotonic()
+                value = calibrate(voltage, sensor_config)
+                if sensor_filter is not None:
+                    value = sensor_filter.update(value)
+                    if not getattr(sensor_filter, 'updated', True):
+                        continue
+                buffer.append(timestamp, value)
+            sweeps[worker] += 1
+
+            if period:
+                # Absolute deadlines, skipping missed sweeps instead of bursting to catch up
+                next_time += period
+                now = time.monotonic()
+                if next_time < now:
+                    next_time = now
+                self.sampling_event.wait(next_time - now)
+
+    def buffer(self, sensor_name: str) -> 'SampleBuffer':
+        """Ring buffer of a sampled sensor, with latest(), window(n) and since(t)."""
+        try:
+            return self.buffers[sensor_name]
+        except KeyError:
+            raise ValueError(f"Sensor '{sensor_name}' is not being sampled, see start_sampling().")
+
+    def latest(self, sensor_name: Optional[str] = None):
+        """
+        Newest buffered sample. Never waits for the ADC.
+
+        :param sensor_name: Sensor name, or None for all sampled sensors.
+        :return: (timestamp, value), None if there is no sample yet. For all sensors a dictionary of those.
+        """
+        if sensor_name is not None:
+            return self.buffer(sensor_name).latest()
+        return {name: buffer.latest() for name, buffer in self.buffers.items()}
+
+    def common_time(self) -> Optional[float]:
+        """
+        Newest time every sampled sensor has a sample at or after, i.e. the oldest of the newest samples.
+        Resampling to this time interpolates between real samples for every sensor, without extrapolating.
+
+        :return: Monotonic timestamp, None while a sensor has no sample yet.
+        """
+        newest = [buffer.latest() for buffer in self.buffers.values()]
+        if not newest or None in newest:
+            return None
+        return min(timestamp for timestamp, _ in newest)
+
+    def resample(self, timestamp: Optional[float] = None, method: str = 'linear') -> Tuple[Optional[float], Dict[str, float]]:
+        """
+        Values of all sampled sensors at one instant, from the sample buffers (see start_sampling()).
+        Sensors sampled one after the other are milliseconds apart; this gives the control loop a
+        time-consistent snapshot instead.
+
+        :param timestamp: time.monotonic() time to resample to, default common_time().
+        :param method: 'linear' interpolates between the samples around the time, 'hold' keeps the last sample
+                       at or before it (zero-order hold). Outside the buffered samples the nearest one is used.
+        :return: (timestamp, {sensor name: value}). Sensors without samples are left out.
+                 (None, {}) while common_time() is not known yet.
+        """
+        if timestamp is None:
+            timestamp = self.common_time()
+            if timestamp is None:
+                return None, {}
+        values = {}
+        for name, buffer in self.buffers.items():
+            value = buffer.value_at(timestamp, method)
+            if value is not None:
+                values[name] = value
+        return timestamp, values
+
+    def resample_frame(self, timestamp: Optional[float] = None, method: str = 'linear', out=None):
+        """
+        resample() as a NumPy array in the order of self.sensor_names, NaN for sensors that are not sampled or
+        have no samples yet.
+
+        :param out: Optional float64 array of len(sensor_names) to fill.
+        :return: (timestamp, values).
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for resample_frame().")
+        if out is None:
+            out = np.empty(len(self.sensor_names))
+        timestamp, values = self.resample(timestamp, method)
+        for index, name in enumerate(self.sensor_names):
+            out[index] = values.get(name, np.nan)
+        return timestamp, out
+
+    def get_sampling_stats(self) -> Dict[str, float]:
+        """Sweeps (of the slowest worker) and samples per second since start_sampling()."""
+        if self.sampling_start_time is None:
+            return {'workers': 0, 'sweeps': 0, 'sweep_rate': 0.0, 'sample_rate': 0.0}
+        elapsed = time.monotonic() - self.sampling_start_time
+        samples = sum(buffer.total for buffer in self.buffers.values())
+        sweeps = min(self.worker_sweeps) if self.worker_sweeps else 0
+        return {
+            'workers': len(self.worker_sweeps),
+            'sweeps': sweeps,
+            'sweep_rate': sweeps / elapsed if elapsed > 0 else 0.0,
+            'sample_rate': samples / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def read_scaled(self, read: Optional[str] = None, timestamps: bool = False) -> Dict[str, float]:
         """
         Read and scale the sensor data.
 
         :param read: Optional; Specify 'pressure', 'angle', or None to read both types.
+        :param timestamps: Return (acquisition time, value) per sensor, time.monotonic() after its conversion.
         :return: A dictionary of scaled sensor readings.
         """
         scaled_readings = {}
@@ -146,7 +560,9 @@ class ADC_hat:
                 voltage = self._read_raw(sensor_config)
                 if voltage is not None:
                     scaled_value = self.calibrate_pressure(voltage, sensor_config)
-                    scaled_readings[sensor_name] = round(scaled_value,self.decimals)
+                    scaled_value_rounded = round(scaled_value,self.decimals)
+                    scaled_readings[sensor_name] = ((time.monotonic(), scaled_value_rounded) if timestamps
+                                                    else scaled_value_rounded)
                     self._update_sensor_range('pressure', sensor_name, scaled_value)
 
         if read is None or read == 'angle':
@@ -154,7 +570,9 @@ class ADC_hat:
                 voltage = self._read_raw(sensor_config)
                 if voltage is not None:
                     scaled_value = self.calibrate_angle(voltage, sensor_config)
-                    scaled_readings[sensor_name] = round(scaled_value,self.decimals)
+                    scaled_value_rounded = round(scaled_value,self.decimals)
+                    scaled_readings[sensor_name] = ((time.monotonic(), scaled_value_rounded) if timestamps
+                                                    else scaled_value_rounded)
                     self._update_sensor_range('angle', sensor_name, scaled_value)
 
         return scaled_readings
@@ -164,12 +582,10 @@ class ADC_hat:
         scaled_data = self.read_scaled(read)  # Get scaled values directly from sensors
         filtered_data = {}
 
+        filters = self.filters
         for sensor_name, scaled_value in scaled_data.items():
-            sensor_config = self.pressure_sensors.get(sensor_name) or self.angle_sensors.get(sensor_name)
-
-            if not sensor_config:
-                print(f"[Debug] Unexpected sensor name '{sensor_name}' found in scaled_data.")
-                continue
+            sensor_filter = filters.get(sensor_name)
+            filtered_value = sensor_filter.update(scaled_value) if sensor_filter is not None else scaled_value
 
             if sensor_name in self.angle_sensors:
                 if sensor_name not in self.min_angle:
@@ -182,18 +598,16 @@ class ADC_hat:
 
                 # print(f"MIN/MAX: {self.min_angle[sensor_name]} / {self.max_angle[sensor_name]}")
 
-                # Apply the filter
-                sensor_filter_type = sensor_config.get('filter', self.filter_configs.get('default_filter'))
-                filtered_value = self._apply_filter([scaled_value], sensor_filter_type, sensor_name)[0]
-
-                # print(f"filtered value: {filtered_value}")
-
                 # Adjust the filtered_value
                 #filtered_data[sensor_name] = round(abs(filtered_value - self.max_angle[sensor_name]), self.decimals)
-                filtered_data[sensor_name] = round(filtered_value - self.min_angle[sensor_name], self.decimals)
+                if self.windowed_angle_offset:
+                    reference = self.window_ranges[sensor_name].min()
+                else:
+                    reference = self.min_angle[sensor_name]
+                filtered_data[sensor_name] = round(filtered_value - reference, self.decimals)
 
             else:
-                filtered_data[sensor_name] = scaled_value
+                filtered_data[sensor_name] = round(filtered_value, self.decimals)
 
         return filtered_data
 
@@ -227,66 +641,63 @@ class ADC_hat:
         if sensor_name not in max_dict or value > max_dict[sensor_name]:
             max_dict[sensor_name] = value
 
-    def _apply_filter(self, data: List[float], filter_type: str, sensor_name: Optional[str] = None) -> List[float]:
-        """Apply the specified filter to the data."""
-        filter_settings = self.filter_configs.get(filter_type, {})
-
-        if sensor_name and sensor_name in self.filter_configs:
-            sensor_filter_config = self.filter_configs.get(sensor_name, {})
-            filter_settings.update(sensor_filter_config)
-
-        if filter_type == 'low_pass':
-            alpha = filter_settings.get('alpha')
-            return self._low_pass_filter(data, alpha)
-        elif filter_type == 'kalman':
-            Q = filter_settings.get('Q')
-            R = filter_settings.get('R')
-            P = filter_settings.get('P')
-
-            return self._kalman_filter(data, Q, R, P)  # Removed x0 here
+        self.window_ranges[sensor_name].add(time.monotonic(), value)
+
+    def get_window_ranges(self, sensor_type: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Range statistics of each sensor over the last range_window seconds.
+
+        :param sensor_type: 'pressure', 'angle' or None for both.
+        :return: {sensor name: {'min', 'max', 'mean', 'variance', 'count'}}, values are None without samples.
+        """
+        if sensor_type == 'pressure':
+            names = self.pressure_sensors
+        elif sensor_type == 'angle':
+            names = self.angle_sensors
         else:
-            print(f"Unknown filter type: {filter_type}. Returning raw data.")
+            names = self.sensor_configs
+        now = time.monotonic()
+        return {name: self.window_ranges[name].stats(now) for name in names}
+
+    def _apply_filter(self, data: List[float], filter_type: str, sensor_name: Optional[str] = None) -> List[float]:
+        """Filter a list of samples with a fresh filter of the given type (the sensor's own filter is not touched)."""
+        try:
+            sensor_filter = create_filter(filter_type, self.filter_configs,
+                                          self.filter_configs.get(sensor_name), sensor_name)
+        except ValueError as e:
+            print(f"{e}. Returning raw data.")
             return data
+        return [sensor_filter.update(value) for value in data]
 
     @staticmethod
     def _low_pass_filter(data: List[float], alpha: float) -> List[float]:
         """Apply a low-pass filter to the data."""
-        filtered_data = []
-        prev_value = data[0] if data else 0
-        for value in data:
-            filtered_value = alpha * prev_value + (1 - alpha) * value
-            filtered_data.append(filtered_value)
-            prev_value = filtered_value
-        return filtered_data
+        sensor_filter = LowPassFilter(alpha)
+        return [sensor_filter.update(value) for value in data]
 
     @staticmethod
     def _kalman_filter(data: List[float], Q: float, R: float, P: float) -> List[float]:
         """Apply a Kalman filter to the data."""
-        if not data:
-            return []
+        sensor_filter = KalmanFilter(Q, R, P)
+        return [sensor_filter.update(z) for z in data]
 
-        # Initialize the first estimate with the first data point
-        x = data[0]
-        filtered_data = [x]  # Start the filtered data list with the initial value
-
-        for z in data[1:]:
-            # Prediction step
-            P = P + Q  # Increase the estimate uncertainty
-            # Measurement update
-            K = P / (P + R)  # Calculate the Kalman Gain
-            x = x + K * (z - x)  # Update the estimate with measurement z
-            P = (1 - K) * P  # Update the error covariance
-
-            filtered_data.append(x)
-
-        return filtered_data
+    def get_angle_range(self, windowed: bool = False) -> Dict[str, Tuple[float, float, float, float]]:
+        """
+        Calculate and return the calibrated angle range for each sensor.
 
-    def get_angle_range(self) -> Dict[str, Tuple[float, float, float, float]]:
-        """Calculate and return the calibrated angle range for each sensor."""
+        :param windowed: Range over the last range_window seconds instead of the lifetime range.
+        """
         angle_ranges = {}
+        now = time.monotonic()
         for sensor_name in self.angle_sensors.keys():
-            min_angle = round(self.min_angle.get(sensor_name), self.decimals)
-            max_angle = round(self.max_angle.get(sensor_name), self.decimals)
+            if windowed:
+                stats = self.window_ranges[sensor_name].stats(now)
+                min_angle, max_angle = stats['min'], stats['max']
+            else:
+                min_angle, max_angle = self.min_angle.get(sensor_name), self.max_angle.get(sensor_name)
+            if min_angle is not None and max_angle is not None:
+                min_angle = round(min_angle, self.decimals)
+                max_angle = round(max_angle, self.decimals)
 
             if min_angle is not None and max_angle is not None:
                 angle_range = max_angle - min_angle
@@ -301,11 +712,22 @@ class ADC_hat:
         """Reset the range of calibrated angles."""
         self.min_angle = {sensor: float('inf') for sensor in self.angle_sensors}
         self.max_angle = {sensor: float('-inf') for sensor in self.angle_sensors}
+        for sensor in self.angle_sensors:
+            self.window_ranges[sensor].clear()
 
-    def get_pressure_range(self) -> Dict[str, Tuple[float, float]]:
-        """Get the range of observed pressures for each sensor."""
+    def get_pressure_range(self, windowed: bool = False) -> Dict[str, Tuple[float, float]]:
+        """
+        Get the range of observed pressures for each sensor.
+
+        :param windowed: Range over the last range_window seconds instead of the lifetime range.
+        """
         ranges = {}
+        now = time.monotonic()
         for sensor_name in self.pressure_sensors.keys():
+            if windowed:
+                stats = self.window_ranges[sensor_name].stats(now)
+                ranges[sensor_name] = (stats['min'], stats['max'])
+                continue
             min_pressure = self.min_pressure.get(sensor_name)
             max_pressure = self.max_pressure.get(sensor_name)
             ranges[sensor_name] = (min_pressure, max_pressure)
@@ -315,6 +737,8 @@ class ADC_hat:
         """Reset the range of calibrated pressures."""
         self.min_pressure = {}
         self.max_pressure = {}
+        for sensor in self.pressure_sensors:
+            self.window_ranges[sensor].clear()
 
     def list_sensors(self):
         """List all available sensors."""
@@ -333,24 +757,344 @@ class ADC_hat:
         print("-" * 30)
 
 
+class WindowedRange:
+    """
+    Min, max, mean and variance of the samples of the last window seconds, O(1) amortized per sample.
+
+    Min and max are kept in monotonic deques (each sample enters and leaves once), mean and variance as running
+    sums of (value - shift), shifted by the first sample to keep the sums small.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.samples = deque()      # (timestamp, value)
+        self.minimums = deque()     # increasing values
+        self.maximums = deque()     # decreasing values
+        self.shift = None
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def add(self, timestamp: float, value: float) -> None:
+        if self.shift is None:
+            self.shift = value
+        self.samples.append((timestamp, value))
+        shifted = value - self.shift
+        self.total += shifted
+        self.total_squares += shifted * shifted
+
+        minimums = self.minimums
+        while minimums and minimums[-1][1] >= value:
+            minimums.pop()
+        minimums.append((timestamp, value))
+        maximums = self.maximums
+        while maximums and maximums[-1][1] <= value:
+            maximums.pop()
+        maximums.append((timestamp, value))
+
+        self._expire(timestamp)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        samples = self.samples
+        while samples and samples[0][0] < cutoff:
+            _, value = samples.popleft()
+            shifted = value - self.shift
+            self.total -= shifted
+            self.total_squares -= shifted * shifted
+        while self.minimums and self.minimums[0][0] < cutoff:
+            self.minimums.popleft()
+        while self.maximums and self.maximums[0][0] < cutoff:
+            self.maximums.popleft()
+        if not samples:
+            # Restart the sums, so rounding errors do not accumulate over idle periods
+            self.shift = None
+            self.total = self.total_squares = 0.0
+
+    def min(self) -> Optional[float]:
+        return self.minimums[0][1] if self.minimums else None
+
+    def max(self) -> Optional[float]:
+        return self.maximums[0][1] if self.maximums else None
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """Statistics of the window ending at now (default: the newest sample)."""
+        if now is not None:
+            self._expire(now)
+        count = len(self.samples)
+        if not count:
+            return {'min': None, 'max': None, 'mean': None, 'variance': None, 'count': 0}
+        mean_shifted = self.total / count
+        return {
+            'min': self.minimums[0][1],
+            'max': self.maximums[0][1],
+            'mean': self.shift + mean_shifted,
+            'variance': max(0.0, self.total_squares / count - mean_shifted * mean_shifted),
+            'count': count,
+        }
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self.minimums.clear()
+        self.maximums.clear()
+        self.shift = None
+        self.total = self.total_squares = 0.0
+
+
+class SampleBuffer:
+    """
+    Fixed-size ring buffer of (monotonic timestamp, value) samples of one sensor.
+    Written by the sampling thread, read by anyone; the lock is only held while copying, never during I2C.
+    """
+    RESAMPLE_METHODS = ('linear', 'hold')
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.index = 0      # next slot to write
+        self.total = 0      # samples written since start (or clear)
+        self.lock = threading.Lock()
+
+    def append(self, timestamp: float, value: float) -> None:
+        with self.lock:
+            index = self.index
+            self.timestamps[index] = timestamp
+            self.values[index] = value
+            self.index = (index + 1) % self.capacity
+            self.total += 1
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """Newest (timestamp, value), or None if empty."""
+        with self.lock:
+            if not self.total:
+                return None
+            index = self.index - 1
+            return self.timestamps[index], self.values[index]
+
+    def window(self, n: int) -> Tuple[List[float], List[float]]:
+        """The newest n samples (fewer if not available) as (timestamps, values), oldest first."""
+        with self.lock:
+            return self._window(n)
+
+    def _window(self, n: int) -> Tuple[List[float], List[float]]:
+        n = max(0, min(n, self.total, self.capacity))
+        start = self.index - n
+        if start >= 0:
+            return self.timestamps[start:self.index].tolist(), self.values[start:self.index].tolist()
+        return (self.timestamps[start:].tolist() + self.timestamps[:self.index].tolist(),
+                self.values[start:].tolist() + self.values[:self.index].tolist())
+
+    def since(self, timestamp: float) -> Tuple[List[float], List[float]]:
+        """All buffered samples newer than timestamp as (timestamps, values), oldest first."""
+        with self.lock:
+            count = 0
+            index = self.index
+            for _ in range(min(self.total, self.capacity)):
+                index = index - 1 if index else self.capacity - 1
+                if self.timestamps[index] <= timestamp:
+                    break
+                count += 1
+            return self._window(count)
+
+    def value_at(self, timestamp: float, method: str = 'linear') -> Optional[float]:
+        """
+        Value at a time, from the two samples around it ('linear') or the last one at or before it ('hold').
+        Before the oldest / after the newest buffered sample the nearest sample is returned, no extrapolation.
+
+        :return: The value, None if the buffer is empty.
+        """
+        if method not in self.RESAMPLE_METHODS:
+            raise ValueError(f"Invalid resample method '{method}'. Options: {', '.join(self.RESAMPLE_METHODS)}")
+
+        with self.lock:
+            count = min(self.total, self.capacity)
+            if not count:
+                return None
+            capacity = self.capacity
+            timestamps = self.timestamps
+            values = self.values
+            start = (self.index - count) % capacity
+
+            # Number of samples at or before timestamp: bisection over the ring, oldest first
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                if timestamps[(start + middle) % capacity] <= timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+
+            if low == 0:
+                return values[start]
+            before = (start + low - 1) % capacity
+            if low == count or method == 'hold':
+                return values[before]
+            after = (start + low) % capacity
+            fraction = (timestamp - timestamps[before]) / (timestamps[after] - timestamps[before])
+            return values[before] + fraction * (values[after] - values[before])
+
+    def clear(self) -> None:
+        with self.lock:
+            self.index = 0
+            self.total = 0
+
+
+class SignalGenerator:
+    """
+    Vectorized synthetic ADC signal source: blocks of samples for all channels of a board at once.
+
+    Every channel has its own waveform (sine, square, triangle, sawtooth or constant), plus white noise,
+    pink noise (Voss-McCartney, held random values per octave) and random spikes. Sample k lies at k / sample_rate
+    seconds, so the data follows the SPS limit of the simulated bit rate. With a seed the data is reproducible.
+    """
+    SHAPES = ('sine', 'square', 'triangle', 'sawtooth', 'constant')
+
+    def __init__(self, sample_rate: float, channels: int = 8, min_voltage: float = 0.5, max_voltage: float = 4.5,
+                 frequency: float = 1.0, waveforms: Optional[Dict[int, Dict]] = None,
+                 white_noise_level: float = 0.05, pink_noise_level: float = 0.02, spike_probability: float = 0.01,
+                 spike_magnitude: float = 0.2, pink_octaves: int = 8, seed=None):
+        """
+        :param sample_rate: Samples per second per channel.
+        :param channels: Number of channels.
+        :param min_voltage: Minimum output voltage, waveforms span min to max and the result is clipped to it.
+        :param max_voltage: Maximum output voltage.
+        :param frequency: Base waveform frequency. By default channel n (1-based) runs at frequency * (1 + (n-1)/4)
+                          with its own phase, so every channel is different.
+        :param waveforms: Per-channel overrides, {channel (1-based): {'shape', 'frequency', 'phase' (cycles),
+                          'amplitude' (fraction of the half range), 'offset' (V)}}.
+        :param white_noise_level: Uniform white noise amplitude (V).
+        :param pink_noise_level: Pink noise standard deviation (V).
+        :param spike_probability: Probability of a spike per sample.
+        :param spike_magnitude: Spike height (V), random sign.
+        :param pink_octaves: Octaves of the pink noise generator.
+        :param seed: Seed of the random generator (anything numpy.random.default_rng accepts).
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for SignalGenerator.")
+
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.min_voltage = min_voltage
+        self.max_voltage = max_voltage
+        self.white_noise_level = white_noise_level
+        self.pink_noise_level = pink_noise_level
+        self.spike_probability = spike_probability
+        self.spike_magnitude = spike_magnitude
+        self.rng = np.random.default_rng(seed)
+
+        self.frequency = np.array([frequency * (1 + channel / 4) for channel in range(channels)])
+        self.phase = np.arange(channels) / channels
+        self.amplitude = np.ones(channels)
+        self.offset = np.zeros(channels)
+        shapes = ['sine'] * channels
+        for channel, waveform in (waveforms or {}).items():
+            index = int(channel) - 1
+            if not 0 <= index < channels:
+                raise ValueError(f"Waveform channel {channel} out of range 1-{channels}")
+            shape = waveform.get('shape', 'sine')
+            if shape not in self.SHAPES:
+                raise ValueError(f"Unknown waveform shape '{shape}'. Options: {', '.join(self.SHAPES)}")
+            shapes[index] = shape
+            self.frequency[index] = waveform.get('frequency', self.frequency[index])
+            self.phase[index] = waveform.get('phase', self.phase[index])
+            self.amplitude[index] = waveform.get('amplitude', 1.0)
+            self.offset[index] = waveform.get('offset', 0.0)
+        # Columns of each shape, so every shape is evaluated once per block
+        self.shape_columns = {shape: np.flatnonzero(np.array(shapes) == shape) for shape in set(shapes)}
+
+        self.position = 0   # index of the next sample
+        self.pink_octaves = pink_octaves
+        self._pink_buckets = np.full(pink_octaves, -1, dtype=np.int64)
+        self._pink_values = np.zeros((pink_octaves, channels))
+
+    def generate(self, n: int, start: Optional[int] = None):
+        """
+        Generate the next n samples of every channel.
+
+        :param start: Sample index to start from, default where the previous block ended.
+        :return: Array of shape (n, channels) in volts, not rounded.
+        """
+        if start is not None:
+            self.position = start
+        index = np.arange(self.position, self.position + n)
+        cycles = (index / self.sample_rate)[:, np.newaxis] * self.frequency + self.phase
+
+        wave = np.empty((n, self.channels))
+        for shape, columns in self.shape_columns.items():
+            fraction = cycles[:, columns] % 1.0
+            if shape == 'sine':
+                wave[:, columns] = np.sin(2 * math.pi * fraction)
+            elif shape == 'square':
+                wave[:, columns] = np.where(fraction < 0.5, 1.0, -1.0)
+            elif shape == 'triangle':
+                wave[:, columns] = 1.0 - 4.0 * np.abs(fraction - 0.5)
+            elif shape == 'sawtooth':
+                wave[:, columns] = 2.0 * fraction - 1.0
+            else:
+                wave[:, columns] = 0.0
+
+        half_range = (self.max_voltage - self.min_voltage) / 2
+        voltage = self.min_voltage + half_range + self.offset + self.amplitude * half_range * wave
+
+        if self.white_noise_level:
+            voltage += self.rng.uniform(-self.white_noise_level, self.white_noise_level, (n, self.channels))
+        if self.pink_noise_level:
+            voltage += self.pink_noise_level * self._pink_noise(index)
+        if self.spike_probability:
+            spikes = self.rng.random((n, self.channels)) < self.spike_probability
+            signs = np.where(self.rng.random((n, self.channels)) < 0.5, -1.0, 1.0)
+            voltage += spikes * signs * self.spike_magnitude
+
+        np.clip(voltage, self.min_voltage, self.max_voltage, out=voltage)
+        self.position += n
+        return voltage
+
+    def _pink_noise(self, index):
+        """Voss-McCartney pink noise, unit variance. Octave j holds a random value for 2**j samples."""
+        noise = np.zeros((len(index), self.channels))
+        for octave in range(self.pink_octaves):
+            buckets = index >> octave
+            first = buckets[0]
+            values = self.rng.standard_normal((buckets[-1] - first + 1, self.channels))
+            # Continue the value held from the previous block
+            if self._pink_buckets[octave] == first:
+                values[0] = self._pink_values[octave]
+            noise += values[buckets - first]
+            self._pink_buckets[octave] = buckets[-1]
+            self._pink_values[octave] = values[-1]
+        return noise / math.sqrt(self.pink_octaves)
+
+
 class ADCPiStub:
     """
     ADC stub class used for simulating ADC behavior in the absence of actual hardware.
     Generates synthetic voltage readings using sine waves and various types of noise.
     Includes options for configuring the sine wave properties, noise levels, and adding spikes.
+
+    With NumPy the samples come from a SignalGenerator (per-channel waveforms, configurable noise and spikes,
+    seedable), generated in blocks at the conversion rate of the bit rate.
     """
-    # TODO: noise and spike customization
-    # TODO: "black box" -data output
-    def __init__(self, addr1, addr2, bit_rate, min_voltage, max_voltage, frequency):
+    CHANNELS = 8
+    BLOCK_SIZE = 1024
+
+    def __init__(self, addr1, addr2, bit_rate, min_voltage, max_voltage, frequency, conversion_time=False,
+                 simulation_config=None):
         """
         Initialize a stub for simulating ADCPi behavior.
 
-        :param addr1: First I2C address (does not matteri when using stubs).
+        :param addr1: First I2C address (does not matteri when using stubs, other than seeding the generator).
         :param addr2: Second I2C address (does not matter when using stubs).
         :param bit_rate: Bit rate of the ADC.
         :param min_voltage: Minimum voltage for simulation.
         :param max_voltage: Maximum voltage for simulation.
         :param frequency: Frequency of the sine wave for simulation.
+        :param conversion_time: Sleep for one conversion period per reading, like the real chip.
+        :param simulation_config: Optional SignalGenerator settings (waveforms, noise levels, spikes, seed), plus
+                                  'realtime': True (default) returns the sample due at the current time, False
+                                  returns the next sample of the channel on every read (reproducible, any speed).
         """
         self.addr1 = addr1
         self.addr2 = addr2
@@ -361,12 +1105,29 @@ class ADCPiStub:
         self.max_voltage = max_voltage
         self.frequency = frequency
         self.start_time = time.time()
+        self.conversion_time = conversion_time
+
+        config = dict(simulation_config or {})
+        self.realtime = config.pop('realtime', True)
+        self.sample_rate = ADC_hat.SAMPLES_PER_SECOND.get(bit_rate, 60)
 
         # Noise stuff
-        self.white_noise_level = 0.05
-        self.pink_noise_level = 0.02
-        self.spike_probability = 0.01
-        self.spike_magnitude = 0.2
+        self.white_noise_level = config.get('white_noise_level', 0.05)
+        self.pink_noise_level = config.get('pink_noise_level', 0.02)
+        self.spike_probability = config.get('spike_probability', 0.01)
+        self.spike_magnitude = config.get('spike_magnitude', 0.2)
+
+        self.generator = None
+        if NUMPY_AVAILABLE:
+            seed = config.pop('seed', None)
+            try:
+                self.generator = SignalGenerator(self.sample_rate, self.CHANNELS, min_voltage, max_voltage, frequency,
+                                                 seed=None if seed is None else [seed, addr1], **config)
+            except TypeError as e:
+                raise ValueError(f"Invalid simulation configuration: {e}")
+        self._block = None
+        self._block_start = 0
+        self._channel_positions = [0] * self.CHANNELS
 
     def set_conversion_mode(self, mode):
         self.conversion_mode = mode
@@ -398,17 +1159,38 @@ class ADCPiStub:
         mid_point = self.min_voltage + amplitude
         return mid_point + amplitude * math.sin(2 * math.pi * self.frequency * elapsed_time)
 
-    def read_voltage(self, channel, create_sine=True, add_noise=True):
-
-        # TODO: Return same amount of values as there are sensors configured
+    def _generated_sample(self, channel: int, index: int) -> float:
+        """Sample index of a channel (1-based) from the generated blocks."""
+        block = self._block
+        offset = index - self._block_start
+        if block is None or not 0 <= offset < len(block):
+            self._block = block = self.generator.generate(self.BLOCK_SIZE, start=index)
+            self._block_start = index
+            offset = 0
+        return float(block[offset, channel - 1])
+
+    def _next_index(self, channel: int) -> int:
+        if self.realtime:
+            return int((time.time() - self.start_time) * self.sample_rate)
+        index = self._channel_positions[channel - 1]
+        self._channel_positions[channel - 1] = index + 1
+        return index
 
+    def read_voltage(self, channel, create_sine=True, add_noise=True):
         """
         Read simulated voltage value.
 
-        :param channel: ADC channel (not used in simulation).
+        :param channel: ADC channel (1-8).
+        :param create_sine: Whether to use the waveform, else a uniformly random voltage.
         :param add_noise: Whether to add noise to the value.
         :return: Simulated voltage value.
         """
+        if self.conversion_time:
+            time.sleep(1.0 / self.sample_rate)
+
+        if self.generator is not None and create_sine and add_noise:
+            return round(self._generated_sample(channel, self._next_index(channel)), 2)
+
         elapsed_time = time.time() - self.start_time
 
         # Sine wave
@@ -420,3 +1202,15 @@ class ADCPiStub:
         if add_noise:
             voltage += self.generate_noise()
         return round(max(min(voltage, self.max_voltage), self.min_voltage), 2)
+
+    def read_voltages(self, channels) -> List[float]:
+        """
+        Read several channels at once, one value per requested channel (e.g. one per configured sensor).
+        In realtime mode all values belong to the same sample instant.
+        """
+        if self.generator is None:
+            return [self.read_voltage(channel) for channel in channels]
+        if self.realtime:
+            index = self._next_index(channels[0]) if channels else 0
+            return [round(self._generated_sample(channel, index), 2) for channel in channels]
+        return [round(self._generated_sample(channel, self._next_index(channel)), 2) for channel in channels]
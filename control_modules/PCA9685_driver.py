@@ -0,0 +1,253 @@
+"""
+This module implements direct register access to the NXP PCA9685 PWM controller, without Adafruit ServoKit.
+
+Key features:
+1. Angles/throttles are written as raw on/off tick counts
+2. All changed channels of a frame are written in one I2C transaction using the chip's register auto-increment
+3. Pluggable bus object (smbus2.SMBus compatible), so the driver can run against FakeSMBus without hardware
+4. PCA9685Group for several boards on one bus, one burst per board and frame
+
+The main class, PCA9685, handles:
+- Setting the PWM frequency (prescaler) and enabling auto-increment
+- Keeping a shadow copy of the channel registers
+- Writing single channels or bursts of channels
+
+Usage:
+1. Open the bus, e.g. smbus2.SMBus(1), or use FakeSMBus() for testing
+2. Create PCA9685(bus, address=0x40, frequency=50)
+3. Call write_channels({channel: off_ticks, ...}) once per frame
+"""
+
+import time
+
+try:
+    from smbus2 import SMBus, i2c_msg
+    SMBUS2_AVAILABLE = True
+except ImportError:
+    SMBUS2_AVAILABLE = False
+
+
+# Registers
+MODE1 = 0x00
+PRESCALE = 0xFE
+LED0_ON_L = 0x06
+
+# MODE1 bits
+MODE1_RESTART = 0x80
+MODE1_AI = 0x20
+MODE1_SLEEP = 0x10
+
+REFERENCE_CLOCK_SPEED = 25000000
+TICKS_PER_PERIOD = 4096
+CHANNELS = 16
+
+
+class WriteMessage:
+    """Minimal stand-in for smbus2.i2c_msg.write() when smbus2 is not installed (FakeSMBus only)."""
+
+    def __init__(self, addr: int, buf) -> None:
+        self.addr = addr
+        self.buf = bytes(buf)
+
+    def __len__(self) -> int:
+        return len(self.buf)
+
+    def __iter__(self):
+        return iter(self.buf)
+
+    def __bytes__(self) -> bytes:
+        return self.buf
+
+
+def write_message(addr: int, buf):
+    """Create an I2C write message for bus.i2c_rdwr()."""
+    if SMBUS2_AVAILABLE:
+        return i2c_msg.write(addr, list(buf))
+    return WriteMessage(addr, buf)
+
+
+class PCA9685:
+    def __init__(self, bus, address: int = 0x40, frequency: float = 50,
+                 reference_clock_speed: int = REFERENCE_CLOCK_SPEED) -> None:
+        """
+        Initialize the PCA9685 and set the PWM frequency.
+
+        :param bus: smbus2.SMBus compatible object (write_byte_data, read_byte_data, i2c_rdwr).
+        :param address: I2C address of the board.
+        :param frequency: PWM frequency in Hz. 50Hz for servos and ESCs.
+        :param reference_clock_speed: Oscillator frequency of the chip.
+        """
+        self.bus = bus
+        self.address = address
+        self.frequency = frequency
+        self.reference_clock_speed = reference_clock_speed
+
+        # Shadow copy of the OFF tick counts (ON is always 0)
+        self.off_ticks = [0] * CHANNELS
+
+        self.transactions = 0
+        self.bytes_written = 0
+
+        self.set_frequency(frequency)
+
+    def set_frequency(self, frequency: float) -> None:
+        """Set the PWM frequency and enable register auto-increment."""
+        prescale = int(self.reference_clock_speed / TICKS_PER_PERIOD / frequency + 0.5) - 1
+        if not (3 <= prescale <= 255):
+            raise ValueError(f"PWM frequency {frequency}Hz out of range for the PCA9685")
+
+        old_mode = self.bus.read_byte_data(self.address, MODE1)
+        self.bus.write_byte_data(self.address, MODE1, (old_mode & 0x7F) | MODE1_SLEEP)
+        self.bus.write_byte_data(self.address, PRESCALE, prescale)
+        self.bus.write_byte_data(self.address, MODE1, old_mode & ~MODE1_SLEEP & 0xFF)
+        time.sleep(0.005)
+        self.bus.write_byte_data(self.address, MODE1, (old_mode & ~MODE1_SLEEP & 0xFF) | MODE1_RESTART | MODE1_AI)
+        self.frequency = frequency
+
+    def pulse_to_ticks(self, pulse_us: float) -> int:
+        """Convert a pulse width in microseconds to a tick count."""
+        return int(pulse_us * self.frequency * TICKS_PER_PERIOD / 1000000 + 0.5)
+
+    @staticmethod
+    def _channel_bytes(off: int) -> tuple:
+        return 0, 0, off & 0xFF, (off >> 8) & 0x1F
+
+    def write_channel(self, channel: int, off: int) -> None:
+        """Write one channel in its own transaction (what ServoKit does for every property write)."""
+        self.off_ticks[channel] = off
+        data = self._channel_bytes(off)
+        self.bus.write_i2c_block_data(self.address, LED0_ON_L + 4 * channel, list(data))
+        self.transactions += 1
+        self.bytes_written += 1 + len(data)
+
+    def write_channels(self, changes: dict) -> None:
+        """
+        Write several channels in a single I2C transaction.
+
+        Consecutive channels are packed into one auto-increment register run. Separate runs are sent as
+        messages of the same i2c_rdwr() call (repeated start), so the whole frame is one bus transaction.
+
+        :param changes: {channel: off_ticks}
+        """
+        if not changes:
+            return
+
+        messages = []
+        run_start = None
+        run = []
+        previous = None
+        for channel in sorted(changes):
+            off = changes[channel]
+            self.off_ticks[channel] = off
+            if previous is None or channel != previous + 1:
+                if run:
+                    messages.append(write_message(self.address, [LED0_ON_L + 4 * run_start] + run))
+                run_start = channel
+                run = []
+            run.extend(self._channel_bytes(off))
+            previous = channel
+        messages.append(write_message(self.address, [LED0_ON_L + 4 * run_start] + run))
+
+        self.bus.i2c_rdwr(*messages)
+        self.transactions += 1
+        self.bytes_written += sum(len(message) for message in messages)
+
+    def reset_stats(self) -> None:
+        """Reset the transaction and byte counters."""
+        self.transactions = 0
+        self.bytes_written = 0
+
+
+class PCA9685Group:
+    """
+    Several PCA9685 boards behind one interface, addressed by flat channel (board_index * 16 + channel).
+    write_channels() costs one burst transaction per board that has changes.
+    """
+
+    def __init__(self, boards) -> None:
+        self.boards = list(boards)
+
+    def write_channel(self, channel: int, off: int) -> None:
+        board, board_channel = divmod(channel, CHANNELS)
+        self.boards[board].write_channel(board_channel, off)
+
+    def write_channels(self, changes: dict) -> None:
+        if len(self.boards) == 1:
+            self.boards[0].write_channels(changes)
+            return
+
+        per_board = {}
+        for channel, off in changes.items():
+            board, board_channel = divmod(channel, CHANNELS)
+            per_board.setdefault(board, {})[board_channel] = off
+        for board, board_changes in per_board.items():
+            self.boards[board].write_channels(board_changes)
+
+    @property
+    def transactions(self) -> int:
+        return sum(board.transactions for board in self.boards)
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(board.bytes_written for board in self.boards)
+
+    def reset_stats(self) -> None:
+        """Reset the transaction and byte counters of every board."""
+        for board in self.boards:
+            board.reset_stats()
+
+
+class FakeSMBus:
+    """
+    In-memory smbus2.SMBus replacement.
+    Keeps a register file per address (honouring auto-increment) and records every transaction.
+    """
+
+    def __init__(self) -> None:
+        self.registers = {}
+        self.transactions = []  # (kind, address, register, number of bytes)
+        self.bytes_written = 0
+
+    def _registers(self, address: int) -> bytearray:
+        if address not in self.registers:
+            self.registers[address] = bytearray(256)
+        return self.registers[address]
+
+    def _write(self, address: int, register: int, data) -> None:
+        registers = self._registers(address)
+        for offset, value in enumerate(data):
+            registers[(register + offset) & 0xFF] = value & 0xFF
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        self.transactions.append(('read_byte_data', address, register, 1))
+        return self._registers(address)[register]
+
+    def write_byte_data(self, address: int, register: int, value: int) -> None:
+        self._write(address, register, [value])
+        self.transactions.append(('write_byte_data', address, register, 2))
+        self.bytes_written += 2
+
+    def write_i2c_block_data(self, address: int, register: int, data) -> None:
+        if len(data) > 32:
+            raise ValueError("Data length cannot exceed 32 bytes")
+        self._write(address, register, data)
+        self.transactions.append(('write_i2c_block_data', address, register, 1 + len(data)))
+        self.bytes_written += 1 + len(data)
+
+    def i2c_rdwr(self, *messages) -> None:
+        size = 0
+        for message in messages:
+            buf = bytes(message)
+            self._write(message.addr, buf[0], buf[1:])
+            size += len(buf)
+        self.transactions.append(('i2c_rdwr', messages[0].addr, bytes(messages[0])[0], size))
+        self.bytes_written += size
+
+    def read_off_ticks(self, address: int, channel: int) -> int:
+        """Read back the OFF tick count of a channel from the register file."""
+        registers = self._registers(address)
+        register = LED0_ON_L + 4 * channel
+        return registers[register + 2] | (registers[register + 3] << 8)
+
+    def close(self) -> None:
+        pass
@@ -1,14 +1,22 @@
 """
 This module implements a PWM (Pulse Width Modulation) controller for servo motors and other PWM-controlled devices.
-It is designed on top of Adafruit ServoKit library.
+It is designed on top of Adafruit ServoKit library, or optionally drives the PCA9685 registers directly.
 
 Key features:
 1. Configurable PWM channels using a YAML configuration file
 2. Support for different types of PMW outputs: angle (servo), throttle, switch(WIP), and pump
-3. Input rate monitoring to detect communication issues
+3. Input rate monitoring to detect communication issues (O(1) ring buffer, with jitter statistics)
 4. Deadzone implementation to prevent unwanted small movements
 5. Gamma correction for non-linear servo response
-6. Simulation mode for testing without hardware
+6. Simulation mode for testing without hardware (printing, or quiet recording with record_simulation=True)
+7. Vectorized batch evaluation of a config over recorded inputs (compute_outputs, needs NumPy)
+8. Change-suppressing output writes: unchanged PCA9685 tick counts are not re-sent over I2C
+9. Optional direct PCA9685 backend (output_backend='pca9685') writing each frame in one burst transaction
+10. Several PCA9685 boards (PWM_BOARDS, [board, channel] outputs) for more than 16 channels
+11. Optional fixed-rate output scheduler (start_output_scheduler), decoupling output writes from input arrival
+12. Optional per-channel slew rate and acceleration limits (max_rate, max_acceleration)
+13. Binary recording of the input command stream (start_recording), replayable with PWM_recorder.CommandReplayer
+14. Binary telemetry stream of the committed outputs over a local socket (start_telemetry)
 
 The main class, PWM_hat, handles:
 - Initialization of PWM channels
@@ -26,14 +34,28 @@ Usage:
 """
 
 #TODO: Better Debugging with Logging!
-#TODO: Instead of ServoKit, use the Adafruit_PCA9685 library directly (for more control)
 #TODO: channel specific PMW ranges!
 #TODO: well not that todo but currently we're controlling motors with angle values, so deprecate the "type" parameter (this goes with the PCA9685 library)
 
 
+import math
+import os
 import threading
 import yaml # PyYAML
 import time
+from array import array
+from concurrent.futures import Future
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # only needed for the batch (compute_outputs) path
+
+from .PCA9685_driver import PCA9685, PCA9685Group, FakeSMBus, SMBUS2_AVAILABLE
+from .PWM_recorder import CommandRecorder
+if SMBUS2_AVAILABLE:
+    from smbus2 import SMBus
 
 try:
     from adafruit_servokit import ServoKit
@@ -43,38 +65,78 @@ except ImportError:
     print("PWM module not found. Running in simulation mode.")
 
 
+# Outputs of one PCA9685 board. Output channels on several boards are flattened to board index * 16 + channel.
+CHANNELS_PER_BOARD = 16
+
+
 class PWM_hat:
-    def __init__(self, config_file: str, simulation_mode: bool = False, pump_variable: bool = True,
-                 tracks_disabled: bool = False, input_rate_threshold: float = 5, deadzone: float = 6) -> None:
-        pwm_channels = 16
+    CHANNELS_PER_BOARD = CHANNELS_PER_BOARD
 
+    def __init__(self, config_file: str, simulation_mode: bool = False, pump_variable: bool = True,
+                 tracks_disabled: bool = False, input_rate_threshold: float = 5, deadzone: float = 6,
+                 suppress_unchanged_writes: bool = True, output_backend: str = 'servokit', i2c_bus=None,
+                 pca9685_address: int = 0x40, record_simulation: bool = False) -> None:
         self.simulation_mode = simulation_mode
 
+        if output_backend not in ['servokit', 'pca9685']:
+            raise ValueError(f"Invalid output_backend '{output_backend}'. Use 'servokit' or 'pca9685'.")
+        self.output_backend = output_backend
+
         with open(config_file, 'r') as file:
             configs = yaml.safe_load(file)
             self.channel_configs = configs['CHANNEL_CONFIGS']
+            # PCA9685 boards, name: I2C address. Without PWM_BOARDS there is a single board.
+            self.boards = configs.get('PWM_BOARDS') or {'b1': pca9685_address}
+
+        # 16 channels per board, [board, channel] outputs are flattened to board_index * 16 + channel
+        pwm_channels = self.CHANNELS_PER_BOARD * len(self.boards)
+        self.resolve_output_channels(self.channel_configs)
 
         self.pump_variable = pump_variable
         self.tracks_disabled = tracks_disabled
 
-        self.values = [0.0 for _ in range(pwm_channels)]
+        # array('d'), so the vectorized angle path reads it through a NumPy view without a copy
+        self.values = array('d', bytes(8 * pwm_channels))
+        self.values_view = np.frombuffer(self.values, dtype=np.float64) if NUMPY_AVAILABLE else None
         self.num_inputs = self.calculate_num_inputs()
         self.num_outputs = pwm_channels
 
-        print(f"PWM channels in use: {pwm_channels}, inputs in use: {self.num_inputs}")
+        print(f"PWM channels in use: {pwm_channels} on {len(self.boards)} board(s), inputs in use: {self.num_inputs}")
 
         self.input_rate_threshold = input_rate_threshold
         self.skip_rate_checking = (input_rate_threshold == 0)
         self.is_safe_state = not self.skip_rate_checking
 
-        self.input_event = threading.Event()
+        # Watchdog: the caller only stores last_input_time, the thread sleeps until the deadline would expire.
+        # The event is set only to stop the thread or to re-arm it after a trip, never per input.
+        self.watchdog_event = threading.Event()
         self.monitor_thread = None
         self.running = False
 
         self.is_safe_state = True
         self.input_count = 0
-        self.last_input_time = time.time()
-        self.input_timestamps = []
+        self.last_input_time = time.monotonic()
+        self.rate_monitor = InputRateMonitor(window=30.0)
+
+        self.watchdog_trips = 0
+        self.watchdog_wakeups = 0
+        self.last_trip_latency = None   # seconds from the last input to the end of reset(reset_pump=False)
+
+        # Serializes output commits between the caller, the watchdog and the output scheduler threads
+        self.output_lock = threading.RLock()
+        self.fast_path = False  # no optional stage in use, see _update_fast_path()
+        self.scheduler = None
+        self.reload_stats = {}
+        self.reload_lock = threading.Lock()     # one reload_config() at a time, see _reload_worker()
+        self.recorder = None
+        self.recording_path = None
+        self.recording_segment = 0
+        self.telemetry = None
+
+        # Compiled named-input binding, see bind_inputs() and bind_input_order()
+        self.input_binding = None
+        self.input_order = None
+        self.named_rows = None
 
         self.center_val_servo = 90
         self.deadzone = deadzone
@@ -86,43 +148,101 @@ class PWM_hat:
         self.pump_variable_sum = 0.0
         self.manual_pump_load = 0.0
 
-        if SERVOKIT_AVAILABLE and not self.simulation_mode:
-            self.kit = ServoKit(channels=pwm_channels) # refrence_clock_speed=25000000, frequency=50
+        if self.output_backend == 'pca9685':
+            # Direct register access, all changed channels are written in one burst per frame
+            if i2c_bus is None:
+                if SMBUS2_AVAILABLE and not self.simulation_mode:
+                    i2c_bus = SMBus(1)
+                else:
+                    print("Using FakeSMBus for simulation.")
+                    i2c_bus = FakeSMBus()
+            # One burst per board and frame
+            self.kit = PCA9685Group([PCA9685(i2c_bus, address=address) for address in self.boards.values()])
+            self.output = BurstOutputWriter(self.kit, pwm_channels, enabled=suppress_unchanged_writes)
         else:
-            if not self.simulation_mode:
-                print("ServoKit is not available. Falling back to simulation mode.")
-            print("Using ServoKitStub for simulation.")
-            self.kit = ServoKitStub(channels=pwm_channels)
+            if SERVOKIT_AVAILABLE and not self.simulation_mode:
+                # refrence_clock_speed=25000000, frequency=50
+                kits = [ServoKit(channels=self.CHANNELS_PER_BOARD, address=address) for address in self.boards.values()]
+                self.kit = kits[0] if len(kits) == 1 else MultiServoKit(kits)
+            else:
+                if not self.simulation_mode:
+                    print("ServoKit is not available. Falling back to simulation mode.")
+                if record_simulation:
+                    # Quiet stub, committed values go to a ring buffer instead of the terminal
+                    print("Using RecordingServoKitStub for simulation.")
+                    self.kit = RecordingServoKitStub(channels=pwm_channels)
+                else:
+                    print("Using ServoKitStub for simulation.")
+                    self.kit = ServoKitStub(channels=pwm_channels)
+
+            # Skips I2C writes for channels whose PCA9685 tick count did not change
+            self.output = OutputWriter(self.kit, pwm_channels, enabled=suppress_unchanged_writes)
 
         self.validate_configuration()
         self.defined_channel_types = self.get_defined_channel_types()
+        self.plan = ChannelPlan(self.channel_configs, self.center_val_servo, self.num_outputs)
+        self.slew = SlewLimiter(self.num_outputs)
 
         # set servo angles to None at start
-        self.servo_angles = {f"{channel_name} angle": None
-                             for channel_name, config in self.channel_configs.items()
-                             if config['type'] == 'angle'}
+        self.servo_angles = self.plan.servo_angle_buffers[0]
 
         self.reset()
+        self._update_fast_path()
 
         if not self.skip_rate_checking:    # Start monitoring if threshold is set
             self.start_monitoring()
 
-    def calculate_num_inputs(self) -> int:
-        """Calculate the number of input channels specified in the configuration."""
+    def resolve_output_channels(self, channel_configs: dict) -> None:
+        """
+        Replace [board, channel] output_channel entries with the flat output index (board_index * 16 + channel).
+        Plain integer outputs are left as they are, they address the first board (or any, if already flat).
+        """
+        board_names = list(self.boards.keys())
+        for channel_name, config in channel_configs.items():
+            output_channel = config.get('output_channel')
+            if not isinstance(output_channel, list):
+                continue
+
+            if len(output_channel) != 2 or output_channel[0] not in board_names:
+                raise ValueError(f"Invalid output_channel {output_channel} for channel '{channel_name}'. "
+                                 f"Use [board, channel] with a board from PWM_BOARDS: {board_names}")
+
+            board, board_channel = output_channel
+            if not isinstance(board_channel, int) or not (0 <= board_channel < self.CHANNELS_PER_BOARD):
+                raise ValueError(f"Invalid output_channel {output_channel} for channel '{channel_name}'")
+
+            config['output_channel'] = board_names.index(board) * self.CHANNELS_PER_BOARD + board_channel
+
+    def describe_output(self, output_channel) -> str:
+        """Human readable output channel: the plain number on one board, 'board:channel' on several."""
+        if len(self.boards) == 1 or not isinstance(output_channel, int):
+            return str(output_channel)
+        board_names = list(self.boards.keys())
+        return f"{board_names[output_channel // self.CHANNELS_PER_BOARD]}:{output_channel % self.CHANNELS_PER_BOARD}"
+
+    def calculate_num_inputs(self, channel_configs: dict = None) -> int:
+        """Calculate the number of input channels specified in the configuration (default: the live one)."""
+        if channel_configs is None:
+            channel_configs = self.channel_configs
+
         input_channels = set()
-        for config in self.channel_configs.values():
+        for config in channel_configs.values():
             input_channel = config.get('input_channel')
             if isinstance(input_channel, int):
                 input_channels.add(input_channel)
         return len(input_channels)
 
-    def validate_configuration(self) -> None:
-        """Validate the configuration file."""
+    def validate_configuration(self, channel_configs: dict = None) -> None:
+        """Validate the configuration file (default: the live one)."""
+        if channel_configs is None:
+            channel_configs = self.channel_configs
+        num_inputs = self.calculate_num_inputs(channel_configs)
+
         required_keys = ['type', 'input_channel', 'output_channel', 'direction', 'offset']
         angle_specific_keys = ['multiplier_positive', 'multiplier_negative', 'gamma_positive', 'gamma_negative']
         pump_specific_keys = ['idle', 'multiplier']
 
-        for channel_name, config in self.channel_configs.items():
+        for channel_name, config in channel_configs.items():
             # Validate existence of required keys
             for key in required_keys:
                 if key not in config:
@@ -134,7 +254,7 @@ class PWM_hat:
 
             # Validate input_channel
             if config['input_channel'] != 'None':
-                if not isinstance(config['input_channel'], int) or not (0 <= config['input_channel'] < self.num_inputs):
+                if not isinstance(config['input_channel'], int) or not (0 <= config['input_channel'] < num_inputs):
                     raise ValueError(f"Invalid input_channel {config['input_channel']} for channel '{channel_name}'")
 
             # Validate output_channel
@@ -166,6 +286,12 @@ class PWM_hat:
                 if 'affects_pump' not in config or not isinstance(config['affects_pump'], bool):
                     raise ValueError(f"Missing or invalid 'affects_pump' for angle type channel '{channel_name}'")
 
+                # Validate optional slew limits
+                for key in ['max_rate', 'max_acceleration']:
+                    if key in config and config[key] is not None:
+                        if isinstance(config[key], bool) or not isinstance(config[key], (int, float)) or config[key] <= 0:
+                            raise ValueError(f"{key} {config[key]} must be a positive number for channel '{channel_name}'")
+
             # Validate pump-specific configuration
             elif config['type'] == 'pump':
                 for key in pump_specific_keys:
@@ -198,62 +324,199 @@ class PWM_hat:
         """Stop the input rate monitoring thread."""
         self.running = False
         if self.monitor_thread is not None:
-            self.input_event.set()  # Wake up the thread if it's waiting
+            self.watchdog_event.set()  # Wake up the thread if it's waiting
             self.monitor_thread.join()
             self.monitor_thread = None
             print("Stopped input rate monitoring...")
 
     def monitor_input_rate(self) -> None:
+        """
+        Deadline watchdog. Sleeps until last_input_time + 1/threshold and enters the safe state if no input
+        arrived by then. While in the safe state it sleeps until update_values() re-arms it.
+        """
         print("Monitoring input rate...")
         while self.running:
-            if self.input_event.wait(timeout=1.0 / self.input_rate_threshold):
-                self.input_event.clear()
-                current_time = time.time()
-                time_diff = current_time - self.last_input_time
-                self.last_input_time = current_time
-
-                if time_diff > 0:
-                    current_rate = 1 / time_diff
-                    if current_rate >= self.input_rate_threshold:
-                        self.input_count += 1
-                        # Require consecutive good inputs. 25% of threshold rate, rounded down
-                        if self.input_count >= int(self.input_rate_threshold * 0.25):
-                            self.is_safe_state = True
-                            self.input_count = 0
-                    else:
-                        self.input_count = 0
+            self.watchdog_event.clear()
 
-                    # Save the timestamp for monitoring
-                    self.input_timestamps.append(current_time)
+            if not self.is_safe_state:
+                # Nothing to guard, wait for the re-arm (or stop)
+                self.watchdog_event.wait()
+                continue
 
-                    # Remove timestamps older than 30 seconds
-                    self.input_timestamps = [t for t in self.input_timestamps if current_time - t <= 30]
+            timeout = 1.0 / self.input_rate_threshold
+            remaining = self.last_input_time + timeout - time.monotonic()
+            if remaining > 0:
+                self.watchdog_event.wait(timeout=remaining)
+                self.watchdog_wakeups += 1
+                continue
 
-            else:
-                if self.is_safe_state:
-                    print("Input rate too low. Entering safe state...")
-                    self.reset(reset_pump=False)
-                    self.is_safe_state = False
+            with self.output_lock:
+                # An input may have arrived while we were taking the lock
+                if not self.is_safe_state or time.monotonic() - self.last_input_time < timeout:
+                    continue
+                print("Input rate too low. Entering safe state...")
+                self.reset(reset_pump=False)
+                self.last_trip_latency = time.monotonic() - self.last_input_time
+                self.watchdog_trips += 1
+
+    def _check_input_rate(self, current_time: float) -> None:
+        """Count consecutive inputs faster than the threshold and re-arm the watchdog after enough of them."""
+        time_diff = current_time - self.last_input_time
+        self.last_input_time = current_time
+
+        if time_diff > 0:
+            if 1 / time_diff >= self.input_rate_threshold:
+                self.input_count += 1
+                # Require consecutive good inputs. 25% of threshold rate, rounded down
+                if self.input_count >= int(self.input_rate_threshold * 0.25):
+                    self.is_safe_state = True
                     self.input_count = 0
+                    self.watchdog_event.set()
+            else:
+                self.input_count = 0
 
-    def update_values(self, raw_values, min_cap=-1, max_cap=1, debug=False):
-        # Reset all angles to None at the start of each update
-        for key in self.servo_angles:
-            self.servo_angles[key] = None
+    def start_output_scheduler(self, frame_rate: float = None) -> None:
+        """
+        Commit outputs at a fixed frame rate instead of in the caller's thread.
 
-        # Signal the monitoring thread that we have new input
-        if not self.skip_rate_checking:
-            self.input_event.set()
+        After this, update_values() only validates and publishes the inputs. A scheduler thread commits the latest
+        published inputs on absolute frame deadlines, so caller jitter does not become servo update jitter.
 
-        if debug:
-            print(f"Debug: update_values called with raw_values: {raw_values}")
-            print(f"Debug: Current safe state: {self.is_safe_state}")
-            print(f"Debug: skip_rate_checking: {self.skip_rate_checking}")
+        :param frame_rate: Frames per second. Defaults to the PWM frequency (50Hz), one update per servo period.
+        """
+        if self.scheduler is not None:
+            print("Output scheduler is already running.")
+            return
 
+        if frame_rate is None:
+            frame_rate = self.output.FREQUENCY
+        if not isinstance(frame_rate, (int, float)) or frame_rate <= 0:
+            raise ValueError(f"Invalid frame_rate {frame_rate}")
+
+        self.scheduler = OutputScheduler(self, frame_rate)
+        self.scheduler.start()
+        self._update_fast_path()
+        print(f"Output scheduler running at {frame_rate}Hz")
+
+    def stop_output_scheduler(self) -> None:
+        """Stop the output scheduler. update_values() writes synchronously again."""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+            self._update_fast_path()
+            print("Stopped output scheduler...")
+
+    def get_scheduler_stats(self) -> dict:
+        """
+        Get the per-frame timing statistics of the output scheduler.
 
+        :return: See OutputScheduler.get_stats(), empty dictionary if the scheduler is not running.
+        """
+        if self.scheduler is None:
+            return {}
+        return self.scheduler.get_stats()
 
-        if not self.skip_rate_checking and not self.is_safe_state:
-            print(f"System in safe state. Ignoring input. Average rate: {self.get_average_input_rate():.2f}Hz")
+    def get_watchdog_stats(self) -> dict:
+        """
+        Get the watchdog counters.
+
+        :return: Dictionary with 'timeout', 'trips', 'wakeups' and 'last_trip_latency' (seconds, None if never tripped).
+        """
+        return {
+            'timeout': 1.0 / self.input_rate_threshold if self.input_rate_threshold else None,
+            'trips': self.watchdog_trips,
+            'wakeups': self.watchdog_wakeups,
+            'last_trip_latency': self.last_trip_latency,
+        }
+
+    def start_recording(self, path: str) -> None:
+        """
+        Record every update_values() / update_named() call (timestamp and input vector) to a binary file.
+        Replay with PWM_recorder.CommandReplayer. If reload_config() changes the number of inputs, the recording
+        continues in a numbered file next to it ('session.1.pwmrec', ...).
+
+        :param path: Output file, overwritten if it exists.
+        """
+        self.stop_recording()
+        self.recorder = CommandRecorder(path, self.num_inputs)
+        self._update_fast_path()
+        self.recording_path = path
+        self.recording_segment = 0
+        print(f"Recording input commands to {path}")
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            recorder = self.recorder
+            self.recorder = None
+            self._update_fast_path()
+            recorder.close()
+
+    def _next_recording_segment(self) -> None:
+        """
+        Continue the recording in a new file after the number of inputs changed (reload_config).
+        'session.pwmrec' continues in 'session.1.pwmrec', 'session.2.pwmrec', ...
+        """
+        self.recorder.close()
+        self.recording_segment += 1
+        base, extension = os.path.splitext(self.recording_path)
+        path = f"{base}.{self.recording_segment}{extension}"
+        try:
+            self.recorder = CommandRecorder(path, self.num_inputs)
+        except OSError:
+            # Never keep recording into the closed file
+            self.recorder = None
+            self._update_fast_path()
+            print(f"Number of inputs changed to {self.num_inputs}, could not continue the recording in {path}")
+            raise
+        print(f"Number of inputs changed to {self.num_inputs}, recording continues in {path}")
+
+    def start_telemetry(self, publisher, name: str = 'outputs') -> None:
+        """
+        Publish the committed PCA9685 tick count of every output channel (NaN until first written) after each
+        output frame, as a telemetry stream. Channels are named after the configured channel driving them.
+
+        :param publisher: telemetry.TelemetryPublisher.
+        :param name: Stream name.
+        """
+        channel_names = [self.describe_output(channel) for channel in range(self.num_outputs)]
+        for channel_name, config in self.channel_configs.items():
+            output_channel = config.get('output_channel')
+            if isinstance(output_channel, int) and 0 <= output_channel < self.num_outputs:
+                channel_names[output_channel] = f"{channel_name} ({self.describe_output(output_channel)})"
+        self.telemetry = publisher.stream(name, channel_names)
+        self._update_fast_path()
+
+    def stop_telemetry(self) -> None:
+        if self.telemetry is not None:
+            telemetry = self.telemetry
+            self.telemetry = None
+            self._update_fast_path()
+            telemetry.flush()
+
+    def _update_fast_path(self) -> None:
+        """
+        Recompute fast_path: set while no recorder, telemetry, output scheduler or slew limit is in use, so the
+        per-tick path skips all of their branches with a single check. Call after switching one of them.
+        Commits still take output_lock, uncontended it costs far less than the frame itself.
+        """
+        with self.output_lock:
+            self.fast_path = (self.recorder is None and self.telemetry is None and self.scheduler is None
+                              and not self.plan.has_slew)
+
+    def _publish_outputs(self) -> None:
+        """Send the committed outputs to the telemetry stream, called under output_lock after a flush."""
+        nan = math.nan
+        self.telemetry.publish(time.monotonic(),
+                               [nan if ticks < 0 else ticks for ticks in self.output.last_ticks])
+
+    def update_values(self, raw_values, min_cap=-1, max_cap=1, debug=False):
+        fast_path = self.fast_path
+
+        # Recorded before the safe state gate, so a replay also reproduces the watchdog behaviour
+        if not fast_path and self.recorder is not None:
+            self.recorder.record(raw_values, min_cap, max_cap)
+
+        if not self._accept_input(raw_values, debug):
             return
 
         if raw_values is None:
@@ -268,40 +531,203 @@ class PWM_hat:
             self.reset()
             raise ValueError(f"Expected {self.num_inputs} inputs, but received {len(raw_values)}.")
 
-        deadzone_threshold = self.deadzone / 100.0 * (max_cap - min_cap)
+        # With the output scheduler running, just publish; the scheduler commits on its own frame clock
+        if not fast_path and self.scheduler is not None:
+            self.scheduler.publish(tuple(raw_values), min_cap, max_cap)
+            return
 
-        self.pump_variable_sum = 0.0
-        for channel_name, config in self.channel_configs.items():
-            input_channel = config['input_channel']
-            if input_channel is None or not isinstance(input_channel, int) or input_channel >= len(raw_values):
-                continue
+        self._commit_values(raw_values, min_cap, max_cap)
+
+    def bind_inputs(self, binding: dict) -> None:
+        """
+        Declare which input (e.g. controller axis) drives which channel, once, instead of building an input list
+        every tick. The binding is compiled into the channel plan; see update_named().
+
+        :param binding: {channel name: input name}, e.g. {'scoop': 'RightJoystickX', 'lift_boom': 'LeftJoystickY'}.
+                        Every channel with an input_channel must be bound.
+        """
+        self.named_rows = self.plan.compile_binding(binding)
+        self.input_binding = dict(binding)
+        self.input_order = None
+
+    def bind_input_order(self, input_names: list) -> None:
+        """
+        bind_inputs() from the positional input order: input_names[i] drives the channels with input_channel i,
+        the same mapping as an update_values() list built in that order. Works with any configuration file, and
+        reload_config() binds the new channels the same way.
+
+        :param input_names: One input name per input channel, e.g. ['RightJoystickX', 'LeftJoystickY', ...].
+        """
+        self.bind_inputs(self.plan.order_binding(input_names))
+        self.input_order = list(input_names)
+
+    def update_named(self, snapshot, min_cap=-1, max_cap=1, debug=False):
+        """
+        Update the outputs from a snapshot of named inputs, e.g. the dictionary returned by controller.read().
+
+        Values are read straight from the snapshot through the compiled binding, no per-tick list is built.
+        With the output scheduler running the snapshot is published as is, so do not modify it afterwards.
+
+        :param snapshot: Mapping of input name to value, containing at least the bound input names.
+        """
+        if self.named_rows is None:
+            raise ValueError("No input binding, call bind_inputs() first.")
+        fast_path = self.fast_path
+
+        if not fast_path and self.recorder is not None and snapshot is not None:
+            # Recorded as the equivalent positional vector, so it replays through update_values()
+            vector = [0.0] * self.num_inputs
+            for (input_name, _, _), (input_index, _, _) in zip(self.named_rows, self.plan.input_rows):
+                vector[input_index] = snapshot.get(input_name, 0.0)
+            self.recorder.record(vector, min_cap, max_cap)
+
+        if not self._accept_input(snapshot, debug):
+            return
+
+        if snapshot is None:
+            self.reset()
+            raise ValueError("Input values are None")
+
+        if not fast_path and self.scheduler is not None:
+            self.scheduler.publish(snapshot, min_cap, max_cap, self.named_rows)
+            return
+
+        self._commit_values(snapshot, min_cap, max_cap, self.named_rows)
+
+    def _accept_input(self, raw_values, debug=False) -> bool:
+        """Feed the watchdog and check the safe state. Returns False if the input must be ignored."""
+        # Feed the watchdog. While armed this is just a timestamp store, the watchdog thread is not woken up
+        if not self.skip_rate_checking:
+            current_time = time.monotonic()
+            if self.is_safe_state:
+                self.last_input_time = current_time
+            else:
+                self._check_input_rate(current_time)
+            self.rate_monitor.add(current_time)
+
+        if debug:
+            print(f"Debug: update_values called with raw_values: {raw_values}")
+            print(f"Debug: Current safe state: {self.is_safe_state}")
+            print(f"Debug: skip_rate_checking: {self.skip_rate_checking}")
 
-            # Check if the value is within the limits
-            capped_value = max(min_cap, min(raw_values[input_channel], max_cap))
+        if not self.skip_rate_checking and not self.is_safe_state:
+            print(f"System in safe state. Ignoring input. Average rate: {self.get_average_input_rate():.2f}Hz")
+            return False
+
+        return True
+
+    def _commit_values(self, raw_values, min_cap=-1, max_cap=1, input_rows=None):
+        """
+        Map validated input values to the outputs and write them. Runs as one frame under output_lock.
+        On a missing named input the outputs are reset and ValueError is raised.
+
+        :param input_rows: Rows of (input key, output index, affects pump). Defaults to the plan's index rows;
+                           update_named() passes the rows of the compiled binding (keys are input names).
+        """
+        with self.output_lock:
+            try:
+                self._write_frame(raw_values, min_cap, max_cap, input_rows)
+            except ValueError:
+                self.reset()
+                raise
+
+            if self.telemetry is not None:
+                self._publish_outputs()
+
+    def _write_frame(self, raw_values, min_cap, max_cap, input_rows=None):
+        """Compute and write one output frame, see _commit_values(). The caller holds output_lock."""
+        deadzone_threshold = self.deadzone / 100.0 * (max_cap - min_cap)
+        plan = self.plan
+        if input_rows is None:
+            input_rows = plan.input_rows
+
+        values = self.values
+        pump_variable_sum = 0.0
+        for input_key, output_index, affects_pump in input_rows:
+            try:
+                capped_value = raw_values[input_key]
+            except KeyError:
+                raise ValueError(f"Input '{input_key}' missing from the input snapshot.")
+
+            # Check if the value is within the limits. Comparisons instead of max(min()), NaN still becomes min_cap
+            if capped_value >= min_cap:
+                if capped_value > max_cap:
+                    capped_value = max_cap
+            else:
+                capped_value = min_cap
 
             # Check deadzone
             if abs(capped_value) < deadzone_threshold:
                 capped_value = 0.0
 
-            self.values[config['output_channel']] = capped_value
+            values[output_index] = capped_value
 
-            if config.get('affects_pump', False):
-                self.pump_variable_sum += abs(capped_value)
+            if affects_pump:
+                pump_variable_sum += abs(capped_value)
+        self.pump_variable_sum = pump_variable_sum
 
         # Handle pump if configured
-        if 'pump' in self.defined_channel_types:
-            self.handle_pump(self.values)
+        if plan.has_pump:
+            self.handle_pump(values)
+
+        # Handle angles if configured. The frame goes into the plan's spare servo_angles dict, which then replaces
+        # the published one, so a reader never sees the angles of a frame half written (unwritten channels, e.g.
+        # disabled tracks, are None). Copy servo_angles if it has to outlive the next frame.
+        if plan.angle_rows:
+            published, spare = plan.servo_angle_buffers
+            if self.servo_angles is spare:
+                spare = published
+            self.handle_angles(values, spare)
+            self.servo_angles = spare
+
+        # Only buffered backends have anything to flush
+        if self.output.pending:
+            self.output.flush()
+
+    def compute_outputs(self, inputs, min_cap=-1, max_cap=1):
+        """
+        Compute angles and pump throttle for one or many input frames with NumPy, without writing to the hardware.
+
+        Uses the current deadzone, track, and pump settings, so a PWM_hat created from a candidate config file
+        (simulation_mode=True, input_rate_threshold=0) can be used to evaluate it over a recorded session.
+        Slew limits are not applied, they depend on commit timing.
 
-        # Handle angles if configured
-        if 'angle' in self.defined_channel_types:
-            self.handle_angles(self.values)
+        :param inputs: 1-D array of num_inputs values, or 2-D array of frames x num_inputs.
+        :return: (angles, throttle). angles columns follow self.plan.angle_names, NaN for disabled tracks.
+                 For 1-D input, angles is 1-D and throttle is a float (or None without a pump channel).
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for compute_outputs().")
+
+        frames = np.asarray(inputs, dtype=np.float64)
+        single_frame = frames.ndim == 1
+        if single_frame:
+            frames = frames[np.newaxis, :]
+
+        if frames.ndim != 2 or frames.shape[1] != self.num_inputs:
+            raise ValueError(f"Expected inputs of shape (frames, {self.num_inputs}), but received {frames.shape}.")
+
+        angles, throttle = self.plan.compute_batch(
+            frames,
+            deadzone_threshold=self.deadzone / 100.0 * (max_cap - min_cap),
+            min_cap=min_cap,
+            max_cap=max_cap,
+            tracks_disabled=self.tracks_disabled,
+            pump_enabled=self.pump_enabled,
+            pump_variable=self.pump_variable,
+            manual_pump_load=self.manual_pump_load,
+        )
+
+        if single_frame:
+            return angles[0], (None if throttle is None else float(throttle[0]))
+        return angles, throttle
 
     def handle_pump(self, values, debug=False):
-        pump_config = self.channel_configs['pump']
-        pump_channel = pump_config['output_channel']
-        pump_multiplier = pump_config['multiplier']
-        pump_idle = pump_config['idle']
-        input_channel = pump_config.get('input_channel')
+        plan = self.plan
+        pump_channel = plan.pump_output
+        pump_multiplier = plan.pump_multiplier
+        pump_idle = plan.pump_idle
+        input_channel = plan.pump_input
 
         if debug:
             print(f"Debug: input_channel = {input_channel}, type = {type(input_channel)}")
@@ -335,42 +761,104 @@ class PWM_hat:
         throttle_value = max(-1.0, min(1.0, throttle_value))
         #print(f"Debug: Final throttle value after clamping: {throttle_value}")
 
-        self.kit.continuous_servo[pump_channel].throttle = throttle_value
+        self.output.write_throttle(pump_channel, throttle_value)
 
         return throttle_value  # Return the final throttle value for debugging
 
-    def handle_angles(self, values):
-        for channel_name, config in self.channel_configs.items():
-            if config['type'] == 'angle':
-                if self.tracks_disabled and channel_name in ['trackL', 'trackR']:
-                    continue
+    def handle_angles(self, values, servo_angles=None):
+        if servo_angles is None:
+            servo_angles = self.servo_angles
+        plan = self.plan
+        if plan.vectorized:
+            self._handle_angle_array(values, servo_angles)
+            return
+
+        tracks_disabled = self.tracks_disabled
+        num_values = len(values)
+        # Written in place, count entries per frame
+        frame_channels = plan.frame_channels
+        frame_angles = plan.frame_angles
+        count = 0
+
+        has_slew = plan.has_slew
+        if has_slew:
+            # Time step of the interpolation stage, the slew limits are in degrees per second
+            slew = self.slew
+            dt = slew.advance(time.monotonic())
+
+        for (output_channel, center, scale_positive, scale_negative,
+             gamma_positive, gamma_negative, is_track, channel_name, angle_key,
+             max_rate, max_acceleration) in plan.angle_rows:
+            if tracks_disabled and is_track:
+                servo_angles[angle_key] = None
+                continue
 
-                output_channel = config['output_channel']
+            if output_channel >= num_values:
+                print(f"Channel '{channel_name}': No data available.")
+                servo_angles[angle_key] = None
+                continue
 
-                if output_channel >= len(values):
-                    print(f"Channel '{channel_name}': No data available.")
-                    continue
+            input_value = values[output_channel]
 
-                input_value = values[output_channel]
-                center = self.center_val_servo + config['offset']
+            # scale_* already contains multiplier * direction, gamma 1.0 skips the pow
+            if input_value >= 0:
+                adjusted_input = input_value if gamma_positive == 1.0 else input_value ** gamma_positive
+                angle = center + adjusted_input * scale_positive
+            else:
+                adjusted_input = -input_value if gamma_negative == 1.0 else (-input_value) ** gamma_negative
+                angle = center - adjusted_input * scale_negative
 
-                if input_value >= 0:
-                    gamma = config.get('gamma_positive', 1)
-                    multiplier = config.get('multiplier_positive', 1)
-                    normalized_input = input_value
-                else:
-                    gamma = config.get('gamma_negative', 1)
-                    multiplier = config.get('multiplier_negative', 1)
-                    normalized_input = -input_value
+            if angle < 0:
+                angle = 0
+            elif angle > 180:
+                angle = 180
 
-                adjusted_input = normalized_input ** gamma
-                gamma_corrected_value = adjusted_input if input_value >= 0 else -adjusted_input
+            if has_slew and (max_rate is not None or max_acceleration is not None):
+                angle = slew.step(output_channel, angle, max_rate, max_acceleration, dt)
 
-                angle = center + (gamma_corrected_value * multiplier * config['direction'])
-                angle = max(0, min(180, angle))
+            frame_channels[count] = output_channel
+            frame_angles[count] = angle
+            count += 1
+            servo_angles[angle_key] = round(angle, 1)
 
-                self.kit.servo[config['output_channel']].angle = angle
-                self.servo_angles[f"{channel_name} angle"] = round(angle, 1)
+        # One call per frame, the output layer only issues the channels whose tick count changed
+        self.output.write_angles(frame_channels, frame_angles, count)
+
+    def _handle_angle_array(self, values, servo_angles):
+        """
+        handle_angles() for many channels (see ChannelPlan.vectorized): the whole frame on the plan's arrays,
+        computed into the plan's preallocated buffers.
+        """
+        plan = self.plan
+        (output_channels, channel_list, center, scale_positive, negated_scale_negative, gamma_positive,
+         gamma_negative, angle_keys, inputs, positive, magnitude, factor, angle_values, angles, tick_values,
+         ticks) = plan.angle_columns[self.tracks_disabled]
+
+        np.take(self.values_view if values is self.values else np.asarray(values, dtype=np.float64),
+                output_channels, out=inputs)
+        np.greater_equal(inputs, 0.0, out=positive)
+        np.abs(inputs, out=magnitude)
+        if plan.has_gamma:
+            np.copyto(factor, gamma_negative)
+            np.copyto(factor, gamma_positive, where=positive)
+            np.power(magnitude, factor, out=magnitude)
+        np.copyto(factor, negated_scale_negative)
+        np.copyto(factor, scale_positive, where=positive)
+        np.multiply(magnitude, factor, out=angles)
+        angles += center
+        np.maximum(angles, 0.0, out=angles)
+        np.minimum(angles, 180.0, out=angles)
+
+        # angles and ticks are views of angle_values and tick_values, read by the same per-frame write as the loop
+        # path without NumPy scalars
+        self.output.angle_array_to_ticks(angles, magnitude, ticks)
+        count = len(channel_list)
+        self.output.write_angles(channel_list, angle_values, count, tick_values)
+        for index in range(count):
+            servo_angles[angle_keys[index]] = round(angle_values[index], 1)
+        if self.tracks_disabled:
+            for angle_key in plan.track_angle_keys:
+                servo_angles[angle_key] = None
 
     def reset(self, reset_pump=True, pump_reset_point=-1.0):
         """
@@ -380,12 +868,24 @@ class PWM_hat:
         :param pump_reset_point: The throttle value to set the pump to when resetting. ESC dependant.
         """
 
-        for config in self.channel_configs.values():
-            if config['type'] == 'angle':
-                self.kit.servo[config['output_channel']].angle = self.center_val_servo + config.get('offset', 0)
+        with self.output_lock:
+            # Safety writes always go out, even if the last committed value matches. Not slew limited.
+            for angle_row in self.plan.angle_rows:
+                self.output.write_angle(angle_row[0], angle_row[1], force=True)
+                self.slew.snap(angle_row[0], angle_row[1])
 
-        if reset_pump and 'pump' in self.channel_configs:
-            self.kit.continuous_servo[self.channel_configs['pump']['output_channel']].throttle = pump_reset_point
+            if reset_pump and self.plan.pump_output is not None:
+                self.output.write_throttle(self.plan.pump_output, pump_reset_point, force=True)
+
+            self.output.flush()
+            if self.telemetry is not None:
+                self._publish_outputs()
+                # The safe state is often the last frame for a while (watchdog), do not hold it in a batch
+                self.telemetry.flush()
+
+            # Do not let the scheduler re-commit the inputs we just reset away from
+            if self.scheduler is not None:
+                self.scheduler.clear()
 
         self.is_safe_state = False
         self.input_count = 0
@@ -432,29 +932,127 @@ class PWM_hat:
         self.pump_variable = bool_value
         print(f"Pump variable set to: {self.pump_variable}!")
 
-    def reload_config(self, config_file):
-        """Update the configuration file and reinitialize the controller."""
-        # Reset the controller
-        self.reset()
-
-        # Re-read the config file
-        with open(config_file, 'r') as file:
-            configs = yaml.safe_load(file)
-            self.channel_configs = configs['CHANNEL_CONFIGS']
-
-        # Validate the new configuration
-        self.validate_configuration()
-
-        # Reinitialize necessary components
-        if SERVOKIT_AVAILABLE and not self.simulation_mode:
-            self.kit = ServoKit(channels=self.num_outputs)
-
-        # Restart monitoring if it was running
-        if self.running:
-            self.stop_monitoring()
-            self.start_monitoring()
+    def reload_config(self, config_file, wait=True) -> Future:
+        """
+        Hot-reload the channel configuration.
+
+        The file is parsed, validated and compiled in a background thread. Only then the live configuration is
+        swapped, between two frames (under output_lock). Outputs are not reset and the driver is not recreated;
+        only outputs that are no longer driven by any channel are returned to their centre / pump reset point.
+        Reloads run one at a time, in the order they were started.
+
+        :param config_file: Path to the new configuration file.
+        :param wait: Wait for the reload to finish. Raises ValueError if the new configuration is invalid, or the
+                     error that stopped the swap (e.g. OSError continuing a recording). With wait=False the call
+                     returns at once and the control loop keeps running; errors are printed, see the Future.
+        :return: Future of the reload, result() returns get_reload_stats() or raises the error.
+        """
+        future = Future()
+        thread = threading.Thread(target=self._reload_worker, args=(config_file, future), daemon=True)
+        thread.start()
+
+        if wait:
+            future.result()
+        return future
+
+    def _reload_worker(self, config_file, future: Future) -> None:
+        """Run _reload() under reload_lock and resolve the future, whatever happens."""
+        try:
+            with self.reload_lock:
+                stats = self._reload(config_file)
+        except BaseException as e:
+            if not isinstance(e, ValueError):
+                # ValueErrors (invalid configuration) were already reported by _reload()
+                self.reload_stats = {'file': config_file, 'error': f"Error reloading configuration: {e!r}"}
+                print(self.reload_stats['error'])
+            future.set_exception(e)
+            return
+        future.set_result(stats)
+
+    def _reload(self, config_file) -> dict:
+        """Prepare and swap in a new configuration, see reload_config(). Called with reload_lock held."""
+        start = time.monotonic()
+        try:
+            with open(config_file, 'r') as file:
+                configs = yaml.safe_load(file)
+                channel_configs = configs['CHANNEL_CONFIGS']
+            if configs.get('PWM_BOARDS') and configs['PWM_BOARDS'] != self.boards:
+                raise ValueError("PWM_BOARDS changed, board changes need a restart")
+            self.resolve_output_channels(channel_configs)
+            self.validate_configuration(channel_configs)
+            plan = ChannelPlan(channel_configs, self.center_val_servo, self.num_outputs)
+            binding = self.input_binding if self.input_order is None else plan.order_binding(self.input_order)
+            named_rows = plan.compile_binding(binding) if binding is not None else None
+        except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError) as e:
+            self.reload_stats = {'file': config_file, 'error': f"Error reloading configuration: {e}"}
+            print(self.reload_stats['error'])
+            raise ValueError(self.reload_stats['error']) from e
+        prepared = time.monotonic()
+
+        # Against the configuration swapped in by the previous reload, reload_lock is held
+        old_configs = self.channel_configs
+        added = [name for name in channel_configs if name not in old_configs]
+        removed = [name for name in old_configs if name not in channel_configs]
+        changed = [name for name in channel_configs if name in old_configs and channel_configs[name] != old_configs[name]]
+
+        swap_start = swap_end = prepared
+        if added or removed or changed:
+            with self.output_lock:
+                swap_start = time.monotonic()
+                old_plan = self.plan
+
+                self.channel_configs = channel_configs
+                self.plan = plan
+                self.named_rows = named_rows
+                self.input_binding = binding
+                self.num_inputs = self.calculate_num_inputs(channel_configs)
+                self.defined_channel_types = self.get_defined_channel_types()
+                self.servo_angles = plan.servo_angle_buffers[0]
+
+                # Outputs nobody drives anymore go back to a safe position
+                driven = {angle_row[0] for angle_row in plan.angle_rows}
+                for angle_row in old_plan.angle_rows:
+                    if angle_row[0] not in driven:
+                        self.output.write_angle(angle_row[0], angle_row[1], force=True)
+                        self.slew.snap(angle_row[0], angle_row[1])
+                if old_plan.pump_output is not None and old_plan.pump_output != plan.pump_output:
+                    self.output.write_throttle(old_plan.pump_output, -1.0, force=True)
+                self.output.flush()
+
+                # Published inputs were mapped with the old plan
+                if self.scheduler is not None:
+                    self.scheduler.clear()
+                self._update_fast_path()
+
+                # A recording has a fixed input vector length, continue in a new file with the new one. Last, the
+                # configuration is in place even if this fails
+                if self.recorder is not None and self.recorder.num_inputs != self.num_inputs:
+                    self._next_recording_segment()
+                swap_end = time.monotonic()
+
+        end = time.monotonic()
+        self.reload_stats = {
+            'file': config_file,
+            'error': None,
+            'added': added,
+            'removed': removed,
+            'changed': changed,
+            'prepare_time': prepared - start,   # parse, validate and compile, off the control path
+            'swap_wait': swap_start - prepared,  # waiting for the frame boundary
+            'swap_time': swap_end - swap_start,  # time the control path was blocked
+            'total_time': end - start,
+        }
+        print(f"Configuration updated successfully from {config_file} in {(end - start) * 1000:.1f}ms "
+              f"(added: {added}, removed: {removed}, changed: {changed})")
+        return self.reload_stats
+
+    def get_reload_stats(self) -> dict:
+        """
+        Get the result of the last reload_config().
 
-        print(f"Configuration updated successfully from {config_file}")
+        :return: Dictionary with the changed channel names and the timings in seconds, or 'error'.
+        """
+        return self.reload_stats
 
     def print_input_mappings(self):
         """Print the input and output mappings for each channel."""
@@ -473,7 +1071,8 @@ class PWM_hat:
         for input_num in range(self.num_inputs):
             if input_num in input_to_name_and_output:
                 names_and_outputs = ', '.join(
-                    f"{name} (PWM output {output})" for name, output in input_to_name_and_output[input_num]
+                    f"{name} (PWM output {self.describe_output(output)})"
+                    for name, output in input_to_name_and_output[input_num]
                 )
                 print(f"Input {input_num}: {names_and_outputs}")
             else:
@@ -488,20 +1087,26 @@ class PWM_hat:
 
         :return: Average input rate in Hz, or 0 if no inputs in the last 30 seconds.
         """
-        current_time = time.time()
+        return self.rate_monitor.get_rate()
 
-        # Filter timestamps to last 30 seconds
-        recent_timestamps = [t for t in self.input_timestamps if current_time - t <= 30]
+    def get_input_jitter(self) -> dict:
+        """
+        Get inter-arrival statistics of the inputs over the last 30 seconds.
 
-        if len(recent_timestamps) < 2:
-            return 0.0  # Not enough data to calculate rate
+        :return: Dictionary with 'count', 'min', 'max', 'mean' and 'p99' intervals in seconds (None without data).
+        """
+        return self.rate_monitor.get_jitter_stats()
 
-        # Calculate rate based on number of inputs and time span
-        time_span = recent_timestamps[-1] - recent_timestamps[0]
-        if time_span > 0:
-            return (len(recent_timestamps) - 1) / time_span
-        else:
-            return 0.0  # Avoid division by zero
+    def get_output_stats(self) -> dict:
+        """
+        Get the write counters of the output layer.
+
+        :return: Dictionary with 'writes_issued' and 'writes_suppressed'.
+        """
+        return {
+            'writes_issued': self.output.writes_issued,
+            'writes_suppressed': self.output.writes_suppressed,
+        }
 
     def update_pump(self, adjustment, debug=False):
         """
@@ -513,7 +1118,9 @@ class PWM_hat:
         self.manual_pump_load = max(-1.0, min(1.0, self.manual_pump_load + adjustment))
 
         # Re-calculate pump throttle with new manual load
-        current_throttle = self.handle_pump(self.values)
+        with self.output_lock:
+            current_throttle = self.handle_pump(self.values)
+            self.output.flush()
 
         if debug:
             print(f"Current pump throttle: {current_throttle:.2f}")
@@ -529,11 +1136,732 @@ class PWM_hat:
         self.manual_pump_load = 0.0
 
         # Re-calculate pump throttle without manual load
-        current_throttle = self.handle_pump(self.values)
+        with self.output_lock:
+            current_throttle = self.handle_pump(self.values)
+            self.output.flush()
 
         if debug:
             print(f"Pump load reset. Current pump throttle: {current_throttle:.2f}")
 
+class InputRateMonitor:
+    """
+    Fixed-capacity ring buffer of input timestamps (monotonic clock) over a sliding time window.
+
+    Inserts and rate queries are O(1) amortized: expired timestamps are dropped from the head as the window
+    moves, and the rate is computed from the count and the span between the oldest and newest timestamp.
+    If inputs arrive faster than capacity / window, the oldest ones are overwritten and the window shrinks.
+    """
+
+    def __init__(self, window: float = 30.0, capacity: int = 4096) -> None:
+        self.window = window
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.head = 0   # index of the oldest timestamp
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, timestamp: float = None) -> None:
+        """Add an input timestamp (time.monotonic())."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        with self.lock:
+            if self.count == self.capacity:
+                self.head = (self.head + 1) % self.capacity
+                self.count -= 1
+            self.timestamps[(self.head + self.count) % self.capacity] = timestamp
+            self.count += 1
+            self._expire(timestamp)
+
+    def _expire(self, now: float) -> None:
+        timestamps = self.timestamps
+        while self.count and now - timestamps[self.head] > self.window:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+
+    def get_rate(self, now: float = None) -> float:
+        """
+        Average rate over the window.
+
+        :return: Rate in Hz, or 0 if there are less than two timestamps in the window.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        with self.lock:
+            self._expire(now)
+            if self.count < 2:
+                return 0.0
+            time_span = self.timestamps[(self.head + self.count - 1) % self.capacity] - self.timestamps[self.head]
+            count = self.count
+
+        if time_span > 0:
+            return (count - 1) / time_span
+        return 0.0
+
+    def get_jitter_stats(self, now: float = None) -> dict:
+        """
+        Inter-arrival statistics over the window. Computed on demand, so keep it out of the control loop.
+
+        :return: Dictionary with 'count', 'min', 'max', 'mean' and 'p99' intervals in seconds (None without data).
+        """
+        if now is None:
+            now = time.monotonic()
+
+        with self.lock:
+            self._expire(now)
+            end = self.head + self.count
+            if end <= self.capacity:
+                window = self.timestamps[self.head:end]
+            else:
+                window = self.timestamps[self.head:] + self.timestamps[:end - self.capacity]
+
+        intervals = sorted(window[i + 1] - window[i] for i in range(len(window) - 1))
+        if not intervals:
+            return {'count': 0, 'min': None, 'max': None, 'mean': None, 'p99': None}
+
+        return {
+            'count': len(intervals),
+            'min': intervals[0],
+            'max': intervals[-1],
+            'mean': (window[-1] - window[0]) / len(intervals),
+            'p99': intervals[min(len(intervals) - 1, int(0.99 * len(intervals)))],
+        }
+
+    def clear(self) -> None:
+        """Forget all timestamps."""
+        with self.lock:
+            self.head = 0
+            self.count = 0
+
+
+class OutputScheduler:
+    """
+    Commits the latest published inputs of a PWM_hat at a fixed frame rate, on absolute deadlines.
+
+    Inputs published between two frames are coalesced: only the newest one is committed. If a frame is
+    late by more than a whole period, the missed frames are skipped (not caught up) and counted.
+    """
+
+    def __init__(self, pwm: 'PWM_hat', frame_rate: float) -> None:
+        self.pwm = pwm
+        self.frame_rate = frame_rate
+        self.period = 1.0 / frame_rate
+
+        self.pending = None     # (inputs, min_cap, max_cap) of the newest publish
+        self.published = 0
+
+        self.thread = None
+        self.running = False
+        self.stop_event = threading.Event()
+
+        self.reset_stats()
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        self.running = True
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the scheduler thread."""
+        self.running = False
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def publish(self, raw_values, min_cap=-1, max_cap=1, input_rows=None) -> None:
+        """
+        Publish new inputs for the next frame. Never blocks on I2C.
+        raw_values is kept by reference (swapping it in is atomic), so it must not be modified afterwards.
+        """
+        self.pending = (raw_values, min_cap, max_cap, input_rows)
+        self.published += 1
+
+    def clear(self) -> None:
+        """Drop the published inputs, nothing is committed until the next publish."""
+        self.pending = None
+
+    def _run(self) -> None:
+        pwm = self.pwm
+        period = self.period
+        deadline = time.monotonic() + period
+        last_pending = None
+
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining > 0 and self.stop_event.wait(timeout=remaining):
+                break
+
+            start = time.monotonic()
+            lateness = start - deadline
+
+            with pwm.output_lock:
+                pending = self.pending
+                if pending is not None and (pwm.skip_rate_checking or pwm.is_safe_state):
+                    try:
+                        pwm._commit_values(*pending)
+                    except ValueError as e:
+                        # Bad snapshot, _commit_values() already reset the outputs
+                        print(f"Output scheduler: {e}")
+                        self.clear()
+                    if pending is not last_pending:
+                        self.frames_with_input += 1
+                        last_pending = pending
+
+            end = time.monotonic()
+            self._update_stats(lateness, end - start)
+
+            deadline += period
+            if end > deadline:
+                # Overran into the next frame(s), skip them instead of bursting to catch up
+                missed = int((end - deadline) / period) + 1
+                self.missed_frames += missed
+                deadline += missed * period
+
+    def _update_stats(self, lateness: float, commit_time: float) -> None:
+        self.frames += 1
+        self.lateness_sum += lateness
+        self.commit_time_sum += commit_time
+        if lateness > self.lateness_max:
+            self.lateness_max = lateness
+        if commit_time > self.commit_time_max:
+            self.commit_time_max = commit_time
+
+    def get_stats(self) -> dict:
+        """
+        Per-frame timing statistics since start (or reset_stats).
+
+        :return: Dictionary with frame counts, inputs published and coalesced, missed frames, and mean/max of
+                 the frame start lateness and commit duration in seconds.
+        """
+        frames = self.frames or 1
+        published = self.published - self.published_at_reset
+        return {
+            'frame_rate': self.frame_rate,
+            'frames': self.frames,
+            'frames_with_input': self.frames_with_input,
+            'inputs_published': published,
+            'inputs_coalesced': max(0, published - self.frames_with_input),
+            'missed_frames': self.missed_frames,
+            'lateness_mean': self.lateness_sum / frames,
+            'lateness_max': self.lateness_max,
+            'commit_time_mean': self.commit_time_sum / frames,
+            'commit_time_max': self.commit_time_max,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset the timing statistics."""
+        self.frames = 0
+        self.frames_with_input = 0
+        self.published_at_reset = self.published
+        self.missed_frames = 0
+        self.lateness_sum = 0.0
+        self.lateness_max = 0.0
+        self.commit_time_sum = 0.0
+        self.commit_time_max = 0.0
+
+
+class SlewLimiter:
+    """
+    Interpolation stage between the computed target angles and the outputs.
+
+    Limits the rate of change (degrees/s) and optionally the acceleration (degrees/s^2) of each channel. With
+    an acceleration limit the channel also decelerates in time to stop at the target instead of overshooting.
+    It runs on every commit, so with the output scheduler running it interpolates at the frame rate between
+    (possibly much slower) input updates.
+    """
+    # Longest time step used, so a long pause between commits does not turn into an unlimited jump
+    MAX_DT = 0.1
+
+    def __init__(self, channels: int) -> None:
+        self.position = [None] * channels
+        self.velocity = [0.0] * channels
+        self.last_time = None
+
+    def advance(self, now: float) -> float:
+        """Start a new interpolation step and return its length in seconds."""
+        dt = self.MAX_DT if self.last_time is None else min(now - self.last_time, self.MAX_DT)
+        self.last_time = now
+        return dt
+
+    def step(self, channel: int, target: float, max_rate: float, max_acceleration: float, dt: float) -> float:
+        """Move one channel towards the target within its limits. Returns the new position."""
+        position = self.position[channel]
+        if position is None or dt <= 0:
+            if position is None:
+                self.position[channel] = target
+                return target
+            return position
+
+        error = target - position
+        if max_acceleration is None:
+            velocity = error / dt
+            if max_rate is not None:
+                velocity = max(-max_rate, min(max_rate, velocity))
+        else:
+            # Fastest velocity from which we can still stop at the target
+            desired = math.copysign(math.sqrt(2.0 * max_acceleration * abs(error)), error)
+            if max_rate is not None:
+                desired = max(-max_rate, min(max_rate, desired))
+            max_change = max_acceleration * dt
+            velocity = self.velocity[channel]
+            velocity += max(-max_change, min(max_change, desired - velocity))
+
+        position_step = velocity * dt
+        if position_step * error > 0 and abs(position_step) >= abs(error):
+            # Arrived. Only when moving towards the target, a target reversed behind a moving channel is reached by
+            # decelerating and coming back, not by a jump with the velocity dropped to zero
+            position = target
+            velocity = 0.0
+        else:
+            position += position_step
+
+        self.position[channel] = position
+        self.velocity[channel] = velocity
+        return position
+
+    def snap(self, channel: int, position: float) -> None:
+        """Jump a channel to a position (used by reset), with zero velocity."""
+        self.position[channel] = position
+        self.velocity[channel] = 0.0
+
+
+class ChannelPlan:
+    """
+    Flat, precomputed view of CHANNEL_CONFIGS for the per-tick update path.
+
+    The YAML config is compiled once (at construction and on reload) into tuples of plain numbers, so
+    update_values() and handle_angles() do no dict lookups, string comparisons or key formatting per channel.
+    """
+    TRACK_CHANNELS = ('trackL', 'trackR')
+    # From this many angle channels on, the per-tick path runs on NumPy arrays. Below it NumPy's per-call overhead
+    # costs more than the per-channel loop (update_values() with 8 angle channels: 38 us vector vs. 23 us loop,
+    # with 32: 47 us vs. 77 us).
+    VECTORIZE_MIN_CHANNELS = 24
+
+    def __init__(self, channel_configs: dict, center_val_servo: float, num_outputs: int = 16) -> None:
+        self.num_outputs = num_outputs
+        # (input index, output index, affects pump) for every channel with a direct input
+        self.input_rows = []
+        self.input_names = []  # channel name of each input row
+        # (output index, center, scale+, scale-, gamma+, gamma-, is track, name, servo_angles key,
+        #  max rate, max acceleration) for angle channels
+        self.angle_rows = []
+        self.empty_servo_angles = {}
+        self.has_slew = False
+
+        self.has_pump = False
+        self.pump_output = None
+        self.pump_input = None
+        self.pump_idle = 0.0
+        self.pump_multiplier = 0.0
+
+        for channel_name, config in channel_configs.items():
+            input_channel = config.get('input_channel')
+            if isinstance(input_channel, int):
+                self.input_rows.append((input_channel, config['output_channel'],
+                                        bool(config.get('affects_pump', False))))
+                self.input_names.append(channel_name)
+
+            if config['type'] == 'angle':
+                direction = config['direction']
+                angle_key = f"{channel_name} angle"
+                self.angle_rows.append((
+                    config['output_channel'],
+                    center_val_servo + config['offset'],
+                    config.get('multiplier_positive', 1) * direction,
+                    config.get('multiplier_negative', 1) * direction,
+                    float(config.get('gamma_positive', 1)),
+                    float(config.get('gamma_negative', 1)),
+                    channel_name in self.TRACK_CHANNELS,
+                    channel_name,
+                    angle_key,
+                    config.get('max_rate'),
+                    config.get('max_acceleration'),
+                ))
+                if config.get('max_rate') is not None or config.get('max_acceleration') is not None:
+                    self.has_slew = True
+                self.empty_servo_angles[angle_key] = None
+
+            elif config['type'] == 'pump':
+                self.has_pump = True
+
+        if 'pump' in channel_configs:
+            pump_config = channel_configs['pump']
+            self.pump_output = pump_config['output_channel']
+            self.pump_input = pump_config.get('input_channel')
+            self.pump_idle = pump_config.get('idle', 0.0)
+            self.pump_multiplier = pump_config.get('multiplier', 0.0)
+
+        self.input_rows = tuple(self.input_rows)
+        self.angle_rows = tuple(self.angle_rows)
+        self.angle_names = [row[7] for row in self.angle_rows]
+        self.track_angle_keys = [row[8] for row in self.angle_rows if row[6]]
+        # Output channels and angles of the current frame, filled in place by PWM_hat.handle_angles()
+        self.frame_channels = [0] * len(self.angle_rows)
+        self.frame_angles = [0.0] * len(self.angle_rows)
+        # The servo_angles of two consecutive frames, written in turn (PWM_hat._write_frame()), so no dict is
+        # built per frame
+        self.servo_angle_buffers = (dict(self.empty_servo_angles), dict(self.empty_servo_angles))
+
+        # Slew limited channels step one at a time, see PWM_hat.handle_angles()
+        self.vectorized = (NUMPY_AVAILABLE and not self.has_slew
+                           and len(self.angle_rows) >= self.VECTORIZE_MIN_CHANNELS)
+        if NUMPY_AVAILABLE:
+            self._build_arrays()
+
+    def compile_binding(self, binding: dict) -> tuple:
+        """
+        Compile a {channel name: input name} binding into rows of (input name, output index, affects pump).
+
+        :raises ValueError: If a channel with an input is not bound, or the binding names an unknown channel.
+        """
+        missing = [name for name in self.input_names if name not in binding]
+        if missing:
+            raise ValueError(f"No input bound for channel(s): {', '.join(missing)}")
+
+        unknown = [name for name in binding if name not in self.input_names]
+        if unknown:
+            raise ValueError(f"Unknown or input-less channel(s) in binding: {', '.join(unknown)}")
+
+        return tuple((binding[name], output_index, affects_pump)
+                     for name, (_, output_index, affects_pump) in zip(self.input_names, self.input_rows))
+
+    def order_binding(self, input_names) -> dict:
+        """
+        {channel name: input name} binding for input names in input_channel order, see PWM_hat.bind_input_order().
+
+        :raises ValueError: If the number of names does not match the number of inputs.
+        """
+        num_inputs = len({input_index for input_index, _, _ in self.input_rows})
+        if len(input_names) != num_inputs:
+            raise ValueError(f"Expected {num_inputs} input names, but received {len(input_names)}.")
+        return {name: input_names[input_index] for name, (input_index, _, _) in zip(self.input_names, self.input_rows)}
+
+    def _build_arrays(self) -> None:
+        """Column arrays of the plan for the vectorized batch path."""
+        self.in_index = np.array([row[0] for row in self.input_rows], dtype=np.intp)
+        self.in_output = np.array([row[1] for row in self.input_rows], dtype=np.intp)
+        self.in_affects_pump = np.array([row[2] for row in self.input_rows], dtype=bool)
+
+        self.angle_output = np.array([row[0] for row in self.angle_rows], dtype=np.intp)
+        self.angle_center = np.array([row[1] for row in self.angle_rows], dtype=np.float64)
+        self.angle_scale_positive = np.array([row[2] for row in self.angle_rows], dtype=np.float64)
+        self.angle_scale_negative = np.array([row[3] for row in self.angle_rows], dtype=np.float64)
+        self.angle_gamma_positive = np.array([row[4] for row in self.angle_rows], dtype=np.float64)
+        self.angle_gamma_negative = np.array([row[5] for row in self.angle_rows], dtype=np.float64)
+        self.angle_is_track = np.array([row[6] for row in self.angle_rows], dtype=bool)
+        self.has_gamma = bool(np.any(self.angle_gamma_positive != 1.0) or np.any(self.angle_gamma_negative != 1.0))
+
+        # Columns and scratch buffers of the per-tick path (PWM_hat._handle_angle_array), indexed by tracks_disabled.
+        # The negative scale is stored negated, so one masked copy picks the signed scale of every channel. The
+        # angles are computed into a view of an array('d'), which OutputWriter.write_angles() reads directly.
+        self.angle_columns = {}
+        for tracks_disabled in (False, True):
+            keep = ~self.angle_is_track if tracks_disabled else np.ones(len(self.angle_rows), dtype=bool)
+            count = int(np.count_nonzero(keep))
+            angle_values = array('d', bytes(8 * count))
+            tick_values = array('q', bytes(8 * count))
+            self.angle_columns[tracks_disabled] = (
+                self.angle_output[keep],
+                self.angle_output[keep].tolist(),
+                self.angle_center[keep],
+                self.angle_scale_positive[keep],
+                -self.angle_scale_negative[keep],
+                self.angle_gamma_positive[keep],
+                self.angle_gamma_negative[keep],
+                [row[8] for row, kept in zip(self.angle_rows, keep) if kept],
+                np.empty(count, dtype=np.float64),  # inputs
+                np.empty(count, dtype=bool),        # input >= 0
+                np.empty(count, dtype=np.float64),  # magnitude
+                np.empty(count, dtype=np.float64),  # gamma / scale of the input's side
+                angle_values,
+                np.frombuffer(angle_values, dtype=np.float64) if count else np.empty(0),
+                tick_values,
+                np.frombuffer(tick_values, dtype=np.int64) if count else np.empty(0, dtype=np.int64),
+            )
+
+    def compute_batch(self, frames, deadzone_threshold: float, min_cap: float = -1, max_cap: float = 1,
+                      tracks_disabled: bool = False, pump_enabled: bool = True, pump_variable: bool = True,
+                      manual_pump_load: float = 0.0):
+        """
+        Vectorized equivalent of update_values() + handle_pump() + handle_angles() for a block of input frames.
+
+        :param frames: 2-D array (frames x inputs) of raw input values.
+        :return: (angles, throttle). angles is (frames x angle channels) in angle_names order, NaN where a channel
+                 would not be written (disabled tracks). throttle is (frames,), or None if no pump is configured.
+        """
+        num_frames = frames.shape[0]
+
+        capped = np.clip(frames[:, self.in_index], min_cap, max_cap)
+        capped[np.abs(capped) < deadzone_threshold] = 0.0
+
+        # Outputs that have no input keep their initial 0.0, as self.values does
+        values = np.zeros((num_frames, self.num_outputs), dtype=np.float64)
+        values[:, self.in_output] = capped
+
+        throttle = None
+        if self.has_pump:
+            if not pump_enabled:
+                throttle = np.full(num_frames, -1.0)
+            elif not isinstance(self.pump_input, int):
+                if pump_variable:
+                    pump_variable_sum = np.abs(capped[:, self.in_affects_pump]).sum(axis=1)
+                    throttle = self.pump_idle + self.pump_multiplier * pump_variable_sum
+                else:
+                    throttle = np.full(num_frames, self.pump_idle + self.pump_multiplier / 10)
+                throttle = throttle + manual_pump_load
+            elif 0 <= self.pump_input < self.num_outputs:
+                throttle = values[:, self.pump_input].copy()
+            else:
+                throttle = np.full(num_frames, float(self.pump_idle))
+            np.clip(throttle, -1.0, 1.0, out=throttle)
+
+        angle_inputs = values[:, self.angle_output]
+        magnitude = np.abs(angle_inputs)
+        positive = angle_inputs >= 0
+        angles = np.where(positive,
+                          magnitude ** self.angle_gamma_positive * self.angle_scale_positive,
+                          -(magnitude ** self.angle_gamma_negative) * self.angle_scale_negative)
+        angles += self.angle_center
+        np.clip(angles, 0, 180, out=angles)
+
+        if tracks_disabled:
+            angles[:, self.angle_is_track] = np.nan
+
+        return angles, throttle
+
+
+class OutputWriter:
+    """
+    Dirty-tracking output layer between PWM_hat and the ServoKit.
+
+    Remembers the last value committed per channel as a 12-bit PCA9685 tick count, computed the same way
+    adafruit_motor and the PCA9685 driver quantize it, and only writes channels whose tick count changed.
+    Every skipped write is one I2C transaction less on the bus (shared with e.g. the ADCPi boards).
+
+    last_ticks is an array('q'), -1 for a channel whose committed value is unknown. The changed channels of a
+    frame are collected in preallocated buffers (dirty, frame_ticks), so a frame allocates no lists.
+    """
+    UNKNOWN = -1
+    # ServoKit defaults: 50Hz, 750-2250us pulses, 180 degree actuation range
+    FREQUENCY = 50
+    MIN_PULSE = 750
+    MAX_PULSE = 2250
+    ACTUATION_RANGE = 180
+
+    def __init__(self, kit, channels: int, enabled: bool = True) -> None:
+        self.kit = kit
+        self.channels = channels
+        self.enabled = enabled
+
+        self._min_duty = int((self.MIN_PULSE * self.FREQUENCY) / 1000000 * 0xFFFF)
+        max_duty = (self.MAX_PULSE * self.FREQUENCY) / 1000000 * 0xFFFF
+        self._duty_range = int(max_duty - self._min_duty)
+
+        self.last_ticks = array('q', [self.UNKNOWN]) * channels
+        # Changed channels of the current frame: their positions in the frame and their new tick counts
+        self.dirty = array('H', bytes(2 * channels))
+        self.frame_ticks = array('H', bytes(2 * channels))
+        self.pending = {}   # writes staged for flush(), only used by buffered backends
+        self.writes_issued = 0
+        self.writes_suppressed = 0
+
+    def set_kit(self, kit) -> None:
+        """Swap the underlying ServoKit. The committed state is unknown afterwards, so everything is rewritten."""
+        self.kit = kit
+        self.invalidate()
+
+    def angle_to_ticks(self, angle: float) -> int:
+        """Convert a servo angle to the PCA9685 12-bit on-time tick count."""
+        fraction = max(0.0, min(1.0, angle / self.ACTUATION_RANGE))
+        duty_cycle = self._min_duty + int(fraction * self._duty_range)
+        return (duty_cycle + 1) >> 4
+
+    def throttle_to_ticks(self, throttle: float) -> int:
+        """Convert a continuous servo throttle (-1..1) to the PCA9685 12-bit on-time tick count."""
+        fraction = (max(-1.0, min(1.0, throttle)) + 1.0) / 2.0
+        duty_cycle = self._min_duty + int(fraction * self._duty_range)
+        return (duty_cycle + 1) >> 4
+
+    def write_angle(self, channel: int, angle: float, force: bool = False) -> bool:
+        """
+        Write a servo angle if its tick count differs from the last committed one.
+
+        :return: True if the write was issued.
+        """
+        # angle_to_ticks() inlined, this runs for every channel on every tick
+        fraction = angle / self.ACTUATION_RANGE
+        if fraction < 0.0:
+            fraction = 0.0
+        elif fraction > 1.0:
+            fraction = 1.0
+        ticks = (self._min_duty + int(fraction * self._duty_range) + 1) >> 4
+
+        if self.enabled and not force and self.last_ticks[channel] == ticks:
+            self.writes_suppressed += 1
+            return False
+
+        self._issue_angle(channel, angle, ticks)
+        self.last_ticks[channel] = ticks
+        self.writes_issued += 1
+        return True
+
+    def write_angles(self, channels, angles, count: int = None, ticks=None) -> None:
+        """
+        write_angle() for the angle channels of a whole frame: one call per frame, and the changed channels are
+        issued as one batch.
+
+        :param channels: Output channels.
+        :param angles: Servo angles in the order of channels, already clamped to 0..ACTUATION_RANGE.
+        :param count: Number of channels of the frame, the first count entries of channels and angles.
+                      Defaults to len(channels).
+        :param ticks: Tick counts of the angles if already computed, see angle_array_to_ticks().
+        """
+        if count is None:
+            count = len(channels)
+        actuation_range = self.ACTUATION_RANGE
+        duty_range = self._duty_range
+        duty_offset = self._min_duty + 1
+        enabled = self.enabled
+        last_ticks = self.last_ticks
+        dirty = self.dirty
+        frame_ticks = self.frame_ticks
+
+        changed = 0
+        for index in range(count):
+            channel = channels[index]
+            if ticks is None:
+                channel_ticks = (int(angles[index] / actuation_range * duty_range) + duty_offset) >> 4
+            else:
+                channel_ticks = ticks[index]
+            if enabled and last_ticks[channel] == channel_ticks:
+                continue
+            last_ticks[channel] = channel_ticks
+            dirty[changed] = index
+            frame_ticks[changed] = channel_ticks
+            changed += 1
+
+        self.writes_suppressed += count - changed
+        if changed:
+            self._issue_angles(channels, angles, changed)
+            self.writes_issued += changed
+
+    def angle_array_to_ticks(self, angles, fraction, ticks) -> None:
+        """
+        angle_to_ticks() of a NumPy array of angles (already clamped), into preallocated arrays.
+
+        :param fraction: float64 scratch array of len(angles).
+        :param ticks: int64 array of len(angles) for the result.
+        """
+        np.divide(angles, self.ACTUATION_RANGE, out=fraction)
+        fraction *= self._duty_range
+        np.copyto(ticks, fraction, casting='unsafe')    # truncates, like int()
+        ticks += self._min_duty + 1
+        ticks >>= 4
+
+    def write_throttle(self, channel: int, throttle: float, force: bool = False) -> bool:
+        """
+        Write a continuous servo throttle if its tick count differs from the last committed one.
+
+        :return: True if the write was issued.
+        """
+        # throttle_to_ticks() inlined, this runs on every tick with a pump channel
+        if throttle >= -1.0:
+            fraction = 1.0 if throttle > 1.0 else (throttle + 1.0) / 2.0
+        else:
+            fraction = 0.0  # also NaN, as in throttle_to_ticks()
+        ticks = (self._min_duty + int(fraction * self._duty_range) + 1) >> 4
+
+        if self.enabled and not force and self.last_ticks[channel] == ticks:
+            self.writes_suppressed += 1
+            return False
+
+        self._issue_throttle(channel, throttle, ticks)
+        self.last_ticks[channel] = ticks
+        self.writes_issued += 1
+        return True
+
+    def _issue_angle(self, channel: int, angle: float, ticks: int) -> None:
+        self.kit.servo[channel].angle = angle
+
+    def _issue_angles(self, channels, angles, count: int) -> None:
+        """Issue the first count changed channels of the frame, their positions are in self.dirty."""
+        servo = self.kit.servo
+        dirty = self.dirty
+        for position in range(count):
+            index = dirty[position]
+            servo[channels[index]].angle = angles[index]
+
+    def _issue_throttle(self, channel: int, throttle: float, ticks: int) -> None:
+        self.kit.continuous_servo[channel].throttle = throttle
+
+    def flush(self) -> None:
+        """Commit the writes of the current frame. ServoKit writes immediately, so nothing to do here."""
+        pass
+
+    def invalidate(self, channel: int = None) -> None:
+        """Forget the committed value of one channel (or all), forcing the next write out."""
+        if channel is None:
+            self.last_ticks = array('q', [self.UNKNOWN]) * self.channels
+        else:
+            self.last_ticks[channel] = self.UNKNOWN
+
+    def reset_stats(self) -> None:
+        """Reset the write counters."""
+        self.writes_issued = 0
+        self.writes_suppressed = 0
+
+
+class BurstOutputWriter(OutputWriter):
+    """
+    Output layer for the direct PCA9685 backend.
+    Changed channels are staged as tick counts and written in one burst transaction per board and frame on flush().
+    """
+
+    def _issue_angle(self, channel: int, angle: float, ticks: int) -> None:
+        self.pending[channel] = ticks
+
+    def _issue_angles(self, channels, angles, count: int) -> None:
+        pending = self.pending
+        dirty = self.dirty
+        frame_ticks = self.frame_ticks
+        for position in range(count):
+            pending[channels[dirty[position]]] = frame_ticks[position]
+
+    def _issue_throttle(self, channel: int, throttle: float, ticks: int) -> None:
+        self.pending[channel] = ticks
+
+    def flush(self) -> None:
+        if self.pending:
+            self.kit.write_channels(self.pending)
+            self.pending.clear()
+
+
+class MultiServoKit:
+    """Several ServoKit boards behind one ServoKit-like interface, indexed by flat output channel."""
+
+    def __init__(self, kits) -> None:
+        self.kits = kits
+        self.channels = CHANNELS_PER_BOARD * len(kits)
+        self.servo = _BoardChannels(kits, 'servo')
+        self.continuous_servo = _BoardChannels(kits, 'continuous_servo')
+
+
+class _BoardChannels:
+    # ServoKit creates a channel object on first access and a channel can only be one type, so resolve lazily
+    def __init__(self, kits, kind: str) -> None:
+        self.kits = kits
+        self.kind = kind
+
+    def __getitem__(self, channel: int):
+        board, board_channel = divmod(channel, CHANNELS_PER_BOARD)
+        return getattr(self.kits[board], self.kind)[board_channel]
+
+
 class ServoKitStub:
     def __init__(self, channels):
         self.channels = channels
@@ -565,3 +1893,139 @@ class ContinuousServoStub:
     def throttle(self, value):
         self._throttle = max(-1, min(1, value))
         print(f"[SIMULATION] Continuous servo throttle set to: {self._throttle}")
+
+
+class RecordingServoKitStub:
+    """
+    Quiet ServoKit stub. Every committed value is stored with a monotonic timestamp into a preallocated ring
+    buffer instead of being printed, so simulation mode can be used for performance and regression testing.
+
+    Optionally prints a one-line summary every summary_interval seconds.
+    """
+    ANGLE = 0
+    THROTTLE = 1
+
+    def __init__(self, channels, capacity: int = 65536, summary_interval: float = None):
+        self.channels = channels
+        self.capacity = capacity
+        self.summary_interval = summary_interval
+
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.channel_ids = array('H', bytes(2 * capacity))
+        self.kinds = array('b', bytes(capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.index = 0      # next slot to write
+        self.total = 0      # values recorded since start (or clear)
+
+        self.start_time = time.monotonic()
+        self._next_summary = self.start_time + summary_interval if summary_interval else None
+        self._summary_time = self.start_time
+        self._summary_total = 0
+
+        self.servo = [RecordingServoStub(self, channel) for channel in range(channels)]
+        self.continuous_servo = [RecordingContinuousServoStub(self, channel) for channel in range(channels)]
+
+    def record(self, channel: int, kind: int, value: float) -> None:
+        """Store one committed value."""
+        timestamp = time.monotonic()
+        index = self.index
+        self.timestamps[index] = timestamp
+        self.channel_ids[index] = channel
+        self.kinds[index] = kind
+        self.values[index] = value
+        self.index = (index + 1) % self.capacity
+        self.total += 1
+
+        if self._next_summary is not None and timestamp >= self._next_summary:
+            self.print_summary(timestamp)
+            self._next_summary = timestamp + self.summary_interval
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def print_summary(self, now: float = None) -> None:
+        """Print the write rate since the last summary and the current value of every written channel."""
+        if now is None:
+            now = time.monotonic()
+        writes = self.total - self._summary_total
+        interval = now - self._summary_time
+        self._summary_total = self.total
+        self._summary_time = now
+
+        angles = ', '.join(f"{servo.channel}: {servo.angle:.1f}" for servo in self.servo if servo.written)
+        throttles = ', '.join(f"{servo.channel}: {servo.throttle:.2f}" for servo in self.continuous_servo
+                              if servo.written)
+        rate = writes / interval if interval > 0 else 0.0
+        print(f"[SIMULATION] {writes} writes ({rate:.0f}/s), {self.total} total. "
+              f"Angles {{{angles}}} Throttles {{{throttles}}}")
+
+    def dump(self) -> dict:
+        """
+        Get the buffered values in chronological order.
+
+        :return: Dictionary of 'timestamp', 'channel', 'kind' and 'value' arrays. NumPy arrays if available,
+                 array.array otherwise. kind is ANGLE (0) or THROTTLE (1).
+        """
+        count = len(self)
+        start = (self.index - count) % self.capacity
+        columns = {'timestamp': self.timestamps, 'channel': self.channel_ids, 'kind': self.kinds, 'value': self.values}
+
+        result = {}
+        for name, column in columns.items():
+            if start + count <= self.capacity:
+                ordered = column[start:start + count]
+            else:
+                ordered = column[start:] + column[:self.index]
+            result[name] = np.frombuffer(ordered, dtype=ordered.typecode).copy() if NUMPY_AVAILABLE else ordered
+        return result
+
+    def save(self, file_path: str) -> None:
+        """Write the buffered values as CSV (timestamp, channel, kind, value)."""
+        data = self.dump()
+        with open(file_path, 'w') as file:
+            file.write("timestamp,channel,kind,value\n")
+            for row in zip(data['timestamp'], data['channel'], data['kind'], data['value']):
+                file.write(f"{row[0]:.6f},{row[1]},{row[2]},{row[3]:.6f}\n")
+
+    def clear(self) -> None:
+        """Drop all recorded values."""
+        self.index = 0
+        self.total = 0
+        self._summary_total = 0
+        self._summary_time = time.monotonic()
+
+
+class RecordingServoStub:
+    def __init__(self, recorder, channel):
+        self.recorder = recorder
+        self.channel = channel
+        self.written = False
+        self._angle = 90
+
+    @property
+    def angle(self):
+        return self._angle
+
+    @angle.setter
+    def angle(self, value):
+        self._angle = max(0, min(180, value))
+        self.written = True
+        self.recorder.record(self.channel, RecordingServoKitStub.ANGLE, self._angle)
+
+
+class RecordingContinuousServoStub:
+    def __init__(self, recorder, channel):
+        self.recorder = recorder
+        self.channel = channel
+        self.written = False
+        self._throttle = 0
+
+    @property
+    def throttle(self):
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, value):
+        self._throttle = max(-1, min(1, value))
+        self.written = True
+        self.recorder.record(self.channel, RecordingServoKitStub.THROTTLE, self._throttle)
@@ -0,0 +1,255 @@
+"""
+This module runs PWM_hat in its own process, fed through a shared memory command slot.
+
+The control process (joystick, sensors, prints, GC pauses...) and the actuator process (PWM_hat, watchdog,
+I2C writes) no longer compete for the same GIL. Commands are passed through a fixed-layout
+multiprocessing.shared_memory block. Each side holds the slot lock only while copying a command or the status
+in or out, and the actuator sleeps on a semaphore until the next command is written.
+
+Python gives no memory ordering guarantees for shared memory stores: a reader on a weakly ordered CPU (ARM,
+e.g. the Raspberry Pi) may see a newer sequence number before the values written ahead of it, so a lock-free
+sequence re-check is not enough. The multiprocessing lock (a POSIX semaphore) is a full memory barrier on every
+platform. Only the "is there a new command" check reads the sequence number without it; a stale value there
+just finds the command on the next wakeup.
+
+Key features:
+1. Command slot: sequence number, monotonic timestamp and up to MAX_INPUTS input values
+2. The actuator process applies every new command with PWM_hat.update_values(), woken by the writer
+3. End-to-end latency (write to applied) and jitter statistics, published back through the same block
+4. The PWM_hat input rate watchdog keeps working: if the control process stops writing, outputs go safe
+
+Usage:
+1. pwm = PWM_process('configuration_files/PWM_config.yaml', input_rate_threshold=10, deadzone=20)
+2. Call pwm.update_values(values) from the control loop, as with PWM_hat
+3. pwm.get_stats() for latency / jitter, pwm.stop() at exit
+"""
+
+import math
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+
+# Command slot layout (little endian), seq, timestamp, count and values are accessed under the slot lock
+#   0  seq        uint64  number of commands written (native byte order, aligned)
+#   8  timestamp  double  time.monotonic() of the write (CLOCK_MONOTONIC is system wide on Linux)
+#  16  count      uint32  number of input values
+#  20  stop       uint32  set by the control process to stop the actuator
+#  24  ready      uint32  set by the actuator once PWM_hat is initialized
+#  32  values     MAX_INPUTS doubles
+# Status block, written by the actuator only, under the slot lock
+#  STATUS_OFFSET  applied_seq, applied, skipped (uint64), latency_sum, latency_sq_sum, latency_max,
+#                 last_latency (double)
+MAX_INPUTS = 64
+HEADER = struct.Struct('<QdIII')
+VALUES_OFFSET = 32
+STATUS_OFFSET = VALUES_OFFSET + 8 * MAX_INPUTS
+STATUS = struct.Struct('<QQQdddd')
+SLOT_SIZE = STATUS_OFFSET + STATUS.size
+
+
+class SharedCommandSlot:
+    def __init__(self, name: str = None, create: bool = True, lock=None, wakeup=None) -> None:
+        """
+        Open (or create) the shared memory command slot.
+
+        :param name: Shared memory name. Generated when creating without a name.
+        :param create: Create the block (control process) or attach to an existing one (actuator process).
+        :param lock: multiprocessing.Lock guarding the slot, self.lock of the creating side. Created if None.
+        :param wakeup: multiprocessing.Semaphore released per command, self.wakeup of the creating side.
+                       Created if None.
+        """
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=SLOT_SIZE if create else 0)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        # The sequence number goes through an aligned native uint64 view: a single store/load, never torn.
+        # (struct.pack_into() with an explicit byte order writes byte by byte.)
+        self.seq_view = self.buf[:8].cast('Q')
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        self.wakeup = wakeup if wakeup is not None else multiprocessing.Semaphore(0)
+        self.created = create
+        self.seq = 0
+        self._values_struct = None
+
+        if create:
+            self.buf[:SLOT_SIZE] = bytes(SLOT_SIZE)
+
+    def write(self, values) -> None:
+        """Write a command (single writer only) and wake the reader."""
+        count = len(values)
+        if count > MAX_INPUTS:
+            raise ValueError(f"At most {MAX_INPUTS} inputs fit in the command slot, got {count}")
+
+        if self._values_struct is None or self._values_struct.size != 8 * count:
+            self._values_struct = struct.Struct(f'<{count}d')
+
+        buf = self.buf
+        seq = self.seq + 1
+        with self.lock:
+            self._values_struct.pack_into(buf, VALUES_OFFSET, *values)
+            struct.pack_into('<dI', buf, 8, time.monotonic(), count)
+            self.seq_view[0] = seq
+        self.seq = seq
+        self.wakeup.release()
+
+    def read(self, last_seq: int = 0):
+        """
+        Read the newest command if it is newer than last_seq.
+
+        :return: (seq, timestamp, values tuple), or None if there is no new command.
+        """
+        # Lock-free check first, an idle poll costs no semaphore operation
+        if self.seq_view[0] == last_seq:
+            return None
+        buf = self.buf
+        with self.lock:
+            seq = self.seq_view[0]
+            _, timestamp, count, _, _ = HEADER.unpack_from(buf, 0)
+            if self._values_struct is None or self._values_struct.size != 8 * count:
+                self._values_struct = struct.Struct(f'<{count}d')
+            values = self._values_struct.unpack_from(buf, VALUES_OFFSET)
+        return seq, timestamp, values
+
+    def wait(self, timeout: float) -> None:
+        """Sleep until a command is written (or the slot is woken up by stop), at most timeout seconds."""
+        self.wakeup.acquire(timeout=timeout)
+
+    def set_flag(self, offset: int, value: int) -> None:
+        struct.pack_into('<I', self.buf, offset, value)
+
+    def get_flag(self, offset: int) -> int:
+        return struct.unpack_from('<I', self.buf, offset)[0]
+
+    def write_status(self, *status) -> None:
+        with self.lock:
+            STATUS.pack_into(self.buf, STATUS_OFFSET, *status)
+
+    def read_status(self) -> tuple:
+        with self.lock:
+            return STATUS.unpack_from(self.buf, STATUS_OFFSET)
+
+    def close(self) -> None:
+        self.seq_view.release()
+        self.seq_view = None
+        self.buf = None
+        self.shm.close()
+        if self.created:
+            self.shm.unlink()
+
+
+STOP_FLAG_OFFSET = 20
+READY_FLAG_OFFSET = 24
+
+
+def _actuator_main(slot_name: str, lock, wakeup, config_file: str, pwm_kwargs: dict, poll_interval: float) -> None:
+    """Entry point of the actuator process."""
+    # Imported here, so the control process does not need the PWM libraries loaded
+    from control_modules.PWM_controller import PWM_hat
+
+    slot = SharedCommandSlot(slot_name, create=False, lock=lock, wakeup=wakeup)
+    pwm = PWM_hat(config_file, **pwm_kwargs)
+    slot.set_flag(READY_FLAG_OFFSET, 1)
+
+    applied_seq = 0
+    applied = skipped = 0
+    latency_sum = latency_sq_sum = latency_max = last_latency = 0.0
+
+    try:
+        while not slot.get_flag(STOP_FLAG_OFFSET):
+            command = slot.read(applied_seq)
+            if command is None:
+                slot.wait(poll_interval)
+                continue
+
+            seq, timestamp, values = command
+            # The writer advances seq by 1 per command, anything more was overwritten before we saw it
+            if applied_seq and seq > applied_seq + 1:
+                skipped += seq - applied_seq - 1
+            applied_seq = seq
+
+            try:
+                pwm.update_values(values)
+            except ValueError as e:
+                print(f"Actuator process: {e}")
+
+            last_latency = time.monotonic() - timestamp
+            applied += 1
+            latency_sum += last_latency
+            latency_sq_sum += last_latency * last_latency
+            if last_latency > latency_max:
+                latency_max = last_latency
+            slot.write_status(applied_seq, applied, skipped, latency_sum, latency_sq_sum, latency_max, last_latency)
+    finally:
+        pwm.stop_monitoring()
+        pwm.reset()
+        slot.close()
+
+
+class PWM_process:
+    def __init__(self, config_file: str, poll_interval: float = 0.05, start_timeout: float = 30.0,
+                 **pwm_kwargs) -> None:
+        """
+        Start PWM_hat in a separate process.
+
+        :param config_file: PWM configuration file, passed to PWM_hat.
+        :param poll_interval: Longest time the actuator waits for a command before it checks the stop flag
+                              (seconds). Commands wake it at once.
+        :param start_timeout: How long to wait for the actuator to initialize.
+        :param pwm_kwargs: Other PWM_hat arguments (simulation_mode, input_rate_threshold, deadzone, ...).
+        """
+        self.slot = SharedCommandSlot(create=True)
+        self.process = multiprocessing.Process(
+            target=_actuator_main,
+            args=(self.slot.name, self.slot.lock, self.slot.wakeup, config_file, pwm_kwargs, poll_interval),
+            daemon=True,
+        )
+        self.process.start()
+
+        deadline = time.monotonic() + start_timeout
+        while not self.slot.get_flag(READY_FLAG_OFFSET):
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError("Actuator process failed to start")
+            time.sleep(0.01)
+        print(f"Actuator process running (pid {self.process.pid})")
+
+    def update_values(self, raw_values) -> None:
+        """Publish new input values to the actuator process. Never blocks."""
+        if isinstance(raw_values, (float, int)):
+            raw_values = (raw_values,)
+        self.slot.write(raw_values)
+
+    def get_stats(self) -> dict:
+        """
+        End-to-end latency (command written to update_values() done in the actuator) and jitter.
+
+        :return: Dictionary with command counts and latency mean/std/max/last in seconds.
+        """
+        applied_seq, applied, skipped, latency_sum, latency_sq_sum, latency_max, last_latency = \
+            self.slot.read_status()
+        mean = latency_sum / applied if applied else 0.0
+        variance = latency_sq_sum / applied - mean * mean if applied else 0.0
+        return {
+            'written': self.slot.seq,
+            'applied': applied,
+            'skipped': skipped,
+            'latency_mean': mean,
+            'latency_std': math.sqrt(max(0.0, variance)),
+            'latency_max': latency_max,
+            'latency_last': last_latency,
+        }
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the actuator process (it resets the outputs) and free the shared memory."""
+        if self.slot is None:
+            return
+        self.slot.set_flag(STOP_FLAG_OFFSET, 1)
+        self.slot.wakeup.release()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.slot.close()
+        self.slot = None
+        print("Stopped actuator process...")
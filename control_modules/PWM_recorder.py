@@ -0,0 +1,181 @@
+"""
+This module records the input command stream of PWM_hat to a compact binary file and replays it.
+
+Key features:
+1. Fixed-width struct-packed records: monotonic timestamp, min_cap, max_cap and the input vector
+2. Buffered writes, so recording costs one struct.pack_into() per update_values() call
+3. Recordings open as a NumPy structured array (or a list of tuples without NumPy)
+4. Replay into PWM_hat at the original timing (watchdog behaviour included) or as fast as possible
+
+File layout (little endian):
+    header:  magic b'PWMREC1\\0', num_inputs uint32, reserved uint32, start time double
+    records: timestamp double, min_cap double, max_cap double, num_inputs doubles
+
+Usage:
+1. pwm.start_recording('session.pwmrec'), drive the machine, pwm.stop_recording()
+2. CommandReplayer('session.pwmrec').replay(pwm) or .replay(pwm, realtime=False)
+"""
+
+import struct
+import time
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+MAGIC = b'PWMREC1\0'
+FILE_HEADER = struct.Struct('<8sIId')
+
+
+def record_struct(num_inputs: int) -> struct.Struct:
+    return struct.Struct(f'<ddd{num_inputs}d')
+
+
+class CommandRecorder:
+    def __init__(self, path: str, num_inputs: int, buffer_records: int = 256) -> None:
+        """
+        Open a new recording.
+
+        :param path: Output file, overwritten if it exists.
+        :param num_inputs: Length of the input vector (PWM_hat.num_inputs).
+        :param buffer_records: Records buffered in memory between file writes.
+        """
+        self.path = path
+        self.num_inputs = num_inputs
+        self.record_format = record_struct(num_inputs)
+        self.buffer = bytearray(self.record_format.size * buffer_records)
+        self.buffer_records = buffer_records
+        self.buffered = 0
+        self.records = 0
+        self.skipped = 0    # calls with a wrong number of inputs (they raise in update_values anyway)
+
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, num_inputs, 0, time.monotonic()))
+
+    def record(self, values, min_cap=-1, max_cap=1, timestamp: float = None) -> None:
+        """Append one update_values() call."""
+        if isinstance(values, (float, int)):
+            values = (values,)
+        if values is None or len(values) != self.num_inputs:
+            self.skipped += 1
+            return
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self.record_format.pack_into(self.buffer, self.buffered * self.record_format.size,
+                                     timestamp, min_cap, max_cap, *values)
+        self.buffered += 1
+        self.records += 1
+        if self.buffered == self.buffer_records:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records to the file."""
+        if self.buffered:
+            self.file.write(memoryview(self.buffer)[:self.buffered * self.record_format.size])
+            self.buffered = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        self.flush()
+        self.file.close()
+        self.file = None
+        print(f"Recorded {self.records} commands to {self.path} ({self.skipped} skipped)")
+
+
+def load_recording(path: str):
+    """
+    Read a recording.
+
+    :return: (num_inputs, records). With NumPy, records is a structured array with the fields
+             'timestamp', 'min_cap', 'max_cap' and 'inputs' (shape (n, num_inputs)).
+             Without NumPy, a list of (timestamp, min_cap, max_cap, inputs tuple).
+    """
+    with open(path, 'rb') as file:
+        magic, num_inputs, _, _ = FILE_HEADER.unpack(file.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a PWM command recording")
+
+        if NUMPY_AVAILABLE:
+            dtype = np.dtype([('timestamp', '<f8'), ('min_cap', '<f8'), ('max_cap', '<f8'),
+                              ('inputs', '<f8', (num_inputs,))])
+            return num_inputs, np.fromfile(file, dtype=dtype)
+
+        data = file.read()
+
+    record_format = record_struct(num_inputs)
+    usable = len(data) - len(data) % record_format.size   # ignore a partially written last record
+    records = [(record[0], record[1], record[2], record[3:])
+               for record in record_format.iter_unpack(memoryview(data)[:usable])]
+    return num_inputs, records
+
+
+class CommandReplayer:
+    def __init__(self, path: str) -> None:
+        """
+        Load a recording for replay.
+
+        :param path: Recording written by CommandRecorder / PWM_hat.start_recording().
+        """
+        self.path = path
+        num_inputs, records = load_recording(path)
+        self.num_inputs = num_inputs
+        # Plain Python tuples, so the replay loop does no per-call NumPy conversions
+        if NUMPY_AVAILABLE:
+            self.records = list(zip(records['timestamp'].tolist(), records['min_cap'].tolist(),
+                                    records['max_cap'].tolist(), map(tuple, records['inputs'].tolist())))
+        else:
+            self.records = records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def replay(self, pwm, realtime: bool = True, speed: float = 1.0) -> dict:
+        """
+        Feed the recorded commands into pwm.update_values().
+        Slew limited channels (max_rate, max_acceleration) follow the wall clock, so as-fast-as-possible replays
+        of those channels differ from the original session; realtime replay reproduces them.
+
+        :param pwm: PWM_hat (or anything with a compatible update_values()).
+        :param realtime: Keep the original timing between commands (scaled by speed), else run as fast as possible.
+        :param speed: Playback speed factor for realtime replay.
+        :return: Dictionary with command count, elapsed time, time per command and the largest lateness.
+        """
+        if pwm.num_inputs != self.num_inputs:
+            raise ValueError(f"Recording has {self.num_inputs} inputs, PWM_hat expects {pwm.num_inputs}")
+        if not self.records:
+            return {'commands': 0, 'elapsed': 0.0, 'time_per_command': 0.0, 'max_lateness': 0.0, 'errors': 0}
+
+        update_values = pwm.update_values
+        first_timestamp = self.records[0][0]
+        max_lateness = 0.0
+        errors = 0
+
+        start = time.monotonic()
+        for timestamp, min_cap, max_cap, values in self.records:
+            if realtime:
+                # Absolute deadlines, so sleep overshoot does not accumulate
+                delay = start + (timestamp - first_timestamp) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                elif -delay > max_lateness:
+                    max_lateness = -delay
+            try:
+                update_values(values, min_cap, max_cap)
+            except ValueError as e:
+                errors += 1
+                print(f"Replay: {e}")
+        elapsed = time.monotonic() - start
+
+        return {
+            'commands': len(self.records),
+            'elapsed': elapsed,
+            'time_per_command': elapsed / len(self.records),
+            'max_lateness': max_lateness,
+            'errors': errors,
+        }
@@ -0,0 +1,174 @@
+"""
+This module provides asyncio counterparts of ADC_hat, PWM_hat and the joystick controllers.
+
+The blocking I2C calls run in small, bounded thread pools (one thread per MCP3424 chip for the sensors, one
+thread for the PWM outputs), so a single event loop can orchestrate the joystick, the sensors, the outputs and
+anything else (networking, telemetry) without a thread per task.
+
+Key features:
+1. await adc.read_frame(): one frame of all sensors, the chips of all boards converting concurrently
+2. async for timestamp, values in adc.frames(rate): sensor frames at a fixed rate, missed ticks are skipped
+3. await pwm.commit(values) / await pwm.commit_named(snapshot): ordered output updates off the event loop
+4. AsyncJoystick: controller snapshots for the event loop (the controller keeps its own input thread)
+
+Usage:
+1. adc = AsyncADC(ADC_hat('configuration_files/ADC_config.yaml')), pwm = AsyncPWM(PWM_hat(...))
+2. Inside a coroutine: async for timestamp, values in adc.frames(50): await pwm.commit(compute(values))
+3. Call close() on the wrappers at exit (the wrapped devices are not stopped)
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False  # AsyncADC builds on the array frame API of ADC_hat
+
+
+async def _ticks(rate: float):
+    """Absolute deadlines at rate Hz; a late tick skips the missed ones instead of bursting to catch up."""
+    if rate <= 0:
+        raise ValueError("Rate must be positive.")
+    period = 1.0 / rate
+    deadline = time.monotonic()
+    while True:
+        yield deadline
+        deadline += period
+        now = time.monotonic()
+        if now > deadline:
+            deadline += int((now - deadline) / period + 1) * period
+        await asyncio.sleep(deadline - now)
+
+
+class AsyncADC:
+    def __init__(self, adc, executor: Optional[ThreadPoolExecutor] = None) -> None:
+        """
+        Wrap an ADC_hat for asyncio.
+
+        :param adc: Initialized ADC_hat.
+        :param executor: Thread pool for the blocking reads. Default: one thread per chip in use.
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for AsyncADC.")
+        self.adc = adc
+
+        # Sensors grouped per chip: a chip converts one channel at a time, different chips in parallel
+        groups = {}
+        for index, sensor_config in enumerate(adc.sensor_configs.values()):
+            groups.setdefault(adc.chip_of(sensor_config), []).append((index, sensor_config))
+        self.chip_groups = list(groups.values())
+
+        self.own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max(1, len(self.chip_groups)),
+                                                       thread_name_prefix='adc')
+        self.voltages = np.empty(len(adc.sensor_names))
+        self.lock = None    # created in the event loop, see read_frame()
+        self.frames_read = 0
+
+    @property
+    def sensor_names(self):
+        return self.adc.sensor_names
+
+    async def read_frame(self, out=None, timestamps=None):
+        """
+        Read all sensors, see ADC_hat.read_frame(). Frames are read one at a time.
+
+        :param out: Optional float64 array of len(sensor_names) to fill.
+        :param timestamps: Optional float64 array of len(sensor_names) for the acquisition time of each sensor.
+        :return: (timestamp, values), timestamp is time.monotonic() after the last conversion.
+        """
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            voltages = self.voltages
+            read = self.adc.read_frame_voltages
+            await asyncio.gather(*(loop.run_in_executor(self.executor, read, group, voltages, timestamps)
+                                   for group in self.chip_groups))
+            self.frames_read += 1
+            return self.adc.finish_frame(time.monotonic(), voltages, out)
+
+    async def frames(self, rate: Optional[float] = None):
+        """
+        Asynchronous iterator of sensor frames.
+
+        :param rate: Frames per second. None reads back to back, paced by the ADC conversion time.
+        :return: Yields (timestamp, values), a new values array per frame.
+        """
+        if rate is None:
+            while True:
+                yield await self.read_frame()
+        else:
+            async for _ in _ticks(rate):
+                yield await self.read_frame()
+
+    def close(self) -> None:
+        """Shut down the thread pool (if created here). The ADC_hat itself is left as is."""
+        if self.own_executor:
+            self.executor.shutdown(wait=True)
+
+
+class AsyncPWM:
+    def __init__(self, pwm, executor: Optional[ThreadPoolExecutor] = None) -> None:
+        """
+        Wrap a PWM_hat for asyncio.
+
+        :param pwm: Initialized PWM_hat.
+        :param executor: Thread pool for the output writes. Default: a single thread, so commits stay in order.
+        """
+        self.pwm = pwm
+        self.own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='pwm')
+        self.commits = 0
+
+    @property
+    def num_inputs(self) -> int:
+        return self.pwm.num_inputs
+
+    async def commit(self, values, min_cap=-1, max_cap=1):
+        """Run pwm.update_values(values) off the event loop. Raises the ValueErrors of update_values()."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.pwm.update_values, values, min_cap, max_cap)
+        self.commits += 1
+
+    async def commit_named(self, snapshot, min_cap=-1, max_cap=1):
+        """Run pwm.update_named(snapshot) off the event loop, see PWM_hat.bind_inputs()."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.pwm.update_named, snapshot, min_cap, max_cap)
+        self.commits += 1
+
+    async def reset(self, reset_pump=True):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.pwm.reset, reset_pump)
+
+    def close(self) -> None:
+        """Shut down the thread pool (if created here) after the pending commits."""
+        if self.own_executor:
+            self.executor.shutdown(wait=True)
+
+
+class AsyncJoystick:
+    def __init__(self, controller) -> None:
+        """
+        Wrap a joystick_module / joystick_evdev XboxController for asyncio.
+        The controller already decodes its input events in its own thread; read() only copies the current
+        state, so it is called directly on the event loop.
+
+        :param controller: XboxController instance.
+        """
+        self.controller = controller
+
+    async def read(self) -> dict:
+        return self.controller.read()
+
+    async def states(self, rate: float):
+        """Asynchronous iterator of controller snapshots at rate Hz."""
+        async for _ in _ticks(rate):
+            yield self.controller.read()
+
+    def is_connected(self) -> bool:
+        return self.controller.is_connected()
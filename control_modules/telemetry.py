@@ -0,0 +1,379 @@
+"""
+This module publishes telemetry frames (ADC_hat sensor frames, PWM_hat committed outputs) over a local UDP or
+Unix domain datagram socket, in a fixed binary layout, and receives them again.
+
+A frame is a monotonic timestamp plus a fixed number of float32 values. Frames of one stream are batched into a
+datagram until it is full or the oldest frame is max_latency old, so a 500+ Hz stream costs a struct.pack_into()
+per frame and a send every few frames. A flush thread sends batches that reach max_latency while their stream
+is idle, e.g. the last frame before the source stops. Sending never blocks: with nobody listening, or a full
+socket buffer, the datagram is dropped and counted.
+
+Key features:
+1. Fixed-layout datagrams: header (magic, version, stream id, frame count, channel count, first sequence
+   number) followed by frames of timestamp double + channel float32 values
+2. Per-stream frame sequence numbers, so a subscriber counts lost frames
+3. Schema datagrams (stream names and channel names as JSON), repeated periodically for late subscribers
+4. UDP (('host', port)) or Unix domain datagram socket ('/path/to/socket') addresses
+5. TelemetrySubscriber decodes the datagrams, without NumPy
+
+Datagram layout (little endian):
+    header:  magic b'MTEL', version uint8, stream id uint8, frames uint16, channels uint16, flags uint16,
+             first sequence uint64
+    stream id 0 (schema): UTF-8 JSON {"streams": {"<id>": {"name": ..., "channels": [...]}}}
+    stream id 1..255 (data): frames x (timestamp double, channels x float32); frame i has sequence first + i
+
+Usage:
+1. publisher = TelemetryPublisher(('127.0.0.1', 5005))
+2. adc.start_telemetry(publisher), pwm.start_telemetry(publisher): every read_frame() / committed output frame
+   is published. Or stream = publisher.stream('name', channels), stream.publish(timestamp, values)
+3. On the monitoring side: python -m misc.telemetry_subscriber 5005
+"""
+
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+MAGIC = b'MTEL'
+VERSION = 1
+HEADER = struct.Struct('<4sBBHHHQ')
+TIMESTAMP = struct.Struct('<d')
+SCHEMA_STREAM = 0
+MAX_STREAMS = 255
+
+
+def frame_struct(channels: int) -> struct.Struct:
+    return struct.Struct(f'<d{channels}f')
+
+
+def _socket_family(address):
+    """Unix domain socket for a path, UDP for a (host, port) tuple."""
+    if isinstance(address, str):
+        return socket.AF_UNIX
+    return socket.AF_INET
+
+
+class TelemetryStream:
+    def __init__(self, publisher: 'TelemetryPublisher', stream_id: int, name: str, channels: List[str],
+                 max_frames: int) -> None:
+        """Frames of one source, batched into datagrams. Created by TelemetryPublisher.stream()."""
+        self.publisher = publisher
+        self.stream_id = stream_id
+        self.name = name
+        self.channels = list(channels)
+        self.frame_format = frame_struct(len(self.channels))
+        self.max_frames = max_frames
+        self.buffer = bytearray(HEADER.size + self.frame_format.size * max_frames)
+        self.buffered = 0
+        self.batch_start = 0.0
+        self.sequence = 0       # sequence number of the next frame
+        self.frames = 0
+        self.lock = threading.Lock()    # the publisher's flush thread sends idle batches
+
+    def publish(self, timestamp: float, values) -> None:
+        """
+        Add one frame, sending the batch when it is full or its oldest frame is max_latency old.
+
+        :param timestamp: time.monotonic() of the frame.
+        :param values: One value per channel (NaN allowed).
+        """
+        self._check(values)
+        with self.lock:
+            self.frame_format.pack_into(self.buffer, self._frame_offset(), timestamp, *values)
+            self._frame_added()
+
+    def publish_array(self, timestamp: float, values) -> None:
+        """
+        Add one frame from a float array, see publish(). The values are copied into the datagram as float32
+        bytes, without a Python float per channel.
+
+        :param timestamp: time.monotonic() of the frame.
+        :param values: NumPy array, one value per channel (NaN allowed).
+        """
+        self._check(values)
+        with self.lock:
+            offset = self._frame_offset()
+            TIMESTAMP.pack_into(self.buffer, offset, timestamp)
+            offset += TIMESTAMP.size
+            self.buffer[offset:offset + self.frame_format.size - TIMESTAMP.size] = values.astype('<f4').tobytes()
+            self._frame_added()
+
+    def _check(self, values) -> None:
+        if len(values) != len(self.channels):
+            raise ValueError(f"Telemetry stream '{self.name}' expects {len(self.channels)} values, "
+                             f"got {len(values)}.")
+
+    def _frame_offset(self) -> int:
+        if not self.buffered:
+            self.batch_start = time.monotonic()
+        return HEADER.size + self.buffered * self.frame_format.size
+
+    def _frame_added(self) -> None:
+        self.buffered += 1
+        self.frames += 1
+        if (self.buffered == self.max_frames
+                or time.monotonic() - self.batch_start >= self.publisher.max_latency):
+            self._flush()
+        elif self.buffered == 1:
+            # New batch, the flush thread sends it if no frame follows within max_latency
+            self.publisher.batch_started()
+
+    def flush(self) -> None:
+        """Send the buffered frames now."""
+        with self.lock:
+            self._flush()
+
+    def flush_expired(self, now: float) -> Optional[float]:
+        """Send the batch if it is max_latency old. Returns when the pending batch is due, None if nothing is."""
+        with self.lock:
+            if not self.buffered:
+                return None
+            due = self.batch_start + self.publisher.max_latency
+            if now < due:
+                return due
+            self._flush()
+            return None
+
+    def _flush(self) -> None:
+        if not self.buffered:
+            return
+        HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.stream_id, self.buffered, len(self.channels), 0,
+                         self.sequence)
+        self.publisher.send(memoryview(self.buffer)[:HEADER.size + self.buffered * self.frame_format.size])
+        self.sequence += self.buffered
+        self.buffered = 0
+
+
+class TelemetryPublisher:
+    def __init__(self, address, max_datagram: int = 1400, max_latency: float = 0.02,
+                 schema_interval: float = 1.0) -> None:
+        """
+        Open the publishing socket.
+
+        :param address: ('host', port) for UDP, or the path of a Unix domain datagram socket.
+        :param max_datagram: Largest datagram in bytes. 1400 stays below the Ethernet MTU, so a UDP stream
+                             forwarded off the machine is not fragmented; local sockets allow much more.
+        :param max_latency: Longest time a frame waits in a batch, in seconds. 0 sends every frame on its own.
+        :param schema_interval: Seconds between repeated schema datagrams.
+        """
+        self.address = address
+        self.max_datagram = max_datagram
+        self.max_latency = max_latency
+        self.schema_interval = schema_interval
+
+        self.socket = socket.socket(_socket_family(address), socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.lock = threading.Lock()    # streams may publish from different threads
+        self.streams: Dict[int, TelemetryStream] = {}
+        self.last_schema = None
+
+        self.datagrams_sent = 0
+        self.datagrams_dropped = 0
+        self.bytes_sent = 0
+
+        # Sends batches whose stream went idle before they were full or max_latency old
+        self.flush_event = threading.Event()
+        self.flush_thread = None
+        self.closing = False
+        if max_latency > 0:
+            self.flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self.flush_thread.start()
+
+    def stream(self, name: str, channels: List[str]) -> TelemetryStream:
+        """
+        Register a stream of frames.
+
+        :param name: Stream name, e.g. 'sensors'.
+        :param channels: Channel names, the values of every frame are in this order.
+        :return: TelemetryStream, call its publish(timestamp, values).
+        """
+        if len(self.streams) >= MAX_STREAMS:
+            raise ValueError(f"At most {MAX_STREAMS} telemetry streams.")
+        frame_size = frame_struct(len(channels)).size
+        max_frames = min(65535, (self.max_datagram - HEADER.size) // frame_size)
+        if max_frames < 1:
+            raise ValueError(f"A frame of {len(channels)} channels does not fit in {self.max_datagram} bytes.")
+        if self.max_latency <= 0:
+            max_frames = 1
+
+        stream = TelemetryStream(self, len(self.streams) + 1, name, channels, max_frames)
+        self.streams[stream.stream_id] = stream
+        self.send_schema()
+        return stream
+
+    def send_schema(self) -> None:
+        """Send the names of all streams and their channels."""
+        schema = {'streams': {str(stream_id): {'name': stream.name, 'channels': stream.channels}
+                              for stream_id, stream in self.streams.items()}}
+        payload = json.dumps(schema).encode()
+        self.last_schema = time.monotonic()
+        self._send(HEADER.pack(MAGIC, VERSION, SCHEMA_STREAM, 0, 0, 0, 0) + payload)
+
+    def send(self, datagram) -> None:
+        """Send a data datagram, repeating the schema every schema_interval seconds."""
+        if time.monotonic() - self.last_schema >= self.schema_interval:
+            self.send_schema()
+        self._send(datagram)
+
+    def _send(self, datagram) -> None:
+        with self.lock:
+            try:
+                self.socket.sendto(datagram, self.address)
+            except OSError:
+                # Nobody listening (Unix socket) or socket buffer full: telemetry never blocks the control loop
+                self.datagrams_dropped += 1
+                return
+            self.datagrams_sent += 1
+            self.bytes_sent += len(datagram)
+
+    def flush(self) -> None:
+        """Send the partial batches of all streams."""
+        for stream in list(self.streams.values()):
+            stream.flush()
+
+    def batch_started(self) -> None:
+        """Wake the flush thread for a new batch, called by the streams."""
+        if not self.flush_event.is_set():
+            self.flush_event.set()
+
+    def _flush_loop(self) -> None:
+        """Sleep until the oldest pending batch is max_latency old and send it, or until a batch starts."""
+        while not self.closing:
+            self.flush_event.clear()
+            now = time.monotonic()
+            next_due = None
+            for stream in list(self.streams.values()):
+                due = stream.flush_expired(now)
+                if due is not None and (next_due is None or due < next_due):
+                    next_due = due
+            # Batches started after the scan set the event, a later batch is never due before next_due
+            self.flush_event.wait(None if next_due is None else next_due - now)
+
+    def get_stats(self) -> dict:
+        return {
+            'streams': len(self.streams),
+            'frames': sum(stream.frames for stream in self.streams.values()),
+            'datagrams_sent': self.datagrams_sent,
+            'datagrams_dropped': self.datagrams_dropped,
+            'bytes_sent': self.bytes_sent,
+        }
+
+    def close(self) -> None:
+        if self.socket is None:
+            return
+        if self.flush_thread is not None:
+            self.closing = True
+            self.flush_event.set()
+            self.flush_thread.join()
+            self.flush_thread = None
+        self.flush()
+        self.socket.close()
+        self.socket = None
+
+
+def decode_datagram(data: bytes):
+    """
+    Decode one datagram.
+
+    :return: (stream id, first sequence, frames). frames is a list of (timestamp, values tuple) for data
+             datagrams, the schema dictionary for schema datagrams (stream id 0).
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Datagram shorter than the telemetry header")
+    magic, version, stream_id, count, channels, _, first_sequence = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a telemetry datagram")
+    if version != VERSION:
+        raise ValueError(f"Unsupported telemetry version {version}")
+
+    if stream_id == SCHEMA_STREAM:
+        return stream_id, first_sequence, json.loads(bytes(data[HEADER.size:]))
+
+    frame_format = frame_struct(channels)
+    if len(data) != HEADER.size + count * frame_format.size:
+        raise ValueError(f"Telemetry datagram of stream {stream_id} has the wrong size")
+    frames = [(frame[0], frame[1:]) for frame in frame_format.iter_unpack(memoryview(data)[HEADER.size:])]
+    return stream_id, first_sequence, frames
+
+
+class TelemetrySubscriber:
+    def __init__(self, address, receive_buffer: int = 1 << 20) -> None:
+        """
+        Bind a socket and receive telemetry.
+
+        :param address: ('host', port) for UDP (port 0 picks a free port, see self.address), or the path of a
+                        Unix domain datagram socket (an existing socket file there is replaced).
+        :param receive_buffer: Socket receive buffer size, absorbs bursts while the subscriber is busy.
+        """
+        family = _socket_family(address)
+        self.socket = socket.socket(family, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.remove(address)
+        self.socket.bind(address)
+        self.address = self.socket.getsockname()
+        self.unix_path = address if family == socket.AF_UNIX else None
+
+        self.names: Dict[int, str] = {}
+        self.channels: Dict[int, List[str]] = {}
+        self.next_sequence: Dict[int, int] = {}
+        self.frames: Dict[int, int] = {}
+        self.lost: Dict[int, int] = {}
+        self.datagrams = 0
+        self.errors = 0
+
+    def receive(self, timeout: Optional[float] = None) -> list:
+        """
+        Wait for one datagram.
+
+        :param timeout: Seconds to wait, None waits forever.
+        :return: List of (stream name, sequence, timestamp, values) frames, empty on timeout or for a
+                 schema datagram.
+        """
+        self.socket.settimeout(timeout)
+        try:
+            data = self.socket.recv(65536)
+        except socket.timeout:
+            return []
+        self.datagrams += 1
+
+        try:
+            stream_id, first_sequence, frames = decode_datagram(data)
+        except ValueError as e:
+            self.errors += 1
+            print(f"Telemetry: {e}")
+            return []
+
+        if stream_id == SCHEMA_STREAM:
+            for key, stream in frames['streams'].items():
+                self.names[int(key)] = stream['name']
+                self.channels[int(key)] = stream['channels']
+            return []
+
+        expected = self.next_sequence.get(stream_id)
+        if expected is not None and first_sequence > expected:
+            self.lost[stream_id] = self.lost.get(stream_id, 0) + first_sequence - expected
+        self.next_sequence[stream_id] = first_sequence + len(frames)
+        self.frames[stream_id] = self.frames.get(stream_id, 0) + len(frames)
+
+        name = self.names.get(stream_id, f"stream{stream_id}")
+        return [(name, first_sequence + index, timestamp, values)
+                for index, (timestamp, values) in enumerate(frames)]
+
+    def get_stats(self) -> dict:
+        """Frames received and lost (sequence gaps) per stream name."""
+        return {self.names.get(stream_id, f"stream{stream_id}"): {'frames': frames,
+                                                                  'lost': self.lost.get(stream_id, 0)}
+                for stream_id, frames in self.frames.items()}
+
+    def close(self) -> None:
+        if self.socket is None:
+            return
+        self.socket.close()
+        self.socket = None
+        if self.unix_path and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
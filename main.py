@@ -10,6 +10,17 @@ from time import sleep
 def main(pwm, controller):
     step = 0
 
+    # map the joystick values to the servo controller, once. Input i of the configuration file is driven by
+    # the i-th name, these need to match with the ones set in the configuration file
+    pwm.bind_input_order([
+        'RightJoystickX',  # scoop, index 0
+        'LeftJoystickY',   # lift boom, index 1
+        'LeftJoystickX',   # rotate cabin, index 2
+        'RightJoystickY',  # tilt boom, index 3
+        'RightTrigger',    # track R, index 4
+        'LeftTrigger',     # track L, index 5
+    ])
+
     pwm.print_input_mappings()
     sleep(5)
 
@@ -53,21 +64,9 @@ def main(pwm, controller):
 
 
 
-            # map the joystick values to the servo controller
-            # these need to match with the ones set in the configuration file
-            controller_list = [
-                joy_values['RightJoystickX'], # scoop, index 0
-                joy_values['LeftJoystickY'],  # lift boom, index 1
-                joy_values['LeftJoystickX'],  # rotate cabin, index 2
-                joy_values['RightJoystickY'],  # tilt boom, index 3
-                joy_values['RightTrigger'],    # track R, index 4
-                joy_values['LeftTrigger'],   # track L, index 5
-            ]
-
             #print(f"giving input: {joy_values['LeftJoystickX']}")
-            print(controller_list)
-            # update the servo controller with the new values
-            pwm.update_values(controller_list)
+            # update the servo controller with the new values, mapped by the binding set in main()
+            pwm.update_named(joy_values)
 
             # print every 20 steps
             if step % 20 == 0:
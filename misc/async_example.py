@@ -0,0 +1,75 @@
+# One asyncio event loop running the sensors, the outputs and a status printer concurrently:
+# frames are read at SENSOR_RATE, a control task commits outputs at CONTROL_RATE from the latest frame.
+# Runs against ADCPiStub (with conversion time) and ServoKitStub, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.async_example
+
+import asyncio
+import contextlib
+import io
+import math
+import time
+
+from control_modules.ADC_sensors import ADC_hat
+from control_modules.PWM_controller import PWM_hat
+from control_modules.async_devices import AsyncADC, AsyncPWM
+
+
+ADC_CONFIG_FILE = 'configuration_files/ADC_config.yaml'
+PWM_CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+SENSOR_RATE = 20    # Hz
+CONTROL_RATE = 100  # Hz
+DURATION = 3.0      # s
+
+
+async def sensor_task(adc, state):
+    async for timestamp, values in adc.frames(SENSOR_RATE):
+        state['frame'] = (timestamp, values)
+
+
+async def control_task(pwm, state):
+    period = 1.0 / CONTROL_RATE
+    start = deadline = time.monotonic()
+    while True:
+        # Stand-in control law: the outputs follow a slow sine wave
+        t = time.monotonic() - start
+        await pwm.commit([0.5 * math.sin(2 * math.pi * 0.5 * t)] * pwm.num_inputs)
+        lateness = time.monotonic() - deadline
+        state['max_lateness'] = max(state['max_lateness'], lateness)
+        deadline += period
+        await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+
+
+async def status_task(adc, pwm, state):
+    while True:
+        await asyncio.sleep(1.0)
+        timestamp, values = state['frame'] or (None, [])
+        print(f"{adc.frames_read} frames, {pwm.commits} commits, "
+              f"first sensor {values[0] if len(values) else float('nan'):.1f}")
+
+
+async def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        adc = AsyncADC(ADC_hat(ADC_CONFIG_FILE, simulation_mode=True, simulate_conversion_time=True))
+        pwm = AsyncPWM(PWM_hat(config_file=PWM_CONFIG_FILE, simulation_mode=True, input_rate_threshold=0,
+                               record_simulation=True))
+    state = {'frame': None, 'max_lateness': 0.0}
+
+    tasks = [asyncio.create_task(sensor_task(adc, state)),
+             asyncio.create_task(control_task(pwm, state)),
+             asyncio.create_task(status_task(adc, pwm, state))]
+    await asyncio.sleep(DURATION)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    adc.close()
+    pwm.close()
+
+    print(f"sensors: {adc.frames_read / DURATION:.1f} frames/s ({len(adc.chip_groups)} chip worker(s)), "
+          f"outputs: {pwm.commits / DURATION:.1f} commits/s, "
+          f"max control tick lateness {state['max_lateness'] * 1e3:.2f}ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
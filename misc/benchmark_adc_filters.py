@@ -0,0 +1,54 @@
+# Checks and times the streaming filters of ADC_filters: a decimate -> moving_average chain must only pass the
+# published block values on, then the cost of update() per sample for each filter type and the chain.
+#
+# run from the repository root:
+#   python -m misc.benchmark_adc_filters
+
+import random
+import time
+
+from control_modules.ADC_filters import FILTER_TYPES, create_filter
+
+
+SETTINGS = {
+    'low_pass': {'alpha': 0.5},
+    'kalman': {'Q': 1e-5, 'R': 0.01, 'P': 1.0},
+    'median': {'window': 5},
+    'hampel': {'window': 7},
+    'moving_average': {'window': 2},
+    'decimate': {'factor': 4},
+}
+SAMPLES = 100000
+
+
+def decimation_chain_check():
+    """decimate(4) -> moving_average(2) over 0..11: blocks 1.5, 5.5, 9.5 averaged pairwise, nothing in between."""
+    chain = create_filter(['decimate', 'moving_average'], SETTINGS)
+    outputs = []
+    for sample in range(12):
+        value = chain.update(float(sample))
+        if chain.updated:
+            outputs.append(value)
+        else:
+            # Held samples return the previous chain output (or the sample itself before the first block)
+            assert value == (outputs[-1] if outputs else sample), (sample, value)
+    assert outputs == [1.5, 3.5, 7.5], outputs
+    print(f"decimate 4 -> moving_average 2 over 0..11: {outputs}")
+
+
+def update_cost():
+    samples = [random.gauss(1.0, 0.05) for _ in range(SAMPLES)]
+    for filter_type in [*FILTER_TYPES, ['decimate', 'moving_average']]:
+        sensor_filter = create_filter(filter_type, SETTINGS)
+        update = sensor_filter.update
+        start = time.perf_counter()
+        for sample in samples:
+            update(sample)
+        cost = (time.perf_counter() - start) / SAMPLES
+        label = ' -> '.join(filter_type) if isinstance(filter_type, list) else filter_type
+        print(f"{label:28s} {cost * 1e9:6.0f} ns/sample")
+
+
+if __name__ == '__main__':
+    decimation_chain_check()
+    update_cost()
@@ -0,0 +1,65 @@
+# Aggregate ADC sampling rate versus number of ADCPi boards: sequential sampling vs. one worker per MCP3424 chip.
+# Runs against ADCPiStub with simulated conversion time (1 / SPS of the configured bit rate), no hardware needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_adc_parallel
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import yaml
+
+from control_modules.ADC_sensors import ADC_hat
+
+
+CONFIG_FILE = 'configuration_files/ADC_config.yaml'
+BIT_RATE = 12       # 240 SPS per chip
+DURATION = 2.0      # s
+MAX_BOARDS = 4
+
+
+def make_config(boards):
+    configs = yaml.safe_load(open(CONFIG_FILE))
+    configs['ADC_CONFIG']['bit_rate'] = BIT_RATE
+    configs['ADC_CONFIG']['i2c_addresses'] = {f"b{board + 1}": [0x68 + 2 * board, 0x69 + 2 * board]
+                                              for board in range(boards)}
+    # Fully populated boards: 8 pressure sensors each, 4 per chip
+    configs['PRESSURE_SENSORS'] = {f"b{board + 1} pressure{channel}": {'input': [f"b{board + 1}", channel],
+                                                                       'calibration_value': 1.0}
+                                   for board in range(boards) for channel in range(1, 9)}
+    configs['ANGLE_SENSORS'] = {}
+    file = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    yaml.safe_dump(configs, file)
+    file.close()
+    return file.name
+
+
+def measure(config_file, parallel):
+    with contextlib.redirect_stdout(io.StringIO()):
+        adc = ADC_hat(config_file, simulation_mode=True, simulate_conversion_time=True)
+        adc.start_sampling(parallel=parallel)
+        time.sleep(DURATION)
+        stats = adc.get_sampling_stats()
+        adc.stop_sampling()
+    return stats
+
+
+def main():
+    print(f"bit rate {BIT_RATE} ({ADC_hat.SAMPLES_PER_SECOND[BIT_RATE]} SPS per chip), 8 sensors per board")
+    for boards in range(1, MAX_BOARDS + 1):
+        config_file = make_config(boards)
+        try:
+            sequential = measure(config_file, parallel=False)
+            parallel = measure(config_file, parallel=True)
+        finally:
+            os.remove(config_file)
+        print(f"{boards} board(s): sequential {sequential['sample_rate']:7.1f} samples/s, "
+              f"parallel ({parallel['workers']} workers) {parallel['sample_rate']:7.1f} samples/s, "
+              f"speedup {parallel['sample_rate'] / sequential['sample_rate']:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# Allocation benchmark (tracemalloc) of the per-tick input path:
+# old: build a controller_list from the controller snapshot and call update_values()
+# new: bind_inputs() once, then pass the snapshot to update_named()
+# Also traces the bytecode and builtin calls of both paths and asserts that update_named() builds no list, dict,
+# tuple or other container per tick (the remaining allocations are the frame's floats and ints).
+# Runs against RecordingServoKitStub, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_named_inputs
+
+import contextlib
+import dis
+import io
+import random
+import sys
+import time
+import tracemalloc
+
+from control_modules import PWM_controller
+
+
+CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+TICKS = 2000
+TRACED_TICKS = 100
+
+# Instructions and builtins that create a container
+CONTAINER_OPCODES = {'BUILD_LIST', 'BUILD_MAP', 'BUILD_TUPLE', 'BUILD_SET', 'BUILD_CONST_KEY_MAP', 'BUILD_SLICE',
+                     'LIST_APPEND', 'LIST_EXTEND', 'MAP_ADD', 'SET_ADD', 'DICT_UPDATE', 'DICT_MERGE', 'MAKE_FUNCTION'}
+CONTAINER_BUILTINS = {'dict', 'list', 'tuple', 'set', 'frozenset', 'sorted', 'zip', 'enumerate', 'map', 'filter',
+                      'copy', 'tolist', 'items', 'keys', 'values'}
+
+BINDING = {
+    'scoop': 'RightJoystickX',
+    'lift_boom': 'LeftJoystickY',
+    'tool2': 'DPadX',
+    'rotate': 'LeftJoystickX',
+    'tilt_boom': 'RightJoystickY',
+    'tool1': 'DPadY',
+    'trackR': 'RightTrigger',
+    'trackL': 'LeftTrigger',
+}
+
+
+def old_tick(pwm, snapshot):
+    controller_list = [
+        snapshot['RightJoystickX'],  # index 0
+        snapshot['LeftJoystickY'],   # index 1
+        snapshot['DPadX'],           # index 2
+        snapshot['LeftJoystickX'],   # index 3
+        snapshot['RightJoystickY'],  # index 4
+        snapshot['DPadY'],           # index 5
+        snapshot['RightTrigger'],    # index 6
+        snapshot['LeftTrigger'],     # index 7
+    ]
+    pwm.update_values(controller_list)
+
+
+def new_tick(pwm, snapshot):
+    pwm.update_named(snapshot)
+
+
+def measure(name, tick, pwm, snapshots):
+    # Transient allocations per tick: peak traced memory during the tick above what was traced before it
+    peaks = []
+    tracemalloc.start()
+    for snapshot in snapshots:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        tick(pwm, snapshot)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        tick(pwm, snapshot)
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:28s} peak {sum(peaks) / len(peaks):7.1f} B/tick (max {max(peaks)} B), "
+          f"{elapsed / len(snapshots) * 1e6:6.2f} us/tick")
+
+
+def containers_built(tick, pwm, snapshots):
+    """
+    Run the ticks with opcode tracing and a profile hook, and collect every container-building instruction or
+    builtin call as (function name, instruction or builtin).
+    """
+    found = []
+
+    def trace(frame, event, arg):
+        if event == 'call':
+            frame.f_trace_opcodes = True
+        elif event == 'opcode':
+            opname = dis.opname[frame.f_code.co_code[frame.f_lasti]]
+            if opname in CONTAINER_OPCODES:
+                found.append((frame.f_code.co_name, opname))
+        return trace
+
+    def profile(frame, event, arg):
+        if event == 'c_call' and arg.__name__ in CONTAINER_BUILTINS:
+            found.append((frame.f_code.co_name, arg.__name__ + '()'))
+
+    for snapshot in snapshots:
+        sys.settrace(trace)
+        sys.setprofile(profile)
+        try:
+            tick(pwm, snapshot)
+        finally:
+            sys.setprofile(None)
+            sys.settrace(None)
+    return found
+
+
+def main():
+    random.seed(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pwm = PWM_controller.PWM_hat(config_file=CONFIG_FILE, simulation_mode=True, input_rate_threshold=0,
+                                     record_simulation=True)
+    pwm.bind_inputs(BINDING)
+
+    names = set(BINDING.values())
+    snapshots = [{name: random.uniform(-1, 1) for name in names} for _ in range(TICKS)]
+
+    # Same inputs must give the same angles
+    old_tick(pwm, snapshots[0])
+    old_angles = dict(pwm.servo_angles)
+    new_tick(pwm, snapshots[0])
+    assert pwm.servo_angles == old_angles
+
+    measure("old: list + update_values", old_tick, pwm, snapshots)
+    measure("new: update_named", new_tick, pwm, snapshots)
+
+    traced = snapshots[:TRACED_TICKS]
+    old_containers = containers_built(old_tick, pwm, traced)
+    new_containers = containers_built(new_tick, pwm, traced)
+    print(f"containers built per tick: old {len(old_containers) / len(traced):.1f} "
+          f"({', '.join(sorted(set(f'{name}: {what}' for name, what in old_containers)))}), "
+          f"new {len(new_containers) / len(traced):.1f}")
+    assert not new_containers, f"update_named() built containers: {sorted(set(new_containers))}"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Compares I2C traffic of per-channel PCA9685 writes (what ServoKit does) against the burst backend.
+# Runs against FakeSMBus, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_pca9685_burst
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+import yaml
+
+from control_modules import PWM_controller
+from control_modules.PCA9685_driver import FakeSMBus
+
+
+CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+FRAMES = 5000
+
+
+class PerChannelWriter(PWM_controller.BurstOutputWriter):
+    """One transaction per written channel, like a ServoKit property write."""
+
+    def flush(self):
+        for channel, ticks in self.pending.items():
+            self.kit.write_channel(channel, ticks)
+        self.pending = {}
+
+
+def make_pwm(bus, writer_class=None, suppress=True, config_file=CONFIG_FILE):
+    with contextlib.redirect_stdout(io.StringIO()):
+        pwm = PWM_controller.PWM_hat(config_file=config_file, simulation_mode=True, input_rate_threshold=0,
+                                     output_backend='pca9685', i2c_bus=bus, suppress_unchanged_writes=suppress)
+    if writer_class is not None:
+        pwm.output = writer_class(pwm.kit, pwm.num_outputs, enabled=suppress)
+    pwm.kit.reset_stats()
+    return pwm
+
+
+def run(name, pwm, frames):
+    start = time.perf_counter()
+    for frame in frames:
+        pwm.update_values(frame)
+    elapsed = time.perf_counter() - start
+    print(f"{name:32s} {pwm.kit.transactions / len(frames):6.2f} transactions/frame "
+          f"{pwm.kit.bytes_written / len(frames):7.2f} bytes/frame {elapsed / len(frames) * 1e6:7.2f} us/frame")
+
+
+def main():
+    random.seed(1)
+    num_inputs = make_pwm(FakeSMBus()).num_inputs
+
+    # Half the session moving sticks, half idle (centered), which is typical for a digging cycle
+    moving = [[random.uniform(-1, 1) for _ in range(num_inputs)] for _ in range(FRAMES // 2)]
+    idle = [[0.0] * num_inputs for _ in range(FRAMES // 2)]
+    frames = moving + idle
+
+    buses = {'per_channel': FakeSMBus(), 'burst': FakeSMBus(), 'burst_suppressed': FakeSMBus()}
+    run("per-channel, every tick (ServoKit)", make_pwm(buses['per_channel'], PerChannelWriter, suppress=False), frames)
+    run("burst, every tick", make_pwm(buses['burst'], suppress=False), frames)
+    run("burst, changed channels only", make_pwm(buses['burst_suppressed']), frames)
+
+    # All three must leave the chip in the same state
+    registers = [bytes(bus.registers[0x40]) for bus in buses.values()]
+    assert registers[0] == registers[1] == registers[2]
+    print("register files match")
+
+    # Two boards, 24 angle channels + pump: one burst per board instead of 25 transactions
+    configs = yaml.safe_load(open(CONFIG_FILE))
+    template = configs['CHANNEL_CONFIGS']['scoop']
+    configs['PWM_BOARDS'] = {'b1': 0x40, 'b2': 0x41}
+    configs['CHANNEL_CONFIGS'] = {'pump': configs['CHANNEL_CONFIGS']['pump']}
+    # b1 channel 9 stays with the pump
+    outputs = [['b1', channel] for channel in range(16) if channel != 9] + [['b2', channel] for channel in range(9)]
+    for i, output_channel in enumerate(outputs):
+        configs['CHANNEL_CONFIGS'][f"servo{i}"] = dict(template, input_channel=i, output_channel=output_channel)
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as file:
+        yaml.safe_dump(configs, file)
+    try:
+        frames = [[random.uniform(-1, 1) for _ in range(len(outputs))] for _ in range(FRAMES // 2)]
+        run("2 boards, per-channel (ServoKit)", make_pwm(FakeSMBus(), PerChannelWriter, suppress=False,
+                                                         config_file=file.name), frames)
+        run("2 boards, burst per board", make_pwm(FakeSMBus(), suppress=False, config_file=file.name), frames)
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == '__main__':
+    main()
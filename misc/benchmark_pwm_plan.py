@@ -0,0 +1,103 @@
+# Before/after benchmark for the compiled channel plan in PWM_hat.update_values.
+# Runs against RecordingServoKitStub, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_pwm_plan
+
+import contextlib
+import io
+import random
+import time
+import timeit
+
+from control_modules import PWM_controller
+
+
+CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+ROUNDS = 40000
+SAMPLE_ROUNDS = 1000
+
+
+def legacy_update_values(pwm, raw_values, min_cap=-1, max_cap=1):
+    """The per-tick path as it was before the channel plan (dict walk, .get() lookups, f-string keys)."""
+    for key in pwm.servo_angles:
+        pwm.servo_angles[key] = None
+
+    deadzone_threshold = pwm.deadzone / 100.0 * (max_cap - min_cap)
+
+    pwm.pump_variable_sum = 0.0
+    for channel_name, config in pwm.channel_configs.items():
+        input_channel = config['input_channel']
+        if input_channel is None or not isinstance(input_channel, int) or input_channel >= len(raw_values):
+            continue
+        capped_value = max(min_cap, min(raw_values[input_channel], max_cap))
+        if abs(capped_value) < deadzone_threshold:
+            capped_value = 0.0
+        pwm.values[config['output_channel']] = capped_value
+        if config.get('affects_pump', False):
+            pwm.pump_variable_sum += abs(capped_value)
+
+    pump_config = pwm.channel_configs['pump']
+    throttle_value = pump_config['idle'] + (pump_config['multiplier'] * pwm.pump_variable_sum)
+    pwm.kit.continuous_servo[pump_config['output_channel']].throttle = max(-1.0, min(1.0, throttle_value))
+
+    for channel_name, config in pwm.channel_configs.items():
+        if config['type'] == 'angle':
+            if pwm.tracks_disabled and channel_name in ['trackL', 'trackR']:
+                continue
+            output_channel = config['output_channel']
+            input_value = pwm.values[output_channel]
+            center = pwm.center_val_servo + config['offset']
+            if input_value >= 0:
+                gamma = config.get('gamma_positive', 1)
+                multiplier = config.get('multiplier_positive', 1)
+                normalized_input = input_value
+            else:
+                gamma = config.get('gamma_negative', 1)
+                multiplier = config.get('multiplier_negative', 1)
+                normalized_input = -input_value
+            adjusted_input = normalized_input ** gamma
+            gamma_corrected_value = adjusted_input if input_value >= 0 else -adjusted_input
+            angle = center + (gamma_corrected_value * multiplier * config['direction'])
+            angle = max(0, min(180, angle))
+            pwm.kit.servo[config['output_channel']].angle = angle
+            pwm.servo_angles[f"{channel_name} angle"] = round(angle, 1)
+
+
+def main():
+    random.seed(1)
+    # Quiet recording stub and no write suppression, so both paths do the same stub writes
+    with contextlib.redirect_stdout(io.StringIO()):
+        pwm = PWM_controller.PWM_hat(config_file=CONFIG_FILE, simulation_mode=True, input_rate_threshold=0,
+                                     record_simulation=True, suppress_unchanged_writes=False)
+    frames = [[random.uniform(-1, 1) for _ in range(pwm.num_inputs)] for _ in range(256)]
+
+    # Both paths must produce the same angles
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frame in frames:
+            legacy_update_values(pwm, frame)
+            legacy_angles = dict(pwm.servo_angles)
+            pwm.update_values(frame)
+            assert pwm.servo_angles == legacy_angles, (legacy_angles, pwm.servo_angles)
+
+    def run(update):
+        i = 0
+        for _ in range(SAMPLE_ROUNDS):
+            update(frames[i & 255])
+            i += 1
+
+    # Short samples of both paths interleaved, best of each, in CPU time: other load on the machine only adds time
+    before = after = float('inf')
+    for _ in range(ROUNDS // SAMPLE_ROUNDS):
+        before = min(before, timeit.timeit(lambda: run(lambda f: legacy_update_values(pwm, f)), number=1,
+                                           timer=time.process_time))
+        after = min(after, timeit.timeit(lambda: run(pwm.update_values), number=1, timer=time.process_time))
+
+    print(f"channels: {len(pwm.channel_configs)}, inputs: {pwm.num_inputs}, rounds: {ROUNDS}")
+    print(f"before (dict walk):     {before / SAMPLE_ROUNDS * 1e6:7.2f} us/update")
+    print(f"after  (channel plan):  {after / SAMPLE_ROUNDS * 1e6:7.2f} us/update")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
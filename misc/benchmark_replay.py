@@ -0,0 +1,86 @@
+# Deterministic regression run of the PWM_hat output pipeline from a recorded command stream:
+# records a synthetic session, replays it as fast as possible twice (the committed outputs must match),
+# and once at the original timing. Runs against RecordingServoKitStub, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_replay [recording]
+# Without a recording argument a synthetic 2s / 100Hz session is recorded first.
+
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+
+from control_modules import PWM_controller
+from control_modules.PWM_recorder import CommandReplayer
+
+
+CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+SESSION_RATE = 100  # Hz
+SESSION_LENGTH = 2.0  # s
+
+
+def make_pwm():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PWM_controller.PWM_hat(config_file=CONFIG_FILE, simulation_mode=True, input_rate_threshold=0,
+                                      record_simulation=True)
+
+
+def record_session(path):
+    pwm = make_pwm()
+    pwm.start_recording(path)
+    period = 1.0 / SESSION_RATE
+    next_time = time.monotonic()
+    for tick in range(int(SESSION_LENGTH * SESSION_RATE)):
+        t = tick * period
+        pwm.update_values([math.sin(2 * math.pi * (0.3 + 0.1 * i) * t) for i in range(pwm.num_inputs)])
+        next_time += period
+        time.sleep(max(0.0, next_time - time.monotonic()))
+    pwm.stop_recording()
+
+
+def committed_values(pwm):
+    # Timestamps differ between runs, channel/kind/value must not
+    dump = pwm.kit.dump()
+    return list(dump['channel']), list(dump['kind']), list(dump['value'])
+
+
+def main():
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        temporary = False
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'session.pwmrec')
+        temporary = True
+        record_session(path)
+
+    try:
+        replayer = CommandReplayer(path)
+        print(f"{path}: {len(replayer)} commands, {os.path.getsize(path)} bytes")
+
+        runs = []
+        for _ in range(2):
+            pwm = make_pwm()
+            pwm.kit.clear()
+            stats = replayer.replay(pwm, realtime=False)
+            runs.append(committed_values(pwm))
+            print(f"as fast as possible: {stats['time_per_command'] * 1e6:7.2f} us/command, "
+                  f"{pwm.kit.total} values committed")
+        assert runs[0] == runs[1], "replays are not deterministic"
+        print("replays match")
+
+        pwm = make_pwm()
+        stats = replayer.replay(pwm, realtime=True)
+        print(f"original timing: {stats['elapsed']:.3f}s for {stats['commands']} commands, "
+              f"max lateness {stats['max_lateness'] * 1e3:.2f}ms")
+    finally:
+        if temporary:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+
+if __name__ == '__main__':
+    main()
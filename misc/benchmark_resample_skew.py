@@ -0,0 +1,131 @@
+# Time skew between the sensors of one frame, before and after resampling to a common instant.
+# Eight sensors on one board are sampled one after the other at 14 bit (60 SPS, ~17ms per conversion), so the
+# newest samples of a latest() / read_frame() snapshot are spread over a whole sweep. resample() interpolates
+# every sensor to one instant. The error columns compare each frame with the noise-free simulated signal at the
+# time the frame claims to represent.
+# Runs against ADCPiStub with simulated conversion time, no hardware needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_resample_skew
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+import yaml
+
+from control_modules.ADC_sensors import ADC_hat, SignalGenerator
+
+
+CONFIG_FILE = 'configuration_files/ADC_config.yaml'
+BIT_RATE = 14       # 60 SPS
+CONTROL_RATE = 50   # Hz, resampling ticks
+DURATION = 3.0      # s
+FREQUENCY = 0.25    # Hz, base frequency of the simulated signals (channel n: FREQUENCY * (1 + (n - 1) / 4))
+SIMULATION = {'white_noise_level': 0.0, 'pink_noise_level': 0.0, 'spike_probability': 0.0, 'seed': 1}
+
+
+def make_config():
+    configs = yaml.safe_load(open(CONFIG_FILE))
+    configs['ADC_CONFIG']['bit_rate'] = BIT_RATE
+    configs['ADC_CONFIG']['i2c_addresses'] = {'b1': [0x68, 0x69]}
+    configs['PRESSURE_SENSORS'] = {f"pressure{channel}": {'input': ['b1', channel], 'calibration_value': 1.0}
+                                   for channel in range(1, 9)}
+    configs['ANGLE_SENSORS'] = {}
+    file = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    yaml.safe_dump(configs, file)
+    file.close()
+    return file.name
+
+
+class TrueSignal:
+    """The stub's waveforms in continuous time (the stub holds each value for one conversion period)."""
+
+    def __init__(self, adc):
+        self.adc = adc
+        self.generator = SignalGenerator(1e6, min_voltage=0.5, max_voltage=4.5, frequency=FREQUENCY,
+                                         white_noise_level=0.0, pink_noise_level=0.0, spike_probability=0.0)
+        self.wall_offset = time.time() - time.monotonic()
+
+    def frame(self, timestamp):
+        values = np.empty(len(self.adc.sensor_names))
+        for index, sensor_config in enumerate(self.adc.sensor_configs.values()):
+            stub = self.adc.chip_adcs[self.adc.chip_of(sensor_config)]
+            sample = int((timestamp + self.wall_offset - stub.start_time) * self.generator.sample_rate)
+            values[index] = self.generator.generate(1, start=sample)[0, sensor_config['input'][1] - 1]
+        return self.adc.calibrate_frame(values)
+
+
+def report(name, skews, errors):
+    print(f"{name:30s} skew mean {np.mean(skews) * 1e3:6.1f}ms max {np.max(skews) * 1e3:6.1f}ms, "
+          f"error vs. true signal mean {np.mean(errors):6.2f} max {np.max(errors):6.2f}")
+
+
+def main():
+    config_file = make_config()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            adc = ADC_hat(config_file, simulation_mode=True, frequency=FREQUENCY, simulate_conversion_time=True,
+                          simulation_config=SIMULATION)
+    finally:
+        os.remove(config_file)
+    truth = TrueSignal(adc)
+    names = adc.sensor_names
+
+    # Before: read_frame(), sensors converted in turn, the frame is stamped after the last conversion
+    frames = []
+    timestamps = np.empty(len(names))
+    for _ in range(20):
+        timestamp, values = adc.read_frame(timestamps=timestamps)
+        frames.append((timestamp, timestamps.copy(), values.copy()))
+
+    # Before: latest() snapshots of the background sampler; after: the same buffers resampled
+    with contextlib.redirect_stdout(io.StringIO()):
+        adc.start_sampling(parallel=False)
+    time.sleep(0.5)
+    snapshots = []
+    period = 1.0 / CONTROL_RATE
+    deadline = time.monotonic()
+    for _ in range(int(DURATION * CONTROL_RATE)):
+        latest = adc.latest()
+        linear = adc.resample_frame(method='linear')
+        hold = adc.resample_frame(linear[0], method='hold')
+        snapshots.append((latest, linear, hold, time.monotonic()))
+        deadline += period
+        time.sleep(max(0.0, deadline - time.monotonic()))
+    with contextlib.redirect_stdout(io.StringIO()):
+        adc.stop_sampling()
+
+    print(f"{len(names)} sensors, bit rate {BIT_RATE} ({ADC_hat.SAMPLES_PER_SECOND[BIT_RATE]} SPS), "
+          f"sequential sampling, {len(snapshots)} control ticks")
+
+    skews, errors = [], []
+    for timestamp, sensor_timestamps, values in frames:
+        skews.append(sensor_timestamps.max() - sensor_timestamps.min())
+        errors.append(np.abs(values - truth.frame(timestamp)).mean())
+    report("read_frame()", skews, errors)
+
+    skews, errors = [], []
+    for latest, _, _, _ in snapshots:
+        sample_times = np.array([latest[name][0] for name in names])
+        values = np.array([latest[name][1] for name in names])
+        skews.append(sample_times.max() - sample_times.min())
+        errors.append(np.abs(values - truth.frame(sample_times.max())).mean())
+    report("latest()", skews, errors)
+
+    for column, name in ((1, "resample_frame('linear')"), (2, "resample_frame('hold')")):
+        errors, ages = [], []
+        for snapshot in snapshots:
+            timestamp, values = snapshot[column]
+            errors.append(np.abs(values - truth.frame(timestamp)).mean())
+            ages.append(snapshot[3] - timestamp)
+        report(name, [0.0] * len(errors), errors)
+    print(f"resampled frames lag the control tick by {np.mean(ages) * 1e3:.1f}ms on average "
+          f"(the oldest newest sample)")
+
+
+if __name__ == '__main__':
+    main()
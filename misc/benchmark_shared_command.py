@@ -0,0 +1,91 @@
+# End-to-end command latency and jitter: PWM_hat in the control process vs. PWM_hat in its own process
+# fed through the shared memory command slot (control_modules.PWM_process).
+# Latency is measured from the moment a command is available in the control loop to the end of
+# update_values() in whichever process runs PWM_hat. Runs against RecordingServoKitStub, no hardware needed.
+# On a single CPU the actuator process only runs once the control loop sleeps, so its latency includes the
+# control work after each command; the idle control loop run shows the wakeup latency alone.
+#
+# run from the repository root:
+#   python -m misc.benchmark_shared_command
+
+import contextlib
+import io
+import math
+import os
+import random
+import time
+
+from control_modules import PWM_controller
+from control_modules.PWM_process import PWM_process
+
+
+CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+INPUT_RATE = 200    # Hz
+DURATION = 5.0      # s
+PWM_KWARGS = dict(simulation_mode=True, input_rate_threshold=0, record_simulation=True)
+
+
+def control_work():
+    # Stand-in for the rest of the control loop (joystick parsing, sensors, logging)
+    return sum(math.sin(i) for i in range(2000))
+
+
+def paced_frames(num_inputs, work=True):
+    period = 1.0 / INPUT_RATE
+    next_time = time.monotonic()
+    end = next_time + DURATION
+    while next_time < end:
+        yield [random.uniform(-1, 1) for _ in range(num_inputs)]
+        if work:
+            control_work()
+        next_time += period
+        time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+def summary(name, latencies):
+    mean = sum(latencies) / len(latencies)
+    std = math.sqrt(sum((latency - mean) ** 2 for latency in latencies) / len(latencies))
+    print(f"{name:28s} latency mean {mean * 1e6:8.1f} us, std (jitter) {std * 1e6:8.1f} us, "
+          f"max {max(latencies) * 1e6:8.1f} us ({len(latencies)} commands)")
+
+
+def single_process():
+    with contextlib.redirect_stdout(io.StringIO()):
+        pwm = PWM_controller.PWM_hat(config_file=CONFIG_FILE, **PWM_KWARGS)
+    latencies = []
+    for frame in paced_frames(pwm.num_inputs):
+        start = time.monotonic()
+        pwm.update_values(frame)
+        latencies.append(time.monotonic() - start)
+    summary("single process", latencies)
+
+
+def separate_process(num_inputs, work=True):
+    with contextlib.redirect_stdout(io.StringIO()):
+        pwm = PWM_process(CONFIG_FILE, **PWM_KWARGS)
+    try:
+        for frame in paced_frames(num_inputs, work):
+            pwm.update_values(frame)
+        time.sleep(0.1)
+        stats = pwm.get_stats()
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pwm.stop()
+    name = 'shared memory, own process' if work else '  idle control loop'
+    print(f"{name:28s} latency mean {stats['latency_mean'] * 1e6:8.1f} us, "
+          f"std (jitter) {stats['latency_std'] * 1e6:8.1f} us, max {stats['latency_max'] * 1e6:8.1f} us "
+          f"({stats['applied']}/{stats['written']} commands, {stats['skipped']} overwritten)")
+
+
+def main():
+    random.seed(1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        num_inputs = PWM_controller.PWM_hat(config_file=CONFIG_FILE, **PWM_KWARGS).num_inputs
+    print(f"{os.cpu_count()} CPUs")
+    single_process()
+    separate_process(num_inputs)
+    separate_process(num_inputs, work=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Checks and times PWM_controller.SlewLimiter: a channel moving at full speed whose target is reversed behind it
+# must decelerate within max_acceleration and come back, not jump to the new target. Then measures step() per channel.
+#
+# run from the repository root:
+#   python -m misc.benchmark_slew_limiter
+
+import time
+
+from control_modules.PWM_controller import SlewLimiter
+
+
+MAX_RATE = 200.0            # deg/s
+MAX_ACCELERATION = 1000.0   # deg/s^2
+DT = 0.01                   # s, 100 Hz commit rate
+CALLS = 200000
+
+
+def reversal_check():
+    """Accelerate towards 180, reverse the target to just behind the channel at full speed, follow it until stopped."""
+    slew = SlewLimiter(1)
+    slew.snap(0, 90.0)
+    position = 90.0
+    while slew.velocity[0] < MAX_RATE:
+        position = slew.step(0, 180.0, MAX_RATE, MAX_ACCELERATION, DT)
+
+    target = position - 1.0
+    positions = [position]
+    velocity = slew.velocity[0]
+    steps = 0
+    while steps < 1000:
+        position = slew.step(0, target, MAX_RATE, MAX_ACCELERATION, DT)
+        steps += 1
+        positions.append(position)
+        if position == target and slew.velocity[0] == 0.0:
+            break
+        # Until it arrives, the velocity never changes faster than the acceleration limit allows
+        assert abs(slew.velocity[0] - velocity) <= MAX_ACCELERATION * DT + 1e-9, (steps, velocity, slew.velocity[0])
+        velocity = slew.velocity[0]
+
+    overshoot = max(positions) - target
+    assert positions[1] > positions[0], "channel jumped back instead of decelerating"
+    assert position == target and slew.velocity[0] == 0.0, f"not settled at the target after {steps} steps"
+    # Stopping from MAX_RATE takes v^2 / 2a (20 deg), the channel then comes back
+    assert overshoot >= MAX_RATE ** 2 / (2 * MAX_ACCELERATION) - MAX_RATE * DT, overshoot
+    print(f"reversal at {MAX_RATE:.0f} deg/s: overshoot {overshoot:.1f} deg, settled in {steps} steps "
+          f"({steps * DT:.2f} s)")
+
+
+def step_cost():
+    slew = SlewLimiter(1)
+    slew.snap(0, 90.0)
+    step = slew.step
+    for label, acceleration in (("rate limit only", None), ("rate + acceleration", MAX_ACCELERATION)):
+        start = time.perf_counter()
+        for i in range(CALLS):
+            # Target swings every 100 steps so the channel keeps moving
+            step(0, 45.0 if (i // 100) & 1 else 135.0, MAX_RATE, acceleration, DT)
+        cost = (time.perf_counter() - start) / CALLS
+        print(f"step(), {label:20s} {cost * 1e9:6.0f} ns/channel")
+
+
+if __name__ == '__main__':
+    reversal_check()
+    step_cost()
@@ -0,0 +1,138 @@
+# Loopback test of the binary telemetry: publishes simulated ADC_hat sensor frames at SENSOR_RATE and PWM_hat
+# committed outputs at CONTROL_RATE to a subscriber in the same process, over UDP and a Unix domain socket,
+# with and without batching. Reports the publishing cost per frame, datagrams sent and frames lost. Then checks
+# that a lone frame on an idle stream (the PWM_hat safe state after a watchdog reset) arrives within max_latency.
+# Runs against ADCPiStub and ServoKitStub, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_telemetry
+
+import contextlib
+import io
+import math
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from control_modules.ADC_sensors import ADC_hat
+from control_modules.PWM_controller import PWM_hat
+from control_modules.telemetry import TelemetryPublisher, TelemetrySubscriber
+
+
+ADC_CONFIG_FILE = 'configuration_files/ADC_config.yaml'
+PWM_CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+SENSOR_RATE = 1000  # Hz
+CONTROL_RATE = 100  # Hz
+DURATION = 2.0      # s
+
+
+def receive_all(subscriber, received, stop):
+    while not stop.is_set():
+        for name, sequence, timestamp, values in subscriber.receive(timeout=0.05):
+            received[name] = received.get(name, 0) + 1
+
+
+def run(address, max_latency):
+    subscriber = TelemetrySubscriber(address)
+    received = {}
+    stop = threading.Event()
+    thread = threading.Thread(target=receive_all, args=(subscriber, received, stop), daemon=True)
+    thread.start()
+
+    publisher = TelemetryPublisher(subscriber.address if isinstance(address, tuple) else address,
+                                   max_latency=max_latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        adc = ADC_hat(ADC_CONFIG_FILE, simulation_mode=True)
+        pwm = PWM_hat(config_file=PWM_CONFIG_FILE, simulation_mode=True, input_rate_threshold=0,
+                      record_simulation=True)
+    adc.start_telemetry(publisher)
+    pwm.start_telemetry(publisher)
+
+    # Publishing cost, measured on the sensor stream alone (read_frame() publishes its frame array)
+    stream = adc.telemetry
+    values = np.ones(len(stream.channels))
+    start = time.perf_counter()
+    for _ in range(10000):
+        stream.publish_array(0.0, values)
+    publish_cost = (time.perf_counter() - start) / 10000
+    stream.flush()
+    time.sleep(0.2)
+    # Forget the burst, its dropped datagrams would otherwise count as a sequence gap and as dropped
+    burst_stats = publisher.get_stats()
+    received.clear()
+    subscriber.lost.clear()
+    subscriber.next_sequence.clear()
+    first_sequence = stream.sequence
+
+    period = 1.0 / SENSOR_RATE
+    ticks_per_command = SENSOR_RATE // CONTROL_RATE
+    deadline = time.monotonic()
+    for tick in range(int(DURATION * SENSOR_RATE)):
+        adc.read_frame()
+        if tick % ticks_per_command == 0:
+            pwm.update_values([math.sin(tick / SENSOR_RATE)] * pwm.num_inputs)
+        deadline += period
+        time.sleep(max(0.0, deadline - time.monotonic()))
+    publisher.flush()
+    time.sleep(0.2)
+    stop.set()
+    thread.join()
+
+    stats = {key: value - burst_stats[key] for key, value in publisher.get_stats().items()}
+    sent = stream.sequence - first_sequence
+    lost = subscriber.get_stats().get('sensors', {}).get('lost', 0)
+    print(f"{'UDP' if isinstance(address, tuple) else 'Unix':4s} max_latency {max_latency * 1e3:4.0f}ms: "
+          f"publish {publish_cost * 1e6:5.2f}us/frame, {stats['datagrams_sent']:6d} datagrams "
+          f"({stats['datagrams_dropped']} dropped), sensors {received.get('sensors', 0)}/{sent} received "
+          f"({lost} lost), outputs {received.get('outputs', 0)} received")
+    publisher.close()
+    subscriber.close()
+
+
+def idle_latency(max_latency):
+    """Delivery time of frames nothing follows: a reset() frame, then a lone frame on a stream that goes idle."""
+    subscriber = TelemetrySubscriber(('127.0.0.1', 0))
+    publisher = TelemetryPublisher(subscriber.address, max_latency=max_latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pwm = PWM_hat(config_file=PWM_CONFIG_FILE, simulation_mode=True, input_rate_threshold=0,
+                      record_simulation=True)
+    pwm.start_telemetry(publisher)
+    stream = publisher.stream('idle', ['value'])
+
+    latencies = []
+    for publish in (lambda: pwm.reset(reset_pump=False), lambda: stream.publish(time.monotonic(), [1.0])):
+        start = time.monotonic()
+        publish()
+        frames = []
+        while not frames:
+            frames = subscriber.receive(timeout=1.0)
+            assert frames or time.monotonic() - start < 1.0, "idle frame never sent"
+        latencies.append(time.monotonic() - start)
+    reset_latency, idle_latency = latencies
+    # reset() flushes at once, the flush thread sends the idle batch when it is max_latency old
+    assert reset_latency < max_latency, reset_latency
+    assert idle_latency < max_latency + 0.01, idle_latency
+    print(f"idle stream, max_latency {max_latency * 1e3:4.0f}ms: reset() frame after {reset_latency * 1e3:5.2f}ms, "
+          f"lone frame after {idle_latency * 1e3:5.2f}ms")
+    publisher.close()
+    subscriber.close()
+
+
+def main():
+    print(f"{SENSOR_RATE} Hz sensor frames, {CONTROL_RATE} Hz output frames, {DURATION:.0f}s")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'telemetry.sock')
+    try:
+        for max_latency in (0.0, 0.02):
+            run(('127.0.0.1', 0), max_latency)
+            run(path, max_latency)
+    finally:
+        os.rmdir(directory)
+    idle_latency(0.02)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# Measures the PWM_hat safety watchdog: hot-path cost per input, thread wakeups, and safe-state entry latency
+# (time from the last input to reset(reset_pump=False)). Runs against ServoKitStub, so no hardware is needed.
+#
+# run from the repository root:
+#   python -m misc.benchmark_watchdog
+
+import contextlib
+import io
+import sys
+import threading
+import time
+
+from control_modules import PWM_controller
+
+
+CONFIG_FILE = 'configuration_files/PWM_config.yaml'
+THRESHOLD = 10      # Hz, watchdog timeout is 1 / THRESHOLD
+INPUT_RATE = 100    # Hz
+CALLS = 100000
+TRIALS = 10
+
+
+def report(text):
+    print(text, file=sys.__stdout__)
+
+
+def hot_path_cost():
+    """Per-input signalling cost: Event.set() to a waiting thread (old) vs. a timestamp store (new)."""
+    event = threading.Event()
+    running = True
+    wakeups = 0
+
+    def old_monitor():
+        nonlocal wakeups
+        while running:
+            if event.wait(timeout=1.0 / THRESHOLD):
+                event.clear()
+                wakeups += 1
+
+    thread = threading.Thread(target=old_monitor, daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        event.set()
+    old_cost = (time.perf_counter() - start) / CALLS
+    running = False
+    event.set()
+    thread.join()
+
+    class Holder:
+        last_input_time = 0.0
+
+    holder = Holder()
+    monotonic = time.monotonic
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        holder.last_input_time = monotonic()
+    new_cost = (time.perf_counter() - start) / CALLS
+
+    report(f"hot path, Event.set() per input:    {old_cost * 1e9:8.0f} ns/input ({wakeups} thread wakeups)")
+    report(f"hot path, deadline timestamp store: {new_cost * 1e9:8.0f} ns/input")
+
+
+def feed(pwm, duration):
+    inputs = [0.0] * pwm.num_inputs
+    period = 1.0 / INPUT_RATE
+    next_time = time.monotonic()
+    end = next_time + duration
+    while next_time < end:
+        pwm.update_values(inputs)
+        next_time += period
+        time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+def watchdog_behaviour():
+    pwm = PWM_controller.PWM_hat(config_file=CONFIG_FILE, simulation_mode=True, input_rate_threshold=THRESHOLD)
+    timeout = 1.0 / THRESHOLD
+
+    # Wakeups while inputs keep arriving on time
+    feed(pwm, 0.5)
+    wakeups = pwm.watchdog_wakeups
+    feed(pwm, 2.0)
+    wakeups = pwm.watchdog_wakeups - wakeups
+    report(f"watchdog wakeups during 2.0s of {INPUT_RATE}Hz input: {wakeups} ({2.0 * INPUT_RATE:.0f} inputs)")
+
+    latencies = []
+    for _ in range(TRIALS):
+        feed(pwm, 0.3)
+        trips = pwm.watchdog_trips
+        while pwm.watchdog_trips == trips:
+            time.sleep(0.001)
+        latencies.append(pwm.last_trip_latency)
+
+    pwm.stop_monitoring()
+    excess = [latency - timeout for latency in latencies]
+    report(f"safe state entry latency over {TRIALS} trials (timeout {timeout * 1000:.0f}ms): "
+           f"mean {sum(latencies) / len(latencies) * 1000:.2f}ms, max {max(latencies) * 1000:.2f}ms, "
+           f"max over timeout {max(excess) * 1000:.2f}ms")
+
+
+def main():
+    hot_path_cost()
+    # ServoKitStub prints every write, keep that out of the output
+    with contextlib.redirect_stdout(io.StringIO()):
+        watchdog_behaviour()
+
+
+if __name__ == '__main__':
+    main()
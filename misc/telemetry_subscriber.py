@@ -0,0 +1,50 @@
+# Minimal telemetry monitor: receives the datagrams of control_modules.telemetry.TelemetryPublisher and prints,
+# once per second, the frame rate, lost frames and newest values of every stream.
+#
+# run from the repository root:
+#   python -m misc.telemetry_subscriber 5005                  (UDP port, all interfaces)
+#   python -m misc.telemetry_subscriber /tmp/telemetry.sock   (Unix domain socket)
+
+import sys
+import time
+
+from control_modules.telemetry import TelemetrySubscriber
+
+
+def parse_address(argument):
+    if argument.isdigit():
+        return '0.0.0.0', int(argument)
+    return argument
+
+
+def main():
+    address = parse_address(sys.argv[1] if len(sys.argv) > 1 else '5005')
+    subscriber = TelemetrySubscriber(address)
+    print(f"Listening on {subscriber.address}")
+
+    newest = {}
+    counts = {}
+    next_report = time.monotonic() + 1.0
+    try:
+        while True:
+            for name, sequence, timestamp, values in subscriber.receive(timeout=0.1):
+                newest[name] = values
+                counts[name] = counts.get(name, 0) + 1
+
+            now = time.monotonic()
+            if now >= next_report:
+                stats = subscriber.get_stats()
+                for name, values in newest.items():
+                    shown = ', '.join(f"{value:.1f}" for value in values[:8])
+                    print(f"{name}: {counts.get(name, 0):5d} frames/s, {stats[name]['lost']} lost, [{shown}"
+                          f"{', ...' if len(values) > 8 else ''}]")
+                counts = {}
+                next_report = now + 1.0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
+
+
+if __name__ == '__main__':
+    main()